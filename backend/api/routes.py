@@ -1,110 +1,609 @@
 """API routes for the financial assistant."""
 
-import io
+import inspect
+import json
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
-from fastapi import APIRouter, File, HTTPException, UploadFile
+import pyarrow as pa
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
+from backend.config import settings
 from backend.models.schemas import (
     ChatRequest,
     ChatResponse,
     FinancialData,
+    SessionCreateRequest,
+    SessionMessageRequest,
+    SessionResponse,
     UploadResponse,
 )
+from backend.services.executor import get_executor
+from backend.services.metrics import PREFIX, get_metrics, render_histograms, render_samples
+from backend.services.resilience import get_resilience_policy
+from backend.services.response_cache import get_response_cache, make_cache_key
+from backend.services.sessions import get_session_store
+from backend.services.single_flight import get_single_flight
+from backend.services.tool_cache import DATASET_TOOLS, get_tool_cache
 from backend.services.vertex_ai import get_vertex_service
-from backend.tools.financial_tools import financial_tools
+from backend.tools.financial_tools import FinancialTools, dataset_handle, financial_tools
+from backend.tools.ingest import SUPPORTED_FORMATS, detect_format, read_file
 
 router = APIRouter(prefix="/api", tags=["api"])
 
+# Heavy stateless tools, sent to the process pool when configured. CPU-trivial tools
+# stay on threads, where a call costs less than pickling it to another process.
+PROCESS_POOL_TOOLS = {"monte_carlo_dcf", "dcf_sensitivity_grid"}
+
+
+def _run_stateless_tool(tool_name: str, tool_args: Dict[str, Any]) -> Any:
+    """Run a stateless tool in a worker process without shipping the dataset store."""
+    return getattr(FinancialTools, tool_name)(financial_tools, **tool_args)
+
+
+@lru_cache(maxsize=None)
+def _tool_signature(tool_name: str) -> inspect.Signature:
+    return inspect.signature(getattr(FinancialTools, tool_name))
+
+
+def _bind_tool_args(tool_name: str, tool_args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Tool arguments with defaults applied, or None if they do not match the signature."""
+    try:
+        bound = _tool_signature(tool_name).bind(financial_tools, **tool_args)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    return {name: value for name, value in bound.arguments.items() if name != "self"}
+
+
+async def execute_tool(tool_name: str, tool_args: Dict[str, Any]) -> Any:
+    """
+    Execute a financial tool off the event loop.
+
+    Results of pure tools are memoized on their arguments, and results of
+    tools that read a dataset on their arguments plus the dataset version.
+
+    Args:
+        tool_name: Name of the FinancialTools method
+        tool_args: Keyword arguments for the tool
+
+    Returns:
+        Tool result
+    """
+    executor = get_executor()
+    metrics = get_metrics()
+
+    async def run() -> Any:
+        with metrics.tool_duration.time(tool_name):
+            try:
+                if tool_name in PROCESS_POOL_TOOLS:
+                    return await executor.run_in_process(_run_stateless_tool, tool_name, tool_args)
+                return await executor.run_in_thread(
+                    getattr(financial_tools, tool_name), **tool_args
+                )
+            except Exception:
+                metrics.tool_errors.inc(1, tool_name)
+                raise
+
+    cache = get_tool_cache()
+    if not settings.tool_cache_enabled or not cache.is_cacheable(tool_name):
+        return await run()
+    bound_args = _bind_tool_args(tool_name, tool_args)
+    if bound_args is None:
+        # Invalid arguments: let the tool call fail as usual
+        return await run()
+    if tool_name not in DATASET_TOOLS:
+        return await cache.call(tool_name, bound_args, run)
+
+    # Re-checked after the run: a dataset replaced mid-call must not be cached as the old version
+    dataset_name = bound_args["dataset_name"]
+
+    def current_version() -> Optional[int]:
+        return financial_tools.data_store.version(dataset_name)
+
+    return await cache.call(tool_name, bound_args, run, current_version(), current_version)
+
+
+async def _dataset_digest() -> Optional[str]:
+    """Digest of the stored datasets sent to the model instead of their rows."""
+    return await get_executor().run_in_thread(
+        financial_tools.datasets_digest,
+        settings.dataset_digest_sample_rows,
+        settings.dataset_digest_max_datasets,
+    )
+
+
+def _chat_request_key(
+    request: ChatRequest, model_name: str, dataset_versions: Dict[str, int]
+) -> Optional[str]:
+    """Key identifying equivalent chat requests, or None if the request opts out."""
+    if request.bypass_cache:
+        return None
+    # Tools may read any stored dataset, so every dataset's version is part of the key
+    return make_cache_key(
+        request.messages,
+        model=model_name,
+        temperature=_effective_temperature(request),
+        max_tokens=request.max_tokens or settings.max_output_tokens,
+        dataset_versions=dataset_versions,
+    )
+
+
+def _effective_temperature(request: ChatRequest) -> float:
+    """Temperature the request will be generated with."""
+    if request.temperature is not None:
+        return request.temperature
+    return settings.default_temperature
+
+
+def _is_cacheable(request: ChatRequest) -> bool:
+    """Whether the response to a request may be stored in the response cache."""
+    if not settings.response_cache_enabled:
+        return False
+    return not settings.response_cache_deterministic_only or _effective_temperature(request) == 0
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest) -> ChatResponse:
     """
     Chat endpoint that processes messages using Gemini model.
 
+    Identical deterministic requests are answered from the response cache and
+    identical concurrent requests share one model call, unless ``bypass_cache``
+    is set.
+
     Args:
         request: Chat request with messages and optional parameters
 
     Returns:
-        Chat response with assistant message and tool calls
+        Chat response with assistant message and executed tool calls
     """
     try:
-        # Generate response using Vertex AI
         vertex_service = get_vertex_service()
-        result = await vertex_service.generate_response(
-            messages=request.messages,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens,
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}") from e
+    if request.model is not None:
+        try:
+            vertex_service.models.validate(request.model)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    try:
+        cache = get_response_cache()
+        dataset_versions = financial_tools.data_store.versions()
+        request_key = _chat_request_key(
+            request, request.model or vertex_service.model_name, dataset_versions
         )
+        cache_key = request_key if _is_cacheable(request) else None
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return ChatResponse(**cached, cached=True)
+
+        async def generate() -> Dict[str, Any]:
+            # Generate response using Vertex AI; requested tools run server-side
+            return await vertex_service.generate_response(
+                messages=request.messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                tool_executor=execute_tool,
+                model=request.model,
+                context=await _dataset_digest(),
+            )
 
-        # Process any tool calls
-        if result.get("tool_calls"):
-            for tool_call in result["tool_calls"]:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["arguments"]
-
-                # Execute the tool function
-                if hasattr(financial_tools, tool_name):
-                    tool_func = getattr(financial_tools, tool_name)
-                    try:
-                        # Execute tool but don't need to use result here
-                        # The model will handle the tool results in its response
-                        tool_func(**tool_args)
-                    except Exception as tool_err:
-                        print(f"Error executing tool {tool_name}: {tool_err}")
-
-        return ChatResponse(
+        coalesced = False
+        if request_key is not None and settings.single_flight_enabled:
+            result, coalesced = await get_single_flight().do(request_key, generate)
+        else:
+            result = await generate()
+
+        response = ChatResponse(
             response=result["response"],
             tool_calls=result.get("tool_calls"),
             model_used=result["model_used"],
+            coalesced=coalesced,
         )
+        # An answer computed while a dataset was replaced must not be stored under the old key
+        if (
+            cache_key is not None
+            and not coalesced
+            and financial_tools.data_store.versions() == dataset_versions
+        ):
+            cache.set(cache_key, response.model_dump(exclude={"cached", "coalesced"}))
+
+        return response
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}") from e
 
 
+def _format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Streaming chat endpoint using Server-Sent Events.
+
+    Emits ``delta`` events with text chunks as they arrive, ``tool_call`` and
+    ``tool_result`` events around server-side tool execution, and a final
+    ``done`` event (or ``error`` if generation fails mid-stream).
+
+    Args:
+        request: Chat request with messages and optional parameters
+
+    Returns:
+        Streaming response with ``text/event-stream`` content
+    """
+    try:
+        vertex_service = get_vertex_service()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}") from e
+    if request.model is not None:
+        try:
+            vertex_service.models.validate(request.model)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in vertex_service.stream_response(
+                messages=request.messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                tool_executor=execute_tool,
+                model=request.model,
+                context=await _dataset_digest(),
+            ):
+                yield _format_sse(event["event"], event["data"])
+        except Exception as e:
+            yield _format_sse("error", {"detail": f"Error generating response: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/sessions", response_model=SessionResponse)
+async def create_session(request: SessionCreateRequest) -> SessionResponse:
+    """
+    Start a server-side chat session.
+
+    The session keeps the conversation history, so each turn only sends the
+    new user message.
+
+    Args:
+        request: Session options
+
+    Returns:
+        Session identifier and model
+    """
+    try:
+        vertex_service = get_vertex_service()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting session: {str(e)}") from e
+    if request.model is not None:
+        try:
+            vertex_service.models.validate(request.model)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    try:
+        model_name = request.model or vertex_service.model_name
+        chat = vertex_service.start_session(model_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting session: {str(e)}") from e
+
+    session = get_session_store().create(model_name, chat)
+    return SessionResponse(session_id=session.session_id, model_used=model_name)
+
+
+@router.post("/sessions/{session_id}/messages", response_model=ChatResponse)
+async def send_session_message(session_id: str, request: SessionMessageRequest) -> ChatResponse:
+    """
+    Send one user turn on a chat session.
+
+    Args:
+        session_id: Session identifier
+        request: New user message and optional parameters
+
+    Returns:
+        Chat response with assistant message and executed tool calls
+    """
+    store = get_session_store()
+    try:
+        session = store.get(session_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail="Session not found or expired") from e
+
+    async with session.lock:
+        # The digest stays in the session history, so it is only resent when datasets change
+        dataset_versions = financial_tools.data_store.versions()
+        context = None
+        if dataset_versions != session.dataset_versions:
+            context = await _dataset_digest()
+        try:
+            result = await get_vertex_service().send_session_message(
+                session.chat,
+                session.model_name,
+                request.content,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                tool_executor=execute_tool,
+                context=context,
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error generating response: {str(e)}"
+            ) from e
+
+        # A turn dropped from the history takes its digest along, so it is resent next turn
+        added_bytes = 0
+        if result["kept_in_history"]:
+            session.dataset_versions = dataset_versions
+            added_bytes = len(request.content.encode("utf-8"))
+            added_bytes += len(result["response"].encode("utf-8"))
+            if context:
+                added_bytes += len(context.encode("utf-8"))
+            if result["tool_calls"]:
+                added_bytes += len(json.dumps(result["tool_calls"], default=str).encode("utf-8"))
+
+    # The reply is returned even if the session ended while the model was answering
+    store.record_turn(session, added_bytes)
+
+    return ChatResponse(
+        response=result["response"],
+        tool_calls=result["tool_calls"],
+        model_used=session.model_name,
+    )
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str) -> Dict[str, Any]:
+    """
+    End a chat session and free its history.
+
+    Args:
+        session_id: Session identifier
+
+    Returns:
+        Deleted session identifier
+    """
+    try:
+        get_session_store().delete(session_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail="Session not found or expired") from e
+    return {"session_id": session_id, "deleted": True}
+
+
+@router.get("/sessions/stats")
+async def session_stats() -> Dict[str, Any]:
+    """
+    Get live session count, memory use and eviction counters.
+
+    Returns:
+        Session store statistics
+    """
+    return get_session_store().stats()
+
+
 @router.post("/upload", response_model=UploadResponse)
-async def upload_csv(file: UploadFile = File(...)) -> UploadResponse:
+async def upload_csv(
+    file: UploadFile = File(...),
+    dataset_name: Optional[str] = Query(
+        None, description="Handle to store the dataset under (default: from the file name)"
+    ),
+) -> UploadResponse:
     """
-    Upload and parse CSV file with financial data.
+    Upload and parse a CSV, Parquet, Arrow IPC or Feather file with financial data.
+
+    The dataset is stored server-side under a handle that the model and the
+    tools refer to by name; the model only sees a digest of it, not its rows.
 
     Args:
-        file: CSV file to upload
+        file: Data file to upload
+        dataset_name: Handle to store the dataset under (default: from the file name)
 
     Returns:
         Summary of uploaded data
     """
     # Validate file type first (before try block)
-    if not file.filename or not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    fmt = detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File must be one of: {', '.join(sorted(SUPPORTED_FORMATS))}",
+        )
 
     try:
-        # Read CSV
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+        # Parse straight from the spooled upload, without reading it into one string.
+        # Columnar formats skip text parsing and are memory-mapped once spooled to disk.
+        # Parsing and storing run on the executor so the event loop keeps serving chats.
+        executor = get_executor()
+        metrics = get_metrics()
+        started = time.perf_counter()
+        await file.seek(0)
+        df = await executor.run_in_thread(read_file, file.file, fmt)
 
-        # Convert to list of dictionaries
-        data = df.to_dict("records")
-
-        # Store in financial tools
-        financial_tools.store_financial_data(data, dataset_name="uploaded")
+        # Store the columnar frame directly (dtypes are compacted on store)
+        handle = dataset_handle(dataset_name or file.filename)
+        stored = await executor.run_in_thread(financial_tools.store_dataframe, df, handle)
+        metrics.upload_parse_duration.observe(time.perf_counter() - started, fmt)
+        if file.size is not None:
+            metrics.upload_size.observe(file.size, fmt)
 
         # Create summary
+        sample = df.head(10).astype(object)
+        # Nested cells (e.g. Parquet list columns) arrive as NumPy arrays
+        sample = sample.map(lambda v: v.tolist() if isinstance(v, np.ndarray) else v)
         data_summary = FinancialData(
-            data=data[:10],  # Return first 10 rows as sample
+            data=sample.where(sample.notna(), None).to_dict("records"),
             columns=list(df.columns),
             row_count=len(df),
         )
 
         return UploadResponse(
-            message=f"Successfully uploaded {len(df)} rows of financial data",
+            message=f"Successfully uploaded {len(df)} rows of financial data as '{handle}'",
+            dataset=handle,
             data_summary=data_summary,
+            memory_bytes_before=stored["memory_bytes_before"],
+            memory_bytes_after=stored["memory_bytes_after"],
         )
 
     except pd.errors.EmptyDataError as e:
         raise HTTPException(status_code=400, detail="CSV file is empty") from e
+    except pa.ArrowInvalid as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {fmt} file: {str(e)}") from e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing CSV: {str(e)}") from e
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}") from e
+
+
+@router.get("/datasets/stats")
+async def dataset_stats():
+    """Dataset store size and hit/miss statistics."""
+    return financial_tools.data_store.stats()
+
+
+@router.get("/models")
+async def list_models() -> Dict[str, Any]:
+    """
+    List selectable models and the ones already built and ready to serve.
+
+    Returns:
+        Default model, available models and warm models with their build time
+    """
+    try:
+        vertex_service = get_vertex_service()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading models: {str(e)}") from e
+    return {"default": vertex_service.model_name, **vertex_service.models.stats()}
+
+
+@router.get("/resilience/stats")
+async def resilience_stats() -> Dict[str, Any]:
+    """
+    Get retry/timeout/hedge counters and per-model latency histograms.
+
+    Returns:
+        Resilience policy statistics
+    """
+    return get_resilience_policy().stats()
+
+
+@router.get("/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """
+    Get response cache size and hit/miss counters.
+
+    Returns:
+        Cache statistics
+    """
+    return get_response_cache().stats()
+
+
+@router.get("/coalescing/stats")
+async def coalescing_stats() -> Dict[str, Any]:
+    """
+    Get how many chat requests shared an identical in-flight model call.
+
+    Returns:
+        Single-flight statistics
+    """
+    return get_single_flight().stats()
+
+
+@router.get("/tools/cache/stats")
+async def tool_cache_stats() -> Dict[str, Any]:
+    """
+    Get memoized tool result count and per-tool hit rates.
+
+    Returns:
+        Tool cache statistics
+    """
+    return get_tool_cache().stats()
+
+
+@router.get("/executor/stats")
+async def executor_stats():
+    """Executor queue depth and wait-time metrics."""
+    return get_executor().stats()
+
+
+def _scraped_metrics() -> List[str]:
+    """Exposition lines for values other components already track, read at scrape time."""
+    latency = get_resilience_policy().latency_histograms()
+    lines = render_histograms(
+        PREFIX + "model_latency_seconds",
+        "Latency of successful model calls.",
+        ["model"],
+        {(name,): histogram for name, histogram in latency.items()},
+    )
+
+    response_cache = get_response_cache().stats()
+    lines += render_samples(
+        PREFIX + "response_cache_requests_total",
+        "counter",
+        "Response cache lookups.",
+        ["result"],
+        {("hit",): response_cache["hits"], ("miss",): response_cache["misses"]},
+    )
+    tool_requests = {}
+    for tool_name, tool in get_tool_cache().stats()["tools"].items():
+        tool_requests[(tool_name, "hit")] = tool["hits"]
+        tool_requests[(tool_name, "miss")] = tool["misses"]
+    lines += render_samples(
+        PREFIX + "tool_cache_requests_total",
+        "counter",
+        "Tool result cache lookups.",
+        ["tool", "result"],
+        tool_requests,
+    )
+    lines += render_samples(
+        PREFIX + "chat_coalesced_total",
+        "counter",
+        "Chat requests that shared an identical in-flight model call.",
+        [],
+        {(): get_single_flight().stats()["coalesced"]},
+    )
+
+    store = financial_tools.data_store.stats()
+    lines += render_samples(
+        PREFIX + "dataset_store_bytes",
+        "gauge",
+        "Memory used by datasets resident in the dataset store.",
+        [],
+        {(): store["memory_bytes"]},
+    )
+    lines += render_samples(
+        PREFIX + "dataset_store_datasets",
+        "gauge",
+        "Datasets in the dataset store.",
+        ["state"],
+        {("in_memory",): store["in_memory"], ("spilled",): store["spilled"]},
+    )
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Export metrics in the Prometheus text format.
+
+    Returns:
+        Model latency, tool and upload histograms, token, cache and Techaura
+        counters, and dataset store size
+    """
+    return PlainTextResponse(
+        get_metrics().render(_scraped_metrics()), media_type="text/plain; version=0.0.4"
+    )
 
 
 @router.get("/health")
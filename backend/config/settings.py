@@ -1,6 +1,6 @@
 """Configuration module for the financial assistant application."""
 
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -10,15 +10,44 @@ class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
     model_config = SettingsConfigDict(
-        env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore",
+        protected_namespaces=(),
     )
 
     # Google Cloud & Vertex AI
     project_id: str = Field(..., description="GCP Project ID")
     location: str = Field(default="us-central1", description="GCP Location")
     gemini_model: str = Field(default="gemini-1.5-pro", description="Gemini model name")
+    available_models: List[str] = Field(
+        default=["gemini-1.5-pro", "gemini-1.5-flash"],
+        description="Models a chat request may select (the default model is always allowed)",
+    )
     google_application_credentials: str = Field(..., description="Path to service account JSON")
 
+    # Model backend ("fake" runs an offline stand-in model, e.g. for load tests)
+    model_backend: str = Field(default="vertex", description="Model backend: vertex or fake")
+    fake_latency_distribution: str = Field(
+        default="lognormal",
+        description="Fake model latency distribution: fixed, normal, uniform, exponential, lognormal",
+    )
+    fake_latency_ms: float = Field(
+        default=400.0, description="Fake model mean (median for lognormal) latency per call in ms"
+    )
+    fake_latency_spread_ms: float = Field(
+        default=200.0, description="Fake model latency spread (std or half-width) in ms"
+    )
+    fake_error_rate: float = Field(
+        default=0.0, description="Probability that a fake model call fails with a transient error"
+    )
+    fake_tool_call_rate: float = Field(
+        default=0.0,
+        description="Probability of a scripted tool call when a prompt names no tool",
+    )
+    fake_seed: Optional[int] = Field(None, description="Random seed for the fake model")
+
     # API Configuration
     api_host: str = Field(default="0.0.0.0", description="API host")
     api_port: int = Field(default=8000, description="API port")
@@ -27,11 +56,139 @@ class Settings(BaseSettings):
     # Model parameters
     default_temperature: float = Field(default=0.7, description="Default temperature")
     max_output_tokens: int = Field(default=2048, description="Max output tokens")
+    max_tool_iterations: int = Field(
+        default=5, description="Max server-side function-calling rounds per chat request"
+    )
+
+    # Model call resilience
+    model_attempt_timeout_seconds: float = Field(
+        default=60.0, description="Deadline per model call attempt in seconds (0 disables)"
+    )
+    model_max_attempts: int = Field(
+        default=3, description="Attempts per model call on retryable errors"
+    )
+    model_backoff_base_seconds: float = Field(
+        default=0.5, description="Backoff after the first failed attempt (doubles per retry)"
+    )
+    model_backoff_max_seconds: float = Field(default=8.0, description="Max retry backoff")
+    hedge_model: Optional[str] = Field(
+        None, description="Faster model for hedged requests, e.g. gemini-1.5-flash (off if unset)"
+    )
+    hedge_quantile: float = Field(
+        default=95.0, description="Primary latency percentile after which a hedge is sent"
+    )
+    hedge_min_samples: int = Field(
+        default=20, description="Latency samples needed before the percentile is used"
+    )
+    hedge_delay_seconds: float = Field(
+        default=10.0, description="Hedge delay used until enough latency samples exist"
+    )
+
+    # Conversation history
+    history_token_budget: int = Field(
+        default=6000, description="Max history tokens sent to the model (0 disables compaction)"
+    )
+    history_min_recent_messages: int = Field(
+        default=4, description="Most recent messages always sent verbatim"
+    )
+
+    # Server-side chat sessions
+    session_idle_timeout_seconds: float = Field(
+        default=1800.0, description="Seconds without a turn before a session expires"
+    )
+    session_max_count: int = Field(default=1000, description="Max live chat sessions")
+    session_memory_budget_mb: int = Field(
+        default=64, description="Memory cap for session histories in MB (0 for unbounded)"
+    )
+
+    # Response cache and request coalescing
+    response_cache_enabled: bool = Field(default=True, description="Cache chat completions")
+    response_cache_max_entries: int = Field(
+        default=256, description="Max cached chat completions (LRU eviction)"
+    )
+    response_cache_ttl_seconds: float = Field(
+        default=3600.0, description="Seconds a cached chat completion stays valid"
+    )
+    response_cache_deterministic_only: bool = Field(
+        default=True, description="Only cache requests with temperature 0"
+    )
+    single_flight_enabled: bool = Field(
+        default=True, description="Share one model call among identical concurrent requests"
+    )
+
+    # Tool result memoization
+    tool_cache_enabled: bool = Field(default=True, description="Memoize financial tool results")
+    tool_cache_max_entries: int = Field(
+        default=1024, description="Max memoized tool results (LRU eviction)"
+    )
+
+    # Dataset store
+    dataset_memory_budget_mb: int = Field(
+        default=512, description="Memory budget for stored datasets in MB (0 for unbounded)"
+    )
+    dataset_spill_dir: Optional[str] = Field(
+        None,
+        description="Parent of each worker's private spill directory (default: temp dir)",
+    )
+    dataset_compact_dtypes: bool = Field(
+        default=True, description="Downcast numerics and use categoricals/datetimes on store"
+    )
+    dataset_digest_sample_rows: int = Field(
+        default=3, description="Sample rows per dataset in the prompt's dataset digest"
+    )
+    dataset_digest_max_datasets: int = Field(
+        default=5, description="Datasets described in full in the prompt's dataset digest"
+    )
+
+    # Executor for CPU-bound work
+    executor_thread_workers: int = Field(
+        default=8, description="Threads for pandas/NumPy work off the event loop"
+    )
+    executor_process_workers: int = Field(
+        default=0, description="Processes for heavy pure-Python tools (0 uses threads)"
+    )
 
     # Techaura Sales Sync Configuration
     techaura_api_key: Optional[str] = Field(None, description="Techaura API key")
     techaura_api_url: Optional[str] = Field(None, description="Techaura API base URL")
     techaura_company_id: Optional[str] = Field(None, description="Techaura company ID")
+    techaura_timeout_seconds: float = Field(
+        default=30.0, description="Techaura read/write/pool timeout in seconds"
+    )
+    techaura_connect_timeout_seconds: float = Field(
+        default=5.0, description="Techaura connection timeout in seconds"
+    )
+    techaura_max_connections: int = Field(
+        default=20, description="Max open connections to the Techaura API"
+    )
+    techaura_max_keepalive_connections: int = Field(
+        default=10, description="Max idle keep-alive connections kept in the pool"
+    )
+    techaura_keepalive_expiry_seconds: float = Field(
+        default=30.0, description="Seconds an idle keep-alive connection is kept"
+    )
+    techaura_http2: bool = Field(
+        default=True, description="Use HTTP/2 for Techaura when the h2 package is installed"
+    )
+    techaura_page_size: int = Field(default=500, description="Sales per Techaura page request")
+    techaura_prefetch_pages: int = Field(
+        default=4, description="Techaura sales pages fetched ahead of the consumer"
+    )
+    techaura_state_db: str = Field(
+        default="techaura_sync.db", description="SQLite file with Techaura sync watermarks"
+    )
+    techaura_sync_overlap_seconds: float = Field(
+        default=600.0, description="Incremental syncs re-fetch this far behind the watermark"
+    )
+    techaura_backfill_shard_days: float = Field(
+        default=7.0, description="Days per date-range shard of a Techaura backfill"
+    )
+    techaura_backfill_concurrency: int = Field(
+        default=8, description="Backfill shards fetched concurrently"
+    )
+    techaura_backfill_max_attempts: int = Field(
+        default=3, description="Attempts per backfill shard on transient errors"
+    )
 
 
 # Global settings instance
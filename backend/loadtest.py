@@ -0,0 +1,231 @@
+"""Offline load test for the API.
+
+Drives concurrent chat and upload traffic against the FastAPI app in-process
+(no network, no Vertex AI quota) using the fake model backend, and reports
+throughput and latency percentiles per endpoint.
+
+Usage:
+    python -m backend.loadtest --requests 500 --concurrency 50 --upload-ratio 0.1
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+# Must be set before the settings are loaded; a real project or credentials are not needed
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("PROJECT_ID", "loadtest")
+os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", "")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from backend.services.fake_model import SCRIPTED_DATASET  # noqa: E402
+
+# Stored under the handle the fake model's scripted dataset calls read
+UPLOAD_FILENAME = f"{SCRIPTED_DATASET}.csv"
+
+PROMPTS = [
+    "Calcula la liquidez con activos corrientes de 150000 y pasivos corrientes de 100000",
+    "¿Cómo está el endeudamiento de la empresa?",
+    "Analiza la rentabilidad: ROE, ROA y margen neto",
+    "Dame una proyección DCF del flujo de caja",
+    "Analiza la tendencia de los ingresos",
+    "¿Qué alertas de riesgo ves en estos indicadores?",
+    "Resume la situación financiera general",
+    "Explica qué significa la prueba ácida",
+]
+
+
+def make_upload(rows: int, seed: int = 0) -> bytes:
+    """Build a synthetic financial statements CSV."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "periodo": [f"{2000 + i // 4}-Q{i % 4 + 1}" for i in range(rows)],
+            "ingresos": rng.uniform(5e5, 2e6, rows).round(2),
+            "utilidad_neta": rng.uniform(1e4, 2e5, rows).round(2),
+            "activos_corrientes": rng.uniform(1e5, 5e5, rows).round(2),
+            "pasivos_corrientes": rng.uniform(5e4, 4e5, rows).round(2),
+            "activos_totales": rng.uniform(1e6, 3e6, rows).round(2),
+            "pasivos_totales": rng.uniform(3e5, 2e6, rows).round(2),
+            "patrimonio": rng.uniform(5e5, 1.5e6, rows).round(2),
+        }
+    )
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Summarize one endpoint's results.
+
+    Args:
+        latencies: Latencies in seconds of all requests
+        errors: Number of failed requests
+        elapsed: Wall-clock duration of the run in seconds
+
+    Returns:
+        Dictionary with counts, throughput and latency percentiles in milliseconds
+    """
+    values = np.asarray(latencies) * 1000
+    percentiles = (
+        dict(
+            zip(["p50", "p90", "p95", "p99"], np.percentile(values, [50, 90, 95, 99]), strict=True)
+        )
+        if len(values)
+        else dict.fromkeys(["p50", "p90", "p95", "p99"])
+    )
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else None,
+        **{k: float(v) if v is not None else None for k, v in percentiles.items()},
+        "max": float(values.max()) if len(values) else None,
+    }
+
+
+async def run_load_test(
+    app: Any,
+    requests: int = 200,
+    concurrency: int = 20,
+    upload_ratio: float = 0.1,
+    upload_rows: int = 1000,
+    bypass_cache: bool = True,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Send concurrent chat and upload requests to an ASGI app.
+
+    Args:
+        app: ASGI application (normally ``backend.main.app``)
+        requests: Total requests to send
+        concurrency: Requests in flight at once
+        upload_ratio: Share of requests that are file uploads
+        upload_rows: Rows of the uploaded CSV
+        bypass_cache: Skip the response cache so every chat reaches the model
+        seed: Random seed for the traffic mix
+
+    Returns:
+        Report with overall and per-endpoint results
+    """
+    rng = random.Random(seed)
+    upload = make_upload(upload_rows, seed)
+    plan = ["upload" if rng.random() < upload_ratio else "chat" for _ in range(requests)]
+    latencies: Dict[str, List[float]] = {"chat": [], "upload": []}
+    errors: Dict[str, int] = {"chat": 0, "upload": 0}
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for kind in plan:
+        queue.put_nowait(kind)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://loadtest", timeout=None
+    ) as client:
+
+        async def send(kind: str) -> httpx.Response:
+            if kind == "upload":
+                files = {"file": (UPLOAD_FILENAME, upload, "text/csv")}
+                return await client.post("/api/upload", files=files)
+            payload = {
+                "messages": [{"role": "user", "content": rng.choice(PROMPTS)}],
+                "bypass_cache": bypass_cache,
+            }
+            return await client.post("/api/chat", json=payload)
+
+        async def worker() -> None:
+            while not queue.empty():
+                kind = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await send(kind)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                latencies[kind].append(time.perf_counter() - start)
+                errors[kind] += failed
+
+        # Untimed: scripted dataset calls must find the dataset from the first chat on
+        seeded = await send("upload")
+        seeded.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = latencies["chat"] + latencies["upload"]
+    return {
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "overall": summarize(all_latencies, errors["chat"] + errors["upload"], elapsed),
+        "endpoints": {
+            kind: summarize(latencies[kind], errors[kind], elapsed)
+            for kind in ("chat", "upload")
+            if latencies[kind]
+        },
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a load test report as a text table."""
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    header = f"{'endpoint':<10}{'reqs':>7}{'errors':>8}{'req/s':>9}" + "".join(
+        f"{name + ' ms':>10}" for name in ("p50", "p90", "p95", "p99", "max")
+    )
+    lines = [
+        f"Load test: {report['overall']['requests']} requests, concurrency "
+        f"{report['concurrency']}, {report['elapsed_seconds']:.2f}s",
+        header,
+    ]
+    rows = [*report["endpoints"].items(), ("overall", report["overall"])]
+    for name, result in rows:
+        lines.append(
+            f"{name:<10}{result['requests']:>7}{result['errors']:>8}"
+            f"{result['throughput_rps'] or 0:>9.1f} "
+            + "".join(ms(result[key]) + " " for key in ("p50", "p90", "p95", "p99", "max"))
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Offline load test for the financial assistant")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight")
+    parser.add_argument("--upload-ratio", type=float, default=0.1, help="Share of uploads")
+    parser.add_argument("--upload-rows", type=int, default=1000, help="Rows per uploaded CSV")
+    parser.add_argument(
+        "--use-cache", action="store_true", help="Let chat requests hit the response cache"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the traffic mix")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from backend.main import app
+
+    report = asyncio.run(
+        run_load_test(
+            app,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            upload_ratio=args.upload_ratio,
+            upload_rows=args.upload_rows,
+            bypass_cache=not args.use_cache,
+            seed=args.seed,
+        )
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,28 @@
 """Main FastAPI application."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.api.routes import router
 from backend.config import settings
+from backend.services.executor import shutdown_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release worker pools on shutdown."""
+    yield
+    shutdown_executor()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Asistente Analista Financiero",
     description="AI-powered financial analysis assistant using Vertex AI Gemini",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -19,6 +19,9 @@ class ChatRequest(BaseModel):
     model: Optional[str] = Field(None, description="Model to use (overrides default)")
     temperature: Optional[float] = Field(None, description="Temperature (0-1)")
     max_tokens: Optional[int] = Field(None, description="Max output tokens")
+    bypass_cache: bool = Field(
+        False, description="Skip the response cache and request coalescing for this request"
+    )
 
 
 class ChatResponse(BaseModel):
@@ -31,6 +34,34 @@ class ChatResponse(BaseModel):
         None, description="Tool calls made during generation"
     )
     model_used: str = Field(..., description="Model used for generation")
+    cached: bool = Field(default=False, description="Whether the response came from the cache")
+    coalesced: bool = Field(
+        default=False,
+        description="Whether the response was shared from an identical in-flight request",
+    )
+
+
+class SessionCreateRequest(BaseModel):
+    """Request model for starting a server-side chat session."""
+
+    model: Optional[str] = Field(None, description="Model to use (overrides default)")
+
+
+class SessionResponse(BaseModel):
+    """Response for a started chat session."""
+
+    model_config = {"protected_namespaces": ()}
+
+    session_id: str = Field(..., description="Session identifier")
+    model_used: str = Field(..., description="Model the session uses")
+
+
+class SessionMessageRequest(BaseModel):
+    """Request model for one turn on a chat session."""
+
+    content: str = Field(..., description="New user message")
+    temperature: Optional[float] = Field(None, description="Temperature (0-1)")
+    max_tokens: Optional[int] = Field(None, description="Max output tokens")
 
 
 class FinancialData(BaseModel):
@@ -45,7 +76,14 @@ class UploadResponse(BaseModel):
     """Response for CSV upload."""
 
     message: str = Field(..., description="Status message")
+    dataset: str = Field(..., description="Handle the dataset is stored under")
     data_summary: FinancialData = Field(..., description="Summary of uploaded data")
+    memory_bytes_before: Optional[int] = Field(
+        None, description="Dataset memory footprint before dtype compaction"
+    )
+    memory_bytes_after: Optional[int] = Field(
+        None, description="Dataset memory footprint after dtype compaction"
+    )
 
 
 class FinancialRatios(BaseModel):
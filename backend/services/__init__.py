@@ -1,5 +1,36 @@
 """Services package."""
 
+from backend.services.executor import TaskExecutor, get_executor
+from backend.services.fake_model import FakeGenerativeModel
+from backend.services.history import HistoryManager, get_history_manager
+from backend.services.metrics import Metrics, get_metrics
+from backend.services.model_registry import ModelRegistry
+from backend.services.resilience import ResiliencePolicy, get_resilience_policy
+from backend.services.response_cache import ResponseCache, get_response_cache
+from backend.services.sessions import SessionStore, get_session_store
+from backend.services.single_flight import SingleFlight, get_single_flight
+from backend.services.tool_cache import ToolCache, get_tool_cache
 from backend.services.vertex_ai import VertexAIService, get_vertex_service
 
-__all__ = ["get_vertex_service", "VertexAIService"]
+__all__ = [
+    "get_vertex_service",
+    "VertexAIService",
+    "get_executor",
+    "TaskExecutor",
+    "get_response_cache",
+    "ResponseCache",
+    "ModelRegistry",
+    "FakeGenerativeModel",
+    "get_history_manager",
+    "HistoryManager",
+    "get_session_store",
+    "SessionStore",
+    "get_single_flight",
+    "SingleFlight",
+    "get_resilience_policy",
+    "ResiliencePolicy",
+    "get_tool_cache",
+    "ToolCache",
+    "get_metrics",
+    "Metrics",
+]
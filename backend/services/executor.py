@@ -0,0 +1,245 @@
+"""Executor layer that keeps CPU-bound work off the asyncio event loop.
+
+Pandas/NumPy work releases the GIL for most of its runtime and runs well on a
+thread pool. Heavy pure-Python work holds the GIL and is better sent to a
+process pool. Both pools track queue depth and wait/run times.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from backend.config import settings
+
+T = TypeVar("T")
+
+
+def _timed_call(func: Callable[..., T], *args: Any, **kwargs: Any) -> Tuple[float, float, T]:
+    """Run ``func`` and return (start time, end time, result) for wait/run metrics."""
+    start = time.time()
+    result = func(*args, **kwargs)
+    return start, time.time(), result
+
+
+class PoolStats:
+    """Queue depth and latency counters for one worker pool."""
+
+    def __init__(self, workers: int, window: int = 1000):
+        """
+        Initialize pool stats.
+
+        Args:
+            workers: Number of workers in the pool
+            window: Number of recent tasks kept for percentile estimates
+        """
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_times: Deque[float] = deque(maxlen=window)
+        self.run_times: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_submit(self) -> None:
+        """Record a task handed to the pool."""
+        with self._lock:
+            self.submitted += 1
+
+    def record_done(self, wait_time: Optional[float], run_time: Optional[float]) -> None:
+        """Record a finished task (times are None when it failed)."""
+        with self._lock:
+            self.completed += 1
+            if wait_time is None or run_time is None:
+                self.failed += 1
+                return
+            self.wait_times.append(max(wait_time, 0.0))
+            self.run_times.append(max(run_time, 0.0))
+
+    @staticmethod
+    def _percentile(values: Deque[float], q: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time copy of the counters."""
+        with self._lock:
+            in_flight = self.submitted - self.completed
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - self.workers),
+                "wait_time_p50": self._percentile(self.wait_times, 50),
+                "wait_time_p99": self._percentile(self.wait_times, 99),
+                "wait_time_max": max(self.wait_times, default=None),
+                "run_time_p50": self._percentile(self.run_times, 50),
+                "run_time_p99": self._percentile(self.run_times, 99),
+            }
+
+
+class TaskExecutor:
+    """Thread and process pools awaited from async code."""
+
+    def __init__(self, thread_workers: int = 8, process_workers: int = 0):
+        """
+        Initialize executor.
+
+        Args:
+            thread_workers: Threads for GIL-releasing pandas/NumPy work
+            process_workers: Processes for heavy pure-Python work (0 runs it on threads)
+        """
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=thread_workers, thread_name_prefix="cpu-worker"
+        )
+        self._process_pool = (
+            ProcessPoolExecutor(max_workers=process_workers) if process_workers > 0 else None
+        )
+        self.thread_stats = PoolStats(thread_workers)
+        self.process_stats = PoolStats(process_workers)
+
+    async def run_in_thread(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a function on the thread pool.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            Function result
+        """
+        return await self._run(self._thread_pool, self.thread_stats, func, *args, **kwargs)
+
+    async def run_in_process(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a picklable function on the process pool (threads if none is configured).
+
+        Args:
+            func: Module-level function to run
+            *args: Picklable positional arguments
+            **kwargs: Picklable keyword arguments
+
+        Returns:
+            Function result
+        """
+        if self._process_pool is None:
+            return await self.run_in_thread(func, *args, **kwargs)
+        return await self._run(self._process_pool, self.process_stats, func, *args, **kwargs)
+
+    def map_in_process(
+        self, func: Callable[..., T], arg_tuples: Iterable[Tuple[Any, ...]], window: int
+    ) -> Iterator[T]:
+        """
+        Run a picklable function over argument tuples on the process pool, in order.
+
+        At most ``window`` calls are in flight, so results are consumed as they
+        arrive instead of piling up. Runs in the calling thread when no process
+        pool is configured or when already inside a worker process.
+
+        Args:
+            func: Module-level function to run
+            arg_tuples: Picklable positional arguments per call
+            window: Max calls submitted ahead of the consumer
+
+        Yields:
+            Function results, in argument order
+        """
+        if self._process_pool is None or multiprocessing.parent_process() is not None:
+            for args in arg_tuples:
+                yield func(*args)
+            return
+
+        pending: Deque[Tuple[float, Any]] = deque()
+
+        def collect() -> T:
+            submitted_at, future = pending.popleft()
+            try:
+                start, end, result = future.result()
+            except BaseException:
+                self.process_stats.record_done(None, None)
+                raise
+            self.process_stats.record_done(start - submitted_at, end - start)
+            return result
+
+        try:
+            for args in arg_tuples:
+                self.process_stats.record_submit()
+                pending.append((time.time(), self._process_pool.submit(_timed_call, func, *args)))
+                if len(pending) >= max(1, window):
+                    yield collect()
+            while pending:
+                yield collect()
+        finally:
+            for _, future in pending:
+                future.cancel()
+                self.process_stats.record_done(None, None)
+
+    async def _run(
+        self,
+        pool: Executor,
+        stats: PoolStats,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        stats.record_submit()
+        try:
+            start, end, result = await loop.run_in_executor(
+                pool, functools.partial(_timed_call, func, *args, **kwargs)
+            )
+        except BaseException:
+            stats.record_done(None, None)
+            raise
+        stats.record_done(start - submitted_at, end - start)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and wait/run time metrics for both pools.
+
+        Returns:
+            Dictionary with thread and process pool stats (times in seconds)
+        """
+        return {"thread": self.thread_stats.snapshot(), "process": self.process_stats.snapshot()}
+
+    def shutdown(self) -> None:
+        """Shut down both pools."""
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Create executor lazily
+_executor: Optional[TaskExecutor] = None
+
+
+def get_executor() -> TaskExecutor:
+    """Get or create the shared task executor."""
+    global _executor
+    if _executor is None:
+        _executor = TaskExecutor(
+            thread_workers=settings.executor_thread_workers,
+            process_workers=settings.executor_process_workers,
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the shared task executor if it was created."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,264 @@
+"""In-process stand-in for Gemini models, for offline development and load tests.
+
+The fake model answers with simulated latency, requests scripted calls to the
+financial tools when a prompt mentions them, summarizes tool results once they
+are sent back, and can inject the transient errors Vertex AI returns under load.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from google.api_core import exceptions as google_exceptions
+from vertexai.preview import generative_models
+
+# Dataset handle the scripted dataset calls read (the load test uploads it as "estados.csv")
+SCRIPTED_DATASET = "estados"
+
+# Prompt keywords -> (tool name, scripted arguments)
+SCRIPTED_CALLS: List[Tuple[str, str, Dict[str, Any]]] = [
+    (r"datos|dataset|archivo", "list_datasets", {}),
+    (
+        r"liquidez|corriente",
+        "calculate_liquidity_ratios",
+        {"activos_corrientes": 150000, "pasivos_corrientes": 100000, "inventarios": 30000},
+    ),
+    (
+        r"endeudamiento|deuda",
+        "calculate_leverage_ratios",
+        {"pasivos_totales": 400000, "activos_totales": 1000000, "patrimonio": 600000},
+    ),
+    (
+        r"rentabilidad|roe|roa|margen",
+        "calculate_profitability_ratios",
+        {
+            "utilidad_neta": 120000,
+            "ingresos": 1000000,
+            "activos_totales": 1000000,
+            "patrimonio": 600000,
+        },
+    ),
+    (r"tendencia", "analyze_trend", {"dataset_name": SCRIPTED_DATASET, "column": "ingresos"}),
+    (
+        r"dcf|proyecci|flujo",
+        "simple_dcf_projection",
+        {"flujo_caja_actual": 100000, "tasa_crecimiento": 5, "tasa_descuento": 10, "periodos": 5},
+    ),
+    (
+        r"riesgo|alerta",
+        "generate_risk_alerts",
+        {"ratios": {"liquidez_corriente": 0.9, "razon_endeudamiento": 0.75, "margen_neto": 0.03}},
+    ),
+]
+
+SCRIPTED_TOOLS = [name for _, name, _ in SCRIPTED_CALLS]
+
+FILLER = (
+    "Según los datos analizados, la posición financiera es estable y los indicadores "
+    "se mantienen dentro de rangos razonables para el sector"
+).split()
+
+
+def latency_sampler(
+    distribution: str, mean_ms: float, spread_ms: float, rng: random.Random
+) -> Callable[[], float]:
+    """
+    Build a sampler of simulated latencies in seconds.
+
+    Args:
+        distribution: "fixed", "normal", "uniform", "exponential" or "lognormal"
+        mean_ms: Mean latency (median for lognormal) in milliseconds
+        spread_ms: Standard deviation (normal, lognormal) or half-width (uniform) in milliseconds
+        rng: Random source
+
+    Returns:
+        Function returning one latency sample in seconds
+    """
+    if distribution == "fixed":
+        return lambda: mean_ms / 1000
+    if distribution == "normal":
+        return lambda: max(0.0, rng.gauss(mean_ms, spread_ms)) / 1000
+    if distribution == "uniform":
+        return lambda: max(0.0, rng.uniform(mean_ms - spread_ms, mean_ms + spread_ms)) / 1000
+    if distribution == "exponential":
+        return lambda: rng.expovariate(1 / mean_ms) / 1000 if mean_ms > 0 else 0.0
+    if distribution == "lognormal":
+        # Heavy right tail like real model latencies; sigma from the coefficient of variation
+        sigma = math.sqrt(math.log1p((spread_ms / mean_ms) ** 2)) if mean_ms > 0 else 0.0
+        return lambda: mean_ms * rng.lognormvariate(0.0, sigma) / 1000
+    raise ValueError(f"Unknown latency distribution '{distribution}'")
+
+
+def _response(
+    parts: List[Dict[str, Any]], usage: Optional[Dict[str, int]] = None
+) -> generative_models.GenerationResponse:
+    response: Dict[str, Any] = {
+        "candidates": [{"content": {"role": "model", "parts": parts}, "finish_reason": 1}]
+    }
+    if usage is not None:
+        response["usage_metadata"] = usage
+    return generative_models.GenerationResponse.from_dict(response)
+
+
+def _usage(
+    request_parts: List[Dict[str, Any]], response_parts: List[Dict[str, Any]]
+) -> Dict[str, int]:
+    """Token usage estimated at ~4 characters per token."""
+    prompt, candidates = (
+        len(json.dumps(parts, ensure_ascii=False, default=str)) // 4
+        for parts in (request_parts, response_parts)
+    )
+    return {
+        "prompt_token_count": prompt,
+        "candidates_token_count": candidates,
+        "total_token_count": prompt + candidates,
+    }
+
+
+def _part_dict(part: Any) -> Dict[str, Any]:
+    """Plain dict of a request part (text or function response)."""
+    if isinstance(part, str):
+        return {"text": part}
+    raw = getattr(part, "_raw_part", part)
+    return type(raw).to_dict(raw)
+
+
+def _response_parts(response: generative_models.GenerationResponse) -> List[Dict[str, Any]]:
+    """Plain dicts of the parts of a response."""
+    raw = response.candidates[0].content._raw_content
+    return type(raw).to_dict(raw).get("parts", [])
+
+
+class FakeChatSession:
+    """Chat session of the fake model; keeps history like the SDK's ChatSession."""
+
+    def __init__(self, model: "FakeGenerativeModel", history: Optional[List[Any]] = None):
+        self._model = model
+        self.history: List[Any] = list(history or [])
+
+    async def send_message_async(
+        self,
+        content: Union[str, Any, List[Any]],
+        generation_config: Optional[generative_models.GenerationConfig] = None,
+        stream: bool = False,
+    ) -> Any:
+        """Answer a message after simulated latency (streamed in chunks if requested)."""
+        parts = [_part_dict(part) for part in (content if isinstance(content, list) else [content])]
+        if stream:
+            return self._stream(parts)
+        await asyncio.sleep(self._model.sample_latency())
+        self._model.maybe_fail()
+        response = self._model.reply(parts)
+        self.history.extend([parts, response])
+        return response
+
+    async def _stream(self, parts: List[Dict[str, Any]]) -> AsyncIterator[Any]:
+        latency = self._model.sample_latency()
+        self._model.maybe_fail()
+        response = self._model.reply(parts)
+        text = "".join(p.get("text", "") for p in _response_parts(response))
+        if not text:
+            await asyncio.sleep(latency)
+            yield response
+        else:
+            words = text.split(" ")
+            chunks = [" ".join(words[i : i + 8]) for i in range(0, len(words), 8)]
+            usage = _usage(parts, _response_parts(response))
+            for index, chunk in enumerate(chunks):
+                await asyncio.sleep(latency / len(chunks))
+                # Like Gemini, the final chunk carries the usage metadata
+                yield _response(
+                    [{"text": chunk if index == 0 else " " + chunk}],
+                    usage if index == len(chunks) - 1 else None,
+                )
+        self.history.extend([parts, response])
+
+
+class FakeGenerativeModel:
+    """Offline model with configurable latency, scripted tool calls and error injection."""
+
+    def __init__(
+        self,
+        model_name: str,
+        latency_distribution: str = "lognormal",
+        latency_ms: float = 400.0,
+        latency_spread_ms: float = 200.0,
+        error_rate: float = 0.0,
+        tool_call_rate: float = 0.0,
+        response_words: int = 60,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize fake model.
+
+        Args:
+            model_name: Model name reported in responses
+            latency_distribution: Latency distribution (see ``latency_sampler``)
+            latency_ms: Mean (median for lognormal) latency per call in milliseconds
+            latency_spread_ms: Latency spread in milliseconds
+            error_rate: Probability that a call fails with a transient Vertex AI error
+            tool_call_rate: Probability of a scripted tool call when no keyword matches
+            response_words: Length of plain text answers
+            seed: Random seed for reproducible runs
+        """
+        self.model_name = model_name
+        self.error_rate = error_rate
+        self.tool_call_rate = tool_call_rate
+        self.response_words = response_words
+        self._rng = random.Random(seed)
+        self.sample_latency = latency_sampler(
+            latency_distribution, latency_ms, latency_spread_ms, self._rng
+        )
+        self.calls = 0
+        self.errors = 0
+
+    def start_chat(self, history: Optional[List[Any]] = None) -> FakeChatSession:
+        """Start a chat session on the given history."""
+        return FakeChatSession(self, history)
+
+    def maybe_fail(self) -> None:
+        """Raise an injected transient error with the configured probability."""
+        self.calls += 1
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            self.errors += 1
+            error = self._rng.choice(
+                [google_exceptions.TooManyRequests, google_exceptions.ServiceUnavailable]
+            )
+            raise error(f"Injected error from fake model {self.model_name}")
+
+    def reply(self, parts: List[Dict[str, Any]]) -> generative_models.GenerationResponse:
+        """Scripted answer to the request parts."""
+        reply_parts = self._reply_parts(parts)
+        return _response(reply_parts, _usage(parts, reply_parts))
+
+    def _reply_parts(self, parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = [p["function_response"] for p in parts if "function_response" in p]
+        if results:
+            return [{"text": self._summarize(results)}]
+
+        # Only the user's own text, not context parts sent ahead of it
+        texts = [p["text"] for p in parts if "text" in p]
+        prompt = texts[-1].lower() if texts else ""
+        calls = [
+            {"function_call": {"name": name, "args": args}}
+            for pattern, name, args in SCRIPTED_CALLS
+            if re.search(pattern, prompt)
+        ]
+        if not calls and self.tool_call_rate > 0 and self._rng.random() < self.tool_call_rate:
+            _, name, args = self._rng.choice(SCRIPTED_CALLS)
+            calls = [{"function_call": {"name": name, "args": args}}]
+        if calls:
+            return calls
+
+        words = [FILLER[i % len(FILLER)] for i in range(self.response_words)]
+        return [{"text": f"[{self.model_name}] " + " ".join(words) + "."}]
+
+    def _summarize(self, results: List[Dict[str, Any]]) -> str:
+        lines = [f"[{self.model_name}] Resultados del análisis:"]
+        for result in results:
+            payload = json.dumps(result.get("response", {}), ensure_ascii=False, default=str)
+            lines.append(f"- {result.get('name')}: {payload[:200]}")
+        return "\n".join(lines)
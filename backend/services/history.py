@@ -0,0 +1,223 @@
+"""Token-budgeted compaction of client-supplied conversation history.
+
+Long conversations are trimmed to the most recent turns that fit the budget;
+older turns are folded into a short extractive summary that is cached per
+conversation and extended incrementally as more turns get folded.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.models.schemas import Message
+
+ROLE_LABELS = {"user": "Usuario", "assistant": "Asistente"}
+SUMMARY_HEADER = "Resumen de la conversación anterior:"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _message_hash(message: Message) -> str:
+    return hashlib.sha1(f"{message.role}\0{message.content}".encode("utf-8")).hexdigest()
+
+
+class HistoryManager:
+    """Fits conversation history into a token budget."""
+
+    def __init__(
+        self,
+        token_budget: int = 6000,
+        min_recent_messages: int = 4,
+        summary_chars_per_message: int = 160,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        max_cached_counts: int = 10_000,
+        max_cached_summaries: int = 1_000,
+    ):
+        """
+        Initialize history manager.
+
+        Args:
+            token_budget: Max tokens of history sent to the model (0 disables compaction)
+            min_recent_messages: Most recent messages always kept verbatim
+            summary_chars_per_message: Max characters each folded message adds to the summary
+            token_counter: Function returning the token count of a text
+            max_cached_counts: Max per-message token counts kept in cache
+            max_cached_summaries: Max conversation summaries kept in cache
+        """
+        self.token_budget = token_budget
+        self.min_recent_messages = min_recent_messages
+        self.summary_chars_per_message = summary_chars_per_message
+        self._token_counter = token_counter
+        self._max_cached_counts = max_cached_counts
+        self._max_cached_summaries = max_cached_summaries
+
+        self._token_counts: "OrderedDict[str, int]" = OrderedDict()
+        # Conversation id -> (folded message count, digest of folded prefix, summary lines)
+        self._summaries: "OrderedDict[str, Tuple[int, str, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.compactions = 0
+        self.summary_hits = 0
+        self.tokens_saved = 0
+
+    def count_tokens(self, message: Message) -> int:
+        """
+        Count the tokens of a message, reusing counts of messages seen before.
+
+        Args:
+            message: Chat message
+
+        Returns:
+            Token count
+        """
+        key = _message_hash(message)
+        with self._lock:
+            count = self._token_counts.get(key)
+            if count is not None:
+                self._token_counts.move_to_end(key)
+                return count
+        count = self._token_counter(message.content)
+        with self._lock:
+            self._token_counts[key] = count
+            while len(self._token_counts) > self._max_cached_counts:
+                self._token_counts.popitem(last=False)
+        return count
+
+    def compact(self, messages: List[Message]) -> List[Message]:
+        """
+        Fit a conversation into the token budget.
+
+        System messages and the most recent turns are kept verbatim. Older turns
+        are replaced by a summary prepended to the first kept user message, so
+        user and assistant turns still alternate.
+
+        Args:
+            messages: Full conversation history
+
+        Returns:
+            The same list if it fits, otherwise the compacted history
+        """
+        if self.token_budget <= 0:
+            return messages
+        counts = [self.count_tokens(message) for message in messages]
+        total = sum(counts)
+        if total <= self.token_budget:
+            return messages
+
+        system = [m for m in messages if m.role == "system"]
+        turns = [(m, c) for m, c in zip(messages, counts, strict=True) if m.role != "system"]
+        system_tokens = total - sum(c for _, c in turns)
+        split = self._split_index(turns, self.token_budget - system_tokens)
+        if split == 0:
+            return messages
+
+        summary = self._summary([m for m, _ in turns[:split]])
+        first, *rest = [m for m, _ in turns[split:]]
+        compacted = [
+            *system,
+            Message(role=first.role, content=f"{summary}\n\n{first.content}"),
+            *rest,
+        ]
+
+        saved = total - sum(self.count_tokens(m) for m in compacted)
+        with self._lock:
+            self.compactions += 1
+            self.tokens_saved += saved
+        return compacted
+
+    def _split_index(self, turns: List[Tuple[Message, int]], budget: int) -> int:
+        """Index of the first kept turn: recent turns that fit, starting on a user turn."""
+        # Reserve room for the summary itself
+        budget -= budget // 4
+        split = len(turns)
+        used = 0
+        while split > 0 and used + turns[split - 1][1] <= budget:
+            split -= 1
+            used += turns[split][1]
+        split = min(split, max(0, len(turns) - self.min_recent_messages))
+
+        # Start the kept window on a user turn so roles keep alternating
+        for index in range(split, len(turns)):
+            if turns[index][0].role == "user":
+                return index
+        for index in range(split - 1, -1, -1):
+            if turns[index][0].role == "user":
+                return index
+        return 0
+
+    def _summary(self, folded: List[Message]) -> str:
+        """Summary of folded turns, extending the cached one for this conversation."""
+        conversation_id = _message_hash(folded[0])
+        hashes = [_message_hash(m) for m in folded]
+
+        with self._lock:
+            cached = self._summaries.get(conversation_id)
+        lines: List[str] = []
+        start = 0
+        if cached is not None:
+            count, digest, cached_lines = cached
+            if count <= len(folded) and digest == self._digest(hashes[:count]):
+                lines = list(cached_lines)
+                start = count
+                with self._lock:
+                    self.summary_hits += 1
+
+        lines.extend(self._summarize(m) for m in folded[start:])
+        with self._lock:
+            self._summaries[conversation_id] = (len(folded), self._digest(hashes), lines)
+            self._summaries.move_to_end(conversation_id)
+            while len(self._summaries) > self._max_cached_summaries:
+                self._summaries.popitem(last=False)
+        return "\n".join([SUMMARY_HEADER, *lines])
+
+    def _summarize(self, message: Message) -> str:
+        """One summary line: the first sentence of a message, truncated."""
+        text = " ".join(message.content.split())
+        text = _SENTENCE_END.split(text, maxsplit=1)[0]
+        if len(text) > self.summary_chars_per_message:
+            text = text[: self.summary_chars_per_message - 1].rstrip() + "…"
+        return f"- {ROLE_LABELS.get(message.role, message.role)}: {text}"
+
+    @staticmethod
+    def _digest(hashes: List[str]) -> str:
+        return hashlib.sha1("".join(hashes).encode("ascii")).hexdigest()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get compaction counters.
+
+        Returns:
+            Dictionary with budget, compactions, summary cache hits and tokens saved
+        """
+        with self._lock:
+            return {
+                "token_budget": self.token_budget,
+                "compactions": self.compactions,
+                "summary_cache_hits": self.summary_hits,
+                "cached_summaries": len(self._summaries),
+                "cached_token_counts": len(self._token_counts),
+                "tokens_saved": self.tokens_saved,
+            }
+
+
+# Create history manager lazily
+_history_manager: Optional[HistoryManager] = None
+
+
+def get_history_manager() -> HistoryManager:
+    """Get or create the shared history manager."""
+    global _history_manager
+    if _history_manager is None:
+        _history_manager = HistoryManager(
+            token_budget=settings.history_token_budget,
+            min_recent_messages=settings.history_min_recent_messages,
+        )
+    return _history_manager
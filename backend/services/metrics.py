@@ -0,0 +1,288 @@
+"""Application metrics in the Prometheus text exposition format.
+
+Hot paths only bump counters and histogram buckets under a per-metric lock.
+Values that other components already track (model latency in the resilience
+policy, cache counters, dataset store size) are read when ``/api/metrics`` is
+scraped instead of being recorded twice.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Protocol, Sequence, Tuple, TypeVar
+
+from backend.services.resilience import LatencyHistogram
+
+PREFIX = "financial_assistant_"
+
+# Upper bounds of the tool execution time buckets (seconds)
+TOOL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, float("inf"))
+
+# Upper bounds of the upload parse time buckets (seconds)
+PARSE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+# Upper bounds of the upload size buckets (bytes)
+SIZE_BUCKETS = tuple(1024.0 * 4**i for i in range(10)) + (float("inf"),)
+
+LabelValues = Tuple[str, ...]
+
+# Label values of rendered samples; callers may key them with any tuple of values
+SampleKey = TypeVar("SampleKey", bound=Tuple[Any, ...])
+
+
+class Metric(Protocol):
+    """A metric that can be rendered in the Prometheus text format."""
+
+    def render(self) -> List[str]:
+        """Exposition lines."""
+        ...
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _header(name: str, kind: str, documentation: str) -> List[str]:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+
+
+def render_histograms(
+    name: str,
+    documentation: str,
+    label_names: Sequence[str],
+    histograms: Dict[LabelValues, LatencyHistogram],
+) -> List[str]:
+    """
+    Render labelled histograms in the Prometheus text format.
+
+    Args:
+        name: Full metric name
+        documentation: Help text
+        label_names: Label names, in the order of the keys of ``histograms``
+        histograms: Histogram per tuple of label values
+
+    Returns:
+        Exposition lines
+    """
+    lines = _header(name, "histogram", documentation)
+    for values, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.bucket_counts, strict=True):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{name}_bucket{_labels(label_names, values, le)} {cumulative}")
+        labels = _labels(label_names, values)
+        lines.append(f"{name}_sum{labels} {_number(histogram.total)}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+    return lines
+
+
+def render_samples(
+    name: str,
+    kind: str,
+    documentation: str,
+    label_names: Sequence[str],
+    samples: Mapping[SampleKey, float],
+) -> List[str]:
+    """
+    Render labelled counter or gauge samples in the Prometheus text format.
+
+    Args:
+        name: Full metric name (counters end in ``_total``)
+        kind: "counter" or "gauge"
+        documentation: Help text
+        label_names: Label names, in the order of the keys of ``samples``
+        samples: Value per tuple of label values
+
+    Returns:
+        Exposition lines
+    """
+    lines = _header(name, kind, documentation)
+    for values, value in sorted(samples.items()):
+        lines.append(f"{name}{_labels(label_names, values)} {_number(value)}")
+    return lines
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        """
+        Initialize counter.
+
+        Args:
+            name: Metric name without prefix (should end in ``_total``)
+            documentation: Help text
+            label_names: Label names
+        """
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        """Add ``amount`` to the counter for the given label values."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """Current value for the given label values."""
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        """Exposition lines."""
+        with self._lock:
+            samples = dict(self._values)
+        return render_samples(self.name, "counter", self.documentation, self.label_names, samples)
+
+
+class Histogram:
+    """Bucketed histogram with labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = TOOL_BUCKETS,
+    ):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name without prefix
+            documentation: Help text
+            label_names: Label names
+            buckets: Ascending bucket upper bounds, ending with infinity
+        """
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[LabelValues, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for the given label values."""
+        with self._lock:
+            histogram = self._histograms.get(label_values)
+            if histogram is None:
+                # No percentile window: only the buckets, sum and count are exported
+                histogram = LatencyHistogram(window=0, buckets=self.buckets)
+                self._histograms[label_values] = histogram
+            histogram.record(value)
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        """Number of observations for the given label values."""
+        histogram = self._histograms.get(label_values)
+        return histogram.count if histogram is not None else 0
+
+    def render(self) -> List[str]:
+        """Exposition lines."""
+        with self._lock:
+            return render_histograms(
+                self.name, self.documentation, self.label_names, self._histograms
+            )
+
+
+class Metrics:
+    """Metrics recorded on the API's hot paths."""
+
+    def __init__(self) -> None:
+        """Initialize metrics."""
+        self.tool_duration = Histogram(
+            "tool_duration_seconds", "Financial tool execution time.", ["tool"], TOOL_BUCKETS
+        )
+        self.tool_errors = Counter(
+            "tool_errors_total", "Financial tool calls that raised.", ["tool"]
+        )
+        self.upload_parse_duration = Histogram(
+            "upload_parse_duration_seconds",
+            "Time to parse and store an uploaded file.",
+            ["format"],
+            PARSE_BUCKETS,
+        )
+        self.upload_size = Histogram(
+            "upload_size_bytes", "Size of uploaded files.", ["format"], SIZE_BUCKETS
+        )
+        self.tokens = Counter(
+            "model_tokens_total", "Tokens used by model calls.", ["model", "kind"]
+        )
+        self.techaura_records = Counter(
+            "techaura_sync_records_total", "Sales records synced from Techaura.", ["company"]
+        )
+
+    def record_usage(self, model_name: str, response: Any) -> None:
+        """Count the tokens reported in a model response's usage metadata."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            # Older SDKs only expose it on the raw response
+            usage = getattr(getattr(response, "_raw_response", None), "usage_metadata", None)
+        if usage is None:
+            return
+        prompt = getattr(usage, "prompt_token_count", 0) or 0
+        completion = getattr(usage, "candidates_token_count", 0) or 0
+        if prompt:
+            self.tokens.inc(prompt, model_name, "prompt")
+        if completion:
+            self.tokens.inc(completion, model_name, "completion")
+
+    def render(self, extra: Sequence[str] = ()) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Args:
+            extra: Exposition lines of metrics collected elsewhere at scrape time
+
+        Returns:
+            Exposition text
+        """
+        lines: List[str] = []
+        metrics: Tuple[Metric, ...] = (
+            self.tool_duration,
+            self.tool_errors,
+            self.upload_parse_duration,
+            self.upload_size,
+            self.tokens,
+            self.techaura_records,
+        )
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+# Create metrics lazily
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Get or create the shared metrics."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,92 @@
+"""Registry that builds one model client per model name and reuses it."""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+M = TypeVar("M")
+
+
+class ModelRegistry(Generic[M]):
+    """Lazily built, cached model clients keyed by model name."""
+
+    def __init__(self, factory: Callable[[str], M], allowed: Optional[Iterable[str]] = None):
+        """
+        Initialize model registry.
+
+        Args:
+            factory: Builds the client for a model name
+            allowed: Model names callers may request (None allows any)
+        """
+        self._factory = factory
+        self.allowed = list(allowed) if allowed is not None else None
+        self._models: Dict[str, M] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._uses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def validate(self, name: str) -> None:
+        """
+        Check that a model name may be requested.
+
+        Args:
+            name: Model name
+
+        Raises:
+            ValueError: If the model is not in the allowed list
+        """
+        if self.allowed is not None and name not in self.allowed:
+            raise ValueError(
+                f"Model '{name}' is not available. Choose one of: {', '.join(self.allowed)}"
+            )
+
+    def get(self, name: str) -> M:
+        """
+        Get the client for a model, building it on first use.
+
+        Args:
+            name: Model name
+
+        Returns:
+            Cached model client
+        """
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                self.validate(name)
+                start = time.perf_counter()
+                model = self._factory(name)
+                self._build_seconds[name] = time.perf_counter() - start
+                self._models[name] = model
+            self._uses[name] = self._uses.get(name, 0) + 1
+            return model
+
+    def warm_models(self) -> List[str]:
+        """
+        Get the names of models already built.
+
+        Returns:
+            Model names in build order
+        """
+        with self._lock:
+            return list(self._models)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get warm models with their construction time and use count.
+
+        Returns:
+            Dictionary with allowed and warm models
+        """
+        with self._lock:
+            return {
+                "available": self.allowed,
+                "warm": [
+                    {
+                        "model": name,
+                        "build_seconds": self._build_seconds[name],
+                        "uses": self._uses.get(name, 0),
+                    }
+                    for name in self._models
+                ],
+            }
@@ -0,0 +1,308 @@
+"""Timeouts, retries and hedged requests for model calls.
+
+Each attempt gets a deadline. Retryable failures (rate limits, unavailable
+backends, timeouts) are retried with jittered exponential backoff. Optionally,
+when the primary model has not answered after its observed p95 latency, a
+hedged request is sent to a faster model and whichever answers first wins.
+"""
+
+import asyncio
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from google.api_core import exceptions as google_exceptions
+
+from backend.config import settings
+
+T = TypeVar("T")
+
+# Failures worth another attempt: throttling, transient server errors and deadlines
+RETRYABLE_ERRORS: Tuple[type, ...] = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.Aborted,
+    TimeoutError,
+    ConnectionError,
+)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, float("inf"))
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram with a recent window for percentile estimates."""
+
+    def __init__(self, window: int = 1000, buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        Initialize histogram.
+
+        Args:
+            window: Number of recent samples kept for percentiles (0 for none)
+            buckets: Ascending bucket upper bounds, ending with infinity
+        """
+        self.buckets = tuple(buckets)
+        self.bucket_counts: List[int] = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Record one latency sample."""
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self._recent.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at percentile ``q`` (0-100) over the recent window."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+    def copy(self) -> "LatencyHistogram":
+        """Copy of the buckets, count and sum (without the percentile window)."""
+        histogram = LatencyHistogram(window=0, buckets=self.buckets)
+        histogram.bucket_counts = list(self.bucket_counts)
+        histogram.count = self.count
+        histogram.total = self.total
+        return histogram
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get counts, cumulative buckets and percentiles."""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.bucket_counts, strict=True):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": buckets,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class ResiliencePolicy:
+    """Deadline, retry and hedging policy for model calls."""
+
+    def __init__(
+        self,
+        attempt_timeout: Optional[float] = 60.0,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_model: Optional[str] = None,
+        hedge_quantile: float = 95.0,
+        hedge_min_samples: int = 20,
+        hedge_delay: float = 10.0,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """
+        Initialize resilience policy.
+
+        Args:
+            attempt_timeout: Seconds before an attempt is abandoned (None for no deadline)
+            max_attempts: Attempts per call, including the first one
+            backoff_base: Backoff cap in seconds after the first failure (doubles per attempt)
+            backoff_max: Max backoff cap in seconds
+            hedge_model: Faster model for hedged requests (None disables hedging)
+            hedge_quantile: Percentile of the primary's latency after which to hedge
+            hedge_min_samples: Samples needed before the percentile replaces ``hedge_delay``
+            hedge_delay: Seconds to wait before hedging until enough samples exist
+            rng: Random source for backoff jitter
+            sleep: Async sleep function (injectable for tests)
+        """
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_model = hedge_model
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.default_hedge_delay = hedge_delay
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """Whether a failed attempt may be retried."""
+        return isinstance(error, RETRYABLE_ERRORS)
+
+    def backoff(self, attempt: int) -> float:
+        """Jittered delay before retrying after failed attempt number ``attempt``."""
+        cap = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return self._rng.uniform(cap / 2, cap)
+
+    def hedge_delay(self, model_name: str) -> float:
+        """Seconds to wait on ``model_name`` before sending a hedged request."""
+        with self._lock:
+            histogram = self.latency.get(model_name)
+            if histogram is None or histogram.count < self.hedge_min_samples:
+                return self.default_hedge_delay
+            return histogram.percentile(self.hedge_quantile) or self.default_hedge_delay
+
+    def record_latency(self, model_name: str, seconds: float) -> None:
+        """Record the latency of a successful model call."""
+        with self._lock:
+            self.latency.setdefault(model_name, LatencyHistogram()).record(seconds)
+
+    def latency_histograms(self) -> Dict[str, LatencyHistogram]:
+        """Consistent copies of the per-model latency histograms."""
+        with self._lock:
+            return {name: histogram.copy() for name, histogram in self.latency.items()}
+
+    async def call(
+        self,
+        model_name: str,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Optional[Callable[[str], Awaitable[T]]] = None,
+    ) -> Tuple[T, str]:
+        """
+        Run a model call under the policy.
+
+        Args:
+            model_name: Model the primary call goes to
+            primary: Starts one attempt on the primary model
+            hedge: Starts one attempt on the given hedge model (None disables hedging)
+
+        Returns:
+            Tuple of (result, model that produced it)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            with self._lock:
+                self.attempts += 1
+            try:
+                return await asyncio.wait_for(
+                    self._race(model_name, primary, hedge), self.attempt_timeout
+                )
+            except Exception as e:
+                if isinstance(e, TimeoutError):
+                    with self._lock:
+                        self.timeouts += 1
+                if not self.is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                await self._sleep(self.backoff(attempt))
+
+    async def _timed(self, model_name: str, call: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        result = await call()
+        self.record_latency(model_name, time.perf_counter() - start)
+        return result
+
+    async def _race(
+        self,
+        model_name: str,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Optional[Callable[[str], Awaitable[T]]],
+    ) -> Tuple[T, str]:
+        """One attempt: the primary call, plus a hedged call if it is slow."""
+        hedge_model = self.hedge_model
+        tasks: Dict["asyncio.Future[T]", str] = {
+            asyncio.ensure_future(self._timed(model_name, primary)): model_name
+        }
+        try:
+            if hedge is not None and hedge_model and hedge_model != model_name:
+                done, _ = await asyncio.wait(set(tasks), timeout=self.hedge_delay(model_name))
+                if not done:
+                    hedge_task = asyncio.ensure_future(
+                        self._timed(hedge_model, lambda: hedge(hedge_model))
+                    )
+                    tasks[hedge_task] = hedge_model
+                    with self._lock:
+                        self.hedges += 1
+
+            # First successful answer wins; fail only when every call failed
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1 and tasks[task] == hedge_model:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return task.result(), tasks[task]
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get attempt/retry/hedge counters and per-model latency histograms.
+
+        Returns:
+            Dictionary with policy settings, counters and latency per model
+        """
+        with self._lock:
+            return {
+                "attempt_timeout": self.attempt_timeout,
+                "max_attempts": self.max_attempts,
+                "hedge_model": self.hedge_model,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "latency": {name: hist.snapshot() for name, hist in self.latency.items()},
+            }
+
+
+# Create policy lazily
+_resilience_policy: Optional[ResiliencePolicy] = None
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    """Get or create the shared resilience policy."""
+    global _resilience_policy
+    if _resilience_policy is None:
+        _resilience_policy = ResiliencePolicy(
+            attempt_timeout=settings.model_attempt_timeout_seconds or None,
+            max_attempts=settings.model_max_attempts,
+            backoff_base=settings.model_backoff_base_seconds,
+            backoff_max=settings.model_backoff_max_seconds,
+            hedge_model=settings.hedge_model,
+            hedge_quantile=settings.hedge_quantile,
+            hedge_min_samples=settings.hedge_min_samples,
+            hedge_delay=settings.hedge_delay_seconds,
+        )
+    return _resilience_policy
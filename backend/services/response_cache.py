@@ -0,0 +1,168 @@
+"""Exact-match cache for chat completions with TTL and LRU eviction.
+
+Identical requests (same normalized history, model, generation parameters and
+dataset content) get the stored completion instead of a new model call.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.models.schemas import Message
+
+
+def _normalize_content(content: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return " ".join(content.split())
+
+
+def make_cache_key(
+    messages: List[Message],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    dataset_versions: Optional[Dict[str, int]] = None,
+) -> str:
+    """
+    Build the cache key for a chat completion.
+
+    Args:
+        messages: Conversation history
+        model: Model name used for generation
+        temperature: Effective temperature
+        max_tokens: Effective max output tokens
+        dataset_versions: Content version of each dataset the tools can read
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    payload = {
+        "messages": [
+            [message.role.strip().lower(), _normalize_content(message.content)]
+            for message in messages
+        ],
+        "model": model,
+        "temperature": float(temperature),
+        "max_tokens": int(max_tokens),
+        "datasets": sorted((dataset_versions or {}).items()),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache whose entries expire after a TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            max_entries: Max cached completions before the least recently used is evicted
+            ttl_seconds: Seconds an entry stays valid
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached completion.
+
+        Args:
+            key: Key from ``make_cache_key``
+
+        Returns:
+            Cached result, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a completion, evicting the least recently used entries if full.
+
+        Args:
+            key: Key from ``make_cache_key``
+            result: Completion to cache
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached completion (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache size and hit/miss counters.
+
+        Returns:
+            Dictionary with entry count, limits, counters and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+# Create cache lazily
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the shared response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+        )
+    return _response_cache
@@ -0,0 +1,220 @@
+"""Server-side conversation sessions.
+
+A session keeps the live chat session (and with it the converted history) so
+each request only carries the new user turn. Idle sessions expire and the
+least recently used ones are evicted when the count or memory cap is reached.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from backend.config import settings
+
+
+class Session:
+    """One server-side conversation."""
+
+    def __init__(self, session_id: str, model_name: str, chat: Any, now: float):
+        """
+        Initialize session.
+
+        Args:
+            session_id: Session identifier
+            model_name: Model the session was started with
+            chat: Live chat session holding the conversation history
+            now: Creation time
+        """
+        self.session_id = session_id
+        self.model_name = model_name
+        self.chat = chat
+        self.created_at = now
+        self.last_used = now
+        self.turns = 0
+        self.size_bytes = 0
+        # Dataset versions the model was last told about (see the dataset digest)
+        self.dataset_versions: Optional[Dict[str, int]] = None
+        # Turns on one session are sent one at a time so history stays ordered
+        self.lock = asyncio.Lock()
+
+
+class SessionStore:
+    """Sessions with idle-timeout expiry and LRU eviction under a memory cap."""
+
+    def __init__(
+        self,
+        idle_timeout_seconds: float = 1800.0,
+        max_sessions: int = 1000,
+        memory_budget_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize session store.
+
+        Args:
+            idle_timeout_seconds: Seconds without a turn before a session expires
+            max_sessions: Max live sessions
+            memory_budget_bytes: Max approximate bytes of history (None for unbounded)
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_sessions = max_sessions
+        self.memory_budget_bytes = memory_budget_bytes
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def create(self, model_name: str, chat: Any) -> Session:
+        """
+        Register a new session.
+
+        Args:
+            model_name: Model the session uses
+            chat: Live chat session
+
+        Returns:
+            The new session
+        """
+        with self._lock:
+            self._expire_idle()
+            session = Session(uuid.uuid4().hex, model_name, chat, self._clock())
+            self._sessions[session.session_id] = session
+            self.created += 1
+            self._enforce_limits(keep=session.session_id)
+            return session
+
+    def get(self, session_id: str) -> Session:
+        """
+        Get a live session and mark it as used.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            The session
+
+        Raises:
+            KeyError: If the session does not exist or has expired
+        """
+        with self._lock:
+            self._expire_idle()
+            session = self._sessions[session_id]
+            session.last_used = self._clock()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def record_turn(self, session: Session, added_bytes: int) -> bool:
+        """
+        Account for a completed turn and enforce the memory cap.
+
+        The session may have been evicted or deleted while the turn was in
+        flight; the turn is then not recorded.
+
+        Args:
+            session: Session the turn was sent on
+            added_bytes: Approximate size of the new user and model content
+
+        Returns:
+            Whether the session was still live and the turn was recorded
+        """
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                return False
+            session.turns += 1
+            session.size_bytes += added_bytes
+            session.last_used = self._clock()
+            self._sessions.move_to_end(session.session_id)
+            self._enforce_limits(keep=session.session_id)
+            return True
+
+    def delete(self, session_id: str) -> None:
+        """
+        End a session.
+
+        Args:
+            session_id: Session identifier
+
+        Raises:
+            KeyError: If the session does not exist
+        """
+        with self._lock:
+            del self._sessions[session_id]
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate bytes of history held by live sessions."""
+        return sum(session.size_bytes for session in self._sessions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get live session count, memory use and eviction counters.
+
+        Returns:
+            Dictionary with session statistics
+        """
+        with self._lock:
+            self._expire_idle()
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "memory_bytes": self.memory_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+    def _expire_idle(self) -> None:
+        """Drop sessions idle for longer than the timeout (oldest first)."""
+        deadline = self._clock() - self.idle_timeout_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used > deadline:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def _enforce_limits(self, keep: str) -> None:
+        """Evict least recently used sessions over the count or memory cap (never ``keep``)."""
+        for session_id in list(self._sessions):
+            over_count = len(self._sessions) > self.max_sessions
+            over_memory = (
+                self.memory_budget_bytes is not None
+                and self.memory_bytes > self.memory_budget_bytes
+            )
+            if not (over_count or over_memory):
+                break
+            if session_id == keep:
+                continue
+            del self._sessions[session_id]
+            self.evicted += 1
+
+
+# Create session store lazily
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Get or create the shared session store."""
+    global _session_store
+    if _session_store is None:
+        budget_mb = settings.session_memory_budget_mb
+        _session_store = SessionStore(
+            idle_timeout_seconds=settings.session_idle_timeout_seconds,
+            max_sessions=settings.session_max_count,
+            memory_budget_bytes=budget_mb * 1024 * 1024 if budget_mb > 0 else None,
+        )
+    return _session_store
@@ -0,0 +1,85 @@
+"""Single-flight coalescing of identical concurrent requests.
+
+While a call for a key is in flight, further calls with the same key await the
+same task instead of starting their own, so a burst of identical requests costs
+one upstream call.
+"""
+
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Shares one in-flight task among concurrent callers with the same key."""
+
+    def __init__(self) -> None:
+        """Initialize single-flight group."""
+        self._in_flight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run ``func`` once for all concurrent callers with the same key.
+
+        The shared work runs in its own task, so a caller that is cancelled
+        (e.g. a client disconnect) does not cancel it for the others.
+
+        Args:
+            key: Request key (e.g. the response cache key)
+            func: Coroutine function producing the result
+
+        Returns:
+            Tuple of (result, whether it was shared from another caller's call)
+        """
+        with self._lock:
+            self.calls += 1
+            task = self._in_flight.get(key)
+            shared = task is not None
+            if task is None:
+                task = asyncio.ensure_future(func())
+                self._in_flight[key] = task
+                task.add_done_callback(functools.partial(self._forget, key))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with calls, upstream executions, coalesced calls and in-flight keys
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+
+# Create single-flight group lazily
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the shared single-flight group for chat requests."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,284 @@
+"""Parallel backfill of Techaura sales history.
+
+The period is split into date-range shards (one week by default) that are
+fetched concurrently over the client's async connection pool. Shards are
+retried independently with jittered backoff. Their records are handed on in
+date order, so a sink or the sync state store sees the same sequence as a
+sequential fetch would produce.
+
+Usage (onboarding a company into the sync state store)::
+
+    python -m backend.services.techaura_backfill 2021-01-01 2024-01-01
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from backend.config import settings
+from backend.services.techaura_state import (
+    SyncStateStore,
+    get_sync_state_store,
+    watermark_key,
+)
+from backend.services.techaura_sync import TechauraClient, get_techaura_client
+
+logger = logging.getLogger(__name__)
+
+Shard = Tuple[datetime, datetime]
+
+
+def date_shards(fecha_inicio: datetime, fecha_fin: datetime, shard_days: float) -> List[Shard]:
+    """
+    Split a period into consecutive date ranges.
+
+    Args:
+        fecha_inicio: Start of the period
+        fecha_fin: End of the period
+        shard_days: Length of each shard in days (the last one may be shorter)
+
+    Returns:
+        List of (start, end) tuples; each end is the next shard's start
+    """
+    if shard_days <= 0:
+        raise ValueError("shard_days must be positive")
+    step = timedelta(days=shard_days)
+    shards = []
+    start = fecha_inicio
+    while start < fecha_fin:
+        end = min(start + step, fecha_fin)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed shard may be retried (transport errors, 429 and 5xx)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _sale_key(sale: Dict[str, Any]) -> Tuple[str, str]:
+    return (str(sale.get("fecha") or ""), str(sale.get("id") or ""))
+
+
+async def backfill_sales(
+    client: TechauraClient,
+    fecha_inicio: datetime,
+    fecha_fin: datetime,
+    sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    store: Optional[SyncStateStore] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    shard_days: Optional[float] = None,
+    concurrency: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    backoff_base: float = 1.0,
+    backoff_max: float = 30.0,
+    rng: Optional[random.Random] = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> Dict[str, Any]:
+    """
+    Fetch every sale of a long period in concurrent date-range shards.
+
+    At most ``concurrency`` shards are fetched at a time. Finished shards wait
+    until every earlier shard is done. Each shard is then sorted by date and
+    handed on, so records arrive in date order. Sales returned by two
+    neighbouring shards (on their shared boundary) are only handed on once.
+    At most ``2 * concurrency`` shards are held in memory.
+
+    A shard that keeps failing after ``max_attempts``, or fails with an error
+    that is not retryable (e.g. a malformed page), is reported in
+    ``shards_fallidos`` and skipped, and the backfill carries on. The store's
+    watermark only advances when no shard failed.
+
+    Args:
+        client: Techaura client (its async pool is used)
+        fecha_inicio: Start of the period
+        fecha_fin: End of the period
+        sink: Receives each shard's financial records, in date order
+        store: Sync state store to upsert records into (and advance the watermark)
+        progress: Called after each shard with completed/total shards and counts
+        shard_days: Days per shard (default from settings)
+        concurrency: Shards fetched concurrently (default from settings)
+        max_attempts: Attempts per shard, including the first (default from settings)
+        backoff_base: Backoff cap in seconds after a shard's first failure (doubles per attempt)
+        backoff_max: Max backoff cap in seconds
+        rng: Random source for backoff jitter
+        sleep: Async sleep function (injectable for tests)
+
+    Returns:
+        Dictionary with the backfill summary
+    """
+    shard_days = shard_days or settings.techaura_backfill_shard_days
+    concurrency = max(1, concurrency or settings.techaura_backfill_concurrency)
+    max_attempts = max(1, max_attempts or settings.techaura_backfill_max_attempts)
+    rng = rng or random.Random()
+    shards = date_shards(fecha_inicio, fecha_fin, shard_days)
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    state: Dict[str, Any] = {"completados": 0, "registros": 0, "reintentos": 0}
+    failed: List[Dict[str, Any]] = []
+
+    async def fetch_shard(shard: Shard) -> Optional[List[Dict[str, Any]]]:
+        async with semaphore:
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    sales: List[Dict[str, Any]] = []
+                    async for page in client.aiter_sales_pages(*shard):
+                        sales.extend(page)
+                    return sorted(sales, key=lambda sale: watermark_key(*_sale_key(sale)))
+                except Exception as e:
+                    # Malformed pages fail only their shard, like HTTP errors do
+                    if attempt == max_attempts or not is_retryable(e):
+                        logger.warning(
+                            f"Backfill shard {shard[0].date()}..{shard[1].date()} failed "
+                            f"after {attempt} attempt(s): {e}"
+                        )
+                        failed.append(
+                            {
+                                "desde": shard[0].isoformat(),
+                                "hasta": shard[1].isoformat(),
+                                "intentos": attempt,
+                                "error": str(e),
+                            }
+                        )
+                        return None
+                    state["reintentos"] += 1
+                    cap = min(backoff_max, backoff_base * 2 ** (attempt - 1))
+                    await sleep(rng.uniform(cap / 2, cap))
+        return None
+
+    total_ventas = 0.0
+    total_impuestos = 0.0
+    newest: Optional[Tuple[str, str]] = None
+    newest_key: Optional[Tuple[datetime, str]] = None
+    previous_ids: Set[Any] = set()
+
+    def emit(shard: Shard, sales: Optional[List[Dict[str, Any]]]) -> None:
+        nonlocal total_ventas, total_impuestos, newest, newest_key, previous_ids
+        sales = sales or []
+        records = [
+            client.to_financial_record(sale)
+            for sale in sales
+            if sale.get("id") is None or sale.get("id") not in previous_ids
+        ]
+        previous_ids = {sale.get("id") for sale in sales}
+
+        state["completados"] += 1
+        state["registros"] += len(records)
+        total_ventas += sum(record["subtotal"] for record in records)
+        total_impuestos += sum(record["impuestos"] for record in records)
+        if sales:
+            last = _sale_key(sales[-1])
+            key = watermark_key(*last)
+            if newest_key is None or key > newest_key:
+                newest, newest_key = last, key
+        if records:
+            if store is not None:
+                store.upsert_sales(client.company_id, records)
+            if sink is not None:
+                sink(records)
+        if progress is not None:
+            progress(
+                {
+                    "shards_completados": state["completados"],
+                    "shards_totales": len(shards),
+                    "registros": state["registros"],
+                    "reintentos": state["reintentos"],
+                    "shards_fallidos": len(failed),
+                    "shard": {"desde": shard[0].isoformat(), "hasta": shard[1].isoformat()},
+                }
+            )
+
+    pending = iter(shards)
+    window: Deque[Tuple[Shard, "asyncio.Task[Optional[List[Dict[str, Any]]]]"]] = deque()
+    try:
+        for shard in pending:
+            window.append((shard, asyncio.create_task(fetch_shard(shard))))
+            if len(window) >= 2 * concurrency:
+                head, task = window.popleft()
+                emit(head, await task)
+        while window:
+            head, task = window.popleft()
+            emit(head, await task)
+    finally:
+        for _, task in window:
+            task.cancel()
+
+    if store is not None and not failed and newest is not None and newest_key is not None:
+        watermark = store.get_watermark(client.company_id)
+        if watermark is None or newest_key > watermark_key(*watermark):
+            store.set_watermark(client.company_id, *newest)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Backfilled {state['registros']} sales for company {client.company_id} in "
+        f"{len(shards)} shards ({len(failed)} failed) in {elapsed:.1f}s"
+    )
+
+    return {
+        "summary": {
+            "total_registros": state["registros"],
+            "periodo_inicio": fecha_inicio.isoformat(),
+            "periodo_fin": fecha_fin.isoformat(),
+            "total_ventas": total_ventas,
+            "total_impuestos": total_impuestos,
+            "total_general": total_ventas + total_impuestos,
+            "shards": len(shards),
+            "reintentos": state["reintentos"],
+            "shards_fallidos": failed,
+            "duracion_segundos": elapsed,
+        }
+    }
+
+
+def main() -> None:
+    """Backfill a period into the sync state store, printing progress."""
+    parser = argparse.ArgumentParser(description="Backfill Techaura sales history")
+    parser.add_argument("desde", type=datetime.fromisoformat, help="Start date (ISO)")
+    parser.add_argument("hasta", type=datetime.fromisoformat, help="End date (ISO)")
+    parser.add_argument("--shard-days", type=float, default=None)
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    def report(update: Dict[str, Any]) -> None:
+        print(
+            f"{update['shards_completados']}/{update['shards_totales']} shards, "
+            f"{update['registros']} sales ({update['shards_fallidos']} failed)",
+            flush=True,
+        )
+
+    async def run() -> Dict[str, Any]:
+        client = get_techaura_client()
+        try:
+            return await backfill_sales(
+                client,
+                args.desde,
+                args.hasta,
+                store=get_sync_state_store(),
+                progress=report,
+                shard_days=args.shard_days,
+                concurrency=args.concurrency,
+            )
+        finally:
+            await client.aclose()
+
+    summary = asyncio.run(run())["summary"]
+    print(
+        f"Done: {summary['total_registros']} sales in {summary['duracion_segundos']:.1f}s, "
+        f"{len(summary['shards_fallidos'])} failed shards"
+    )
+
+
+if __name__ == "__main__":
+    main()
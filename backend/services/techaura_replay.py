@@ -0,0 +1,133 @@
+"""Local stand-in for the Techaura API that replays recorded responses.
+
+Recordings are dictionaries with the request to match and the response to
+send back::
+
+    {"method": "GET", "path": "/api/v1/sales/SALE-1", "status": 200, "body": {...}}
+
+An optional ``query`` dictionary must be a subset of the request's query
+parameters. Requests without a matching recording get a 404.
+
+The replay can be plugged into a TechauraClient as an in-process httpx
+transport, or served as a real HTTP server (it is an ASGI app)::
+
+    python -m backend.services.techaura_replay recordings.json --port 8100
+"""
+
+import argparse
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+
+
+class TechauraReplay:
+    """Replays recorded Techaura responses and records the requests it receives."""
+
+    def __init__(self, recordings: List[Dict[str, Any]]):
+        """
+        Initialize replay server.
+
+        Args:
+            recordings: Recorded request/response pairs, matched in order
+        """
+        self.recordings = recordings
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "TechauraReplay":
+        """Load recordings from a JSON file holding a list of recordings."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def match(self, method: str, path: str, query: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Find the recording for a request.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            query: Query parameters
+
+        Returns:
+            First matching recording, or None
+        """
+        for recording in self.recordings:
+            if recording.get("method", "GET").upper() != method.upper():
+                continue
+            if recording["path"] != path:
+                continue
+            expected = {key: str(value) for key, value in recording.get("query", {}).items()}
+            if all(query.get(key) == value for key, value in expected.items()):
+                return recording
+        return None
+
+    def _respond(
+        self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], **extra: Any
+    ) -> Dict[str, Any]:
+        with self._lock:
+            self.requests.append(
+                {"method": method, "path": path, "query": query, "headers": headers, **extra}
+            )
+        recording = self.match(method, path, query)
+        if recording is None:
+            return {"status": 404, "body": {"error": f"No recording for {method} {path}"}}
+        return {"status": recording.get("status", 200), "body": recording.get("body", {})}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Answer an httpx request (used by the in-process transport)."""
+        reply = self._respond(
+            request.method,
+            request.url.path,
+            dict(request.url.params),
+            {key.lower(): value for key, value in request.headers.items()},
+        )
+        return httpx.Response(reply["status"], json=reply["body"])
+
+    def transport(self) -> httpx.MockTransport:
+        """In-process transport usable by both sync and async httpx clients."""
+        return httpx.MockTransport(self.handle)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        """ASGI entry point, so the replay can be served by uvicorn."""
+        if scope["type"] != "http":
+            return
+        reply = self._respond(
+            scope["method"],
+            scope["path"],
+            dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))),
+            {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]},
+            client=scope.get("client"),
+        )
+        body = json.dumps(reply["body"]).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": reply["status"],
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def main() -> None:
+    """Serve recorded responses on a local port."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", help="JSON file with a list of recordings")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    uvicorn.run(TechauraReplay.from_file(args.recordings), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Persisted Techaura sync state in a local SQLite file.
+
+Stores, per company, the synced sales (keyed on ``venta_id`` so re-fetched
+sales are updated instead of duplicated) and the watermark of the newest sale
+seen, from which the next incremental sync starts.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from backend.config import settings
+
+SALE_COLUMNS = ("venta_id", "fecha", "cliente", "subtotal", "impuestos", "total", "metodo_pago")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    company_id TEXT PRIMARY KEY,
+    last_fecha TEXT NOT NULL,
+    last_venta_id TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sales (
+    company_id TEXT NOT NULL,
+    venta_id TEXT NOT NULL,
+    fecha TEXT,
+    cliente TEXT,
+    subtotal REAL,
+    impuestos REAL,
+    total REAL,
+    metodo_pago TEXT,
+    PRIMARY KEY (company_id, venta_id)
+);
+CREATE INDEX IF NOT EXISTS sales_by_fecha ON sales (company_id, fecha);
+"""
+
+
+def parse_fecha(fecha: str) -> Optional[datetime]:
+    """
+    Parse the ISO date of a sale into a naive UTC datetime.
+
+    Args:
+        fecha: ISO date, with or without a UTC offset ("Z" included)
+
+    Returns:
+        Naive UTC datetime (naive dates are taken as UTC), or None if unparseable
+    """
+    try:
+        parsed = datetime.fromisoformat(fecha)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def watermark_key(fecha: str, venta_id: str) -> Tuple[datetime, str]:
+    """
+    Sort key of a sale for watermark comparisons.
+
+    Dates are compared as instants rather than as strings, so "Z" and "+00:00"
+    offsets or a missing fractional second still order correctly. Unparseable
+    dates sort before every other sale.
+
+    Args:
+        fecha: ISO date of the sale
+        venta_id: Sale identifier (breaks ties between sales of the same instant)
+
+    Returns:
+        Tuple of (naive UTC datetime, venta_id)
+    """
+    return (parse_fecha(fecha) or datetime.min, venta_id)
+
+
+class SyncStateStore:
+    """SQLite-backed watermarks and synced sales per Techaura company."""
+
+    def __init__(self, path: str):
+        """
+        Initialize sync state store.
+
+        Args:
+            path: SQLite database file (created if missing; ":memory:" for tests)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get_watermark(self, company_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Get the newest synced sale of a company.
+
+        Args:
+            company_id: Techaura company ID
+
+        Returns:
+            Tuple of (fecha, venta_id), or None if the company was never synced
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_fecha, last_venta_id FROM sync_state WHERE company_id = ?",
+                (company_id,),
+            ).fetchone()
+        return (row["last_fecha"], row["last_venta_id"]) if row else None
+
+    def set_watermark(self, company_id: str, fecha: str, venta_id: str) -> None:
+        """
+        Save the newest synced sale of a company.
+
+        Args:
+            company_id: Techaura company ID
+            fecha: ISO date of the sale
+            venta_id: Sale identifier
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sync_state (company_id, last_fecha, last_venta_id, updated_at)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (company_id) DO UPDATE SET last_fecha = excluded.last_fecha,"
+                " last_venta_id = excluded.last_venta_id, updated_at = excluded.updated_at",
+                (company_id, fecha, venta_id, datetime.now().isoformat()),
+            )
+
+    def upsert_sales(self, company_id: str, records: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update financial records of synced sales.
+
+        Args:
+            company_id: Techaura company ID
+            records: Financial records with a ``venta_id``
+
+        Returns:
+            Number of records that were not stored before
+        """
+        rows = [
+            (company_id, *(record.get(column) for column in SALE_COLUMNS))
+            for record in records
+            if record.get("venta_id") is not None
+        ]
+        if not rows:
+            return 0
+
+        placeholders = ", ".join("?" * (len(SALE_COLUMNS) + 1))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in SALE_COLUMNS[1:])
+        with self._lock, self._conn:
+            before = self._count(company_id)
+            self._conn.executemany(
+                f"INSERT INTO sales (company_id, {', '.join(SALE_COLUMNS)})"
+                f" VALUES ({placeholders})"
+                f" ON CONFLICT (company_id, venta_id) DO UPDATE SET {updates}",
+                rows,
+            )
+            return self._count(company_id) - before
+
+    def _count(self, company_id: str) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM sales WHERE company_id = ?", (company_id,)
+        ).fetchone()[0]
+
+    def count(self, company_id: str) -> int:
+        """Number of stored sales of a company."""
+        with self._lock:
+            return self._count(company_id)
+
+    def records(self, company_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the stored financial records of a company, oldest first.
+
+        Args:
+            company_id: Techaura company ID
+
+        Yields:
+            Financial records
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SALE_COLUMNS)} FROM sales WHERE company_id = ?",
+                (company_id,),
+            ).fetchall()
+        # Ordered by instant, like watermarks, not by the spelling of the date
+        rows.sort(key=lambda row: watermark_key(row["fecha"] or "", row["venta_id"]))
+        for row in rows:
+            yield dict(row)
+
+    def reset(self, company_id: str) -> None:
+        """Forget the watermark and stored sales of a company (before a full resync)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sync_state WHERE company_id = ?", (company_id,))
+            self._conn.execute("DELETE FROM sales WHERE company_id = ?", (company_id,))
+
+
+# Create store lazily
+_sync_state_store: Optional[SyncStateStore] = None
+
+
+def get_sync_state_store() -> SyncStateStore:
+    """Get or create the shared Techaura sync state store."""
+    global _sync_state_store
+    if _sync_state_store is None:
+        _sync_state_store = SyncStateStore(settings.techaura_state_db)
+    return _sync_state_store
@@ -1,7 +1,9 @@
-"""Techaura sales synchronization service stub.
+"""Techaura sales synchronization service.
 
-This module provides a stub connector for syncing sales data from Techaura.
-In production, replace the stub methods with actual API calls to Techaura.
+Without an API key the client runs in stub mode and returns mock data. With a
+key, requests go to the Techaura API over shared keep-alive connection pools
+(one sync and one async httpx client per TechauraClient), so connection and
+TLS setup are paid once rather than per sale.
 
 Environment variables:
 - TECHAURA_API_KEY: API key for Techaura
@@ -9,14 +11,65 @@ Environment variables:
 - TECHAURA_COMPANY_ID: Company ID in Techaura system
 """
 
+import asyncio
+import importlib.util
 import logging
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import httpx
+
+from backend.config import settings
+from backend.services.metrics import get_metrics
+from backend.services.techaura_state import (
+    SyncStateStore,
+    get_sync_state_store,
+    parse_fecha,
+    watermark_key,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def http2_available() -> bool:
+    """Whether the optional ``h2`` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _read_page(
+    body: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], bool, Optional[str], Optional[int]]:
+    """
+    Split a sales page response into its parts.
+
+    Pagination fields may sit at the top level or under ``pagination``.
+
+    Args:
+        body: Decoded response body
+
+    Returns:
+        Tuple of (records, whether the API pages by cursor, next cursor, total count)
+    """
+    pagination = body.get("pagination") or {}
+    cursor_paged = "next_cursor" in body or "next_cursor" in pagination
+    cursor = body.get("next_cursor", pagination.get("next_cursor"))
+    total = body.get("total", pagination.get("total"))
+    return body.get("data") or [], cursor_paged, cursor, total
+
+
 class TechauraClient:
     """Client for Techaura sales system integration."""
 
@@ -25,6 +78,11 @@ class TechauraClient:
         api_key: Optional[str] = None,
         api_url: Optional[str] = None,
         company_id: Optional[str] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        limits: Optional[httpx.Limits] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
     ):
         """
         Initialize Techaura client.
@@ -33,47 +91,179 @@ class TechauraClient:
             api_key: API key for authentication
             api_url: Base URL for Techaura API
             company_id: Company identifier in Techaura
+            timeout: Request timeouts (default from settings)
+            limits: Connection pool limits (default from settings)
+            http2: Use HTTP/2 (default from settings; only if ``h2`` is installed)
+            transport: Transport for the sync client (e.g. a replay transport in tests)
+            async_transport: Transport for the async client
         """
         self.api_key = api_key or os.getenv("TECHAURA_API_KEY", "stub_api_key")
         self.api_url = api_url or os.getenv("TECHAURA_API_URL", "https://api.techaura.example.com")
-        self.company_id = company_id or os.getenv("TECHAURA_COMPANY_ID", "stub_company")
+        self.company_id: str = company_id or os.getenv("TECHAURA_COMPANY_ID") or "stub_company"
 
         self.is_stub = self.api_key == "stub_api_key"
 
+        self.timeout = timeout or httpx.Timeout(
+            settings.techaura_timeout_seconds, connect=settings.techaura_connect_timeout_seconds
+        )
+        self.limits = limits or httpx.Limits(
+            max_connections=settings.techaura_max_connections,
+            max_keepalive_connections=settings.techaura_max_keepalive_connections,
+            keepalive_expiry=settings.techaura_keepalive_expiry_seconds,
+        )
+        requested_http2 = settings.techaura_http2 if http2 is None else http2
+        self.http2 = requested_http2 and http2_available()
+        if requested_http2 and not self.http2:
+            logger.debug("h2 is not installed; Techaura requests use HTTP/1.1")
+        self._transport = transport
+        self._async_transport = async_transport
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+
         if self.is_stub:
             logger.info("Techaura client initialized in STUB mode (no real API calls)")
         else:
             logger.info(f"Techaura client initialized for company {self.company_id}")
 
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.api_url,
+            "headers": {"Authorization": f"Bearer {self.api_key}", "Accept": "application/json"},
+            "timeout": self.timeout,
+            "limits": self.limits,
+            "http2": self.http2,
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        """Sync HTTP client with a keep-alive connection pool (created on first use)."""
+        if self._client is None:
+            self._client = httpx.Client(transport=self._transport, **self._client_options())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        Async HTTP client with a keep-alive connection pool (created on first use).
+
+        Its connections belong to the event loop that first uses it.
+        """
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                transport=self._async_transport, **self._client_options()
+            )
+        return self._async_client
+
+    def close(self) -> None:
+        """Close the sync connection pool."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        """Close both connection pools."""
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def __enter__(self) -> "TechauraClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "TechauraClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    @staticmethod
+    def _request_kwargs(method: str, data: Optional[dict]) -> Dict[str, Any]:
+        """Send ``data`` as query parameters for GET and as a JSON body otherwise."""
+        if data is None:
+            return {}
+        return {"params": data} if method.upper() == "GET" else {"json": data}
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Dict:
+        """Raise for error statuses and decode the JSON body."""
+        response.raise_for_status()
+        return response.json()
+
     def _make_request(
         self, endpoint: str, method: str = "GET", data: Optional[dict] = None
     ) -> Dict:
         """
         Make HTTP request to Techaura API.
 
-        In stub mode, returns mock data. In production, implement actual HTTP calls.
+        In stub mode, returns mock data. Otherwise the request goes through the
+        pooled sync client.
 
         Args:
             endpoint: API endpoint path
             method: HTTP method (GET, POST, etc.)
-            data: Request payload
+            data: Query parameters (GET) or JSON payload
 
         Returns:
             Response data as dictionary
+
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts and error statuses
         """
         if self.is_stub:
             logger.debug(f"STUB: Would call {method} {self.api_url}{endpoint}")
             return {"status": "stub", "data": []}
 
-        # Real implementation would use requests or httpx
-        # Example:
-        # import httpx
-        # headers = {"Authorization": f"Bearer {self.api_key}"}
-        # response = httpx.request(method, f"{self.api_url}{endpoint}",
-        #                         json=data, headers=headers)
-        # return response.json()
+        response = self.client.request(method, endpoint, **self._request_kwargs(method, data))
+        return self._parse_response(response)
 
-        raise NotImplementedError("Real API integration not implemented. Use stub mode.")
+    async def _make_request_async(
+        self, endpoint: str, method: str = "GET", data: Optional[dict] = None
+    ) -> Dict:
+        """
+        Make HTTP request to Techaura API without blocking the event loop.
+
+        Args:
+            endpoint: API endpoint path
+            method: HTTP method (GET, POST, etc.)
+            data: Query parameters (GET) or JSON payload
+
+        Returns:
+            Response data as dictionary
+
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts and error statuses
+        """
+        if self.is_stub:
+            logger.debug(f"STUB: Would call {method} {self.api_url}{endpoint}")
+            return {"status": "stub", "data": []}
+
+        response = await self.async_client.request(
+            method, endpoint, **self._request_kwargs(method, data)
+        )
+        return self._parse_response(response)
+
+    def _sales_query(
+        self, fecha_inicio: Optional[datetime], fecha_fin: Optional[datetime], limit: int
+    ) -> Tuple[datetime, datetime, str, Dict[str, Any]]:
+        """Resolve the default date range and build the sales endpoint and parameters."""
+        if fecha_inicio is None:
+            fecha_inicio = datetime.now() - timedelta(days=30)
+        if fecha_fin is None:
+            fecha_fin = datetime.now()
+
+        logger.info(
+            f"Fetching sales from {fecha_inicio.date()} to {fecha_fin.date()} (limit: {limit})"
+        )
+        endpoint = f"/api/v1/companies/{self.company_id}/sales"
+        params = {
+            "fecha_inicio": fecha_inicio.isoformat(),
+            "fecha_fin": fecha_fin.isoformat(),
+            "limit": limit,
+        }
+        return fecha_inicio, fecha_fin, endpoint, params
 
     def get_sales(
         self,
@@ -84,6 +274,9 @@ class TechauraClient:
         """
         Retrieve sales data from Techaura.
 
+        Returns at most ``limit`` sales; use ``iter_sales_pages`` to fetch a
+        whole period.
+
         Args:
             fecha_inicio: Start date for sales query (default: 30 days ago)
             fecha_fin: End date for sales query (default: now)
@@ -92,73 +285,248 @@ class TechauraClient:
         Returns:
             List of sale records
         """
-        if fecha_inicio is None:
-            fecha_inicio = datetime.now() - timedelta(days=30)
-        if fecha_fin is None:
-            fecha_fin = datetime.now()
-
-        logger.info(
-            f"Fetching sales from {fecha_inicio.date()} to {fecha_fin.date()} (limit: {limit})"
+        fecha_inicio, fecha_fin, endpoint, params = self._sales_query(
+            fecha_inicio, fecha_fin, limit
         )
-
         if self.is_stub:
             # Return mock data in stub mode
             return self._generate_mock_sales(fecha_inicio, fecha_fin, limit)
 
-        # Real implementation
-        endpoint = f"/api/v1/companies/{self.company_id}/sales"
-        params = {
-            "fecha_inicio": fecha_inicio.isoformat(),
-            "fecha_fin": fecha_fin.isoformat(),
-            "limit": limit,
-        }
-
-        # Would make actual API call here
         response = self._make_request(endpoint, "GET", params)
         return response.get("data", [])
 
+    async def get_sales_async(
+        self,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve sales data from Techaura without blocking the event loop.
+
+        Args:
+            fecha_inicio: Start date for sales query (default: 30 days ago)
+            fecha_fin: End date for sales query (default: now)
+            limit: Maximum number of records to retrieve
+
+        Returns:
+            List of sale records
+        """
+        fecha_inicio, fecha_fin, endpoint, params = self._sales_query(
+            fecha_inicio, fecha_fin, limit
+        )
+        if self.is_stub:
+            return self._generate_mock_sales(fecha_inicio, fecha_fin, limit)
+
+        response = await self._make_request_async(endpoint, "GET", params)
+        return response.get("data", [])
+
+    def _sales_page(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        fecha_inicio: datetime,
+        fecha_fin: datetime,
+    ) -> Dict[str, Any]:
+        """Fetch one page of sales (from the mock generator in stub mode)."""
+        if self.is_stub:
+            return {
+                "data": self._generate_mock_sales(
+                    fecha_inicio, fecha_fin, params["limit"], params.get("offset", 0)
+                ),
+                "total": self._mock_sales_total(fecha_inicio, fecha_fin),
+            }
+        return self._make_request(endpoint, "GET", params)
+
+    async def _sales_page_async(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        fecha_inicio: datetime,
+        fecha_fin: datetime,
+    ) -> Dict[str, Any]:
+        """Fetch one page of sales without blocking the event loop."""
+        if self.is_stub:
+            return self._sales_page(endpoint, params, fecha_inicio, fecha_fin)
+        return await self._make_request_async(endpoint, "GET", params)
+
+    def iter_sales_pages(
+        self,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over every sale of a period, one page at a time.
+
+        Pages are requested with ``limit``/``offset``. If the API answers with
+        a ``next_cursor`` it is followed instead, and the next page is fetched
+        while the caller processes the current one. With offset paging up to
+        ``prefetch`` pages are fetched concurrently on the shared pool. At most
+        ``prefetch`` pages are held in memory besides the one being yielded.
+
+        Args:
+            fecha_inicio: Start date (default: 30 days ago)
+            fecha_fin: End date (default: now)
+            page_size: Records per page (default from settings)
+            prefetch: Pages fetched ahead of the consumer (default from settings)
+
+        Yields:
+            Non-empty lists of sale records, in API order
+        """
+        page_size = page_size or settings.techaura_page_size
+        prefetch = max(1, prefetch or settings.techaura_prefetch_pages)
+        fecha_inicio, fecha_fin, endpoint, params = self._sales_query(
+            fecha_inicio, fecha_fin, page_size
+        )
+
+        def fetch(**paging: Any) -> Dict[str, Any]:
+            return self._sales_page(endpoint, {**params, **paging}, fecha_inicio, fecha_fin)
+
+        items, cursor_paged, cursor, total = _read_page(fetch(offset=0))
+        pool = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="techaura-page")
+        window: Deque[Any] = deque()
+        try:
+            if cursor_paged:
+                while True:
+                    if cursor:
+                        window.append(pool.submit(fetch, cursor=cursor))
+                    if items:
+                        yield items
+                    if not window:
+                        return
+                    items, _, cursor, _ = _read_page(window.popleft().result())
+
+            next_offset = page_size
+            while True:
+                last = len(items) < page_size
+                while (
+                    not last and len(window) < prefetch and (total is None or next_offset < total)
+                ):
+                    window.append(pool.submit(fetch, offset=next_offset))
+                    next_offset += page_size
+                if items:
+                    yield items
+                if last or not window:
+                    return
+                items = _read_page(window.popleft().result())[0]
+        finally:
+            for future in window:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    async def aiter_sales_pages(
+        self,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Iterate over every sale of a period without blocking the event loop.
+
+        Same paging and prefetching as ``iter_sales_pages``, with the fetches
+        running as tasks on the async connection pool.
+
+        Args:
+            fecha_inicio: Start date (default: 30 days ago)
+            fecha_fin: End date (default: now)
+            page_size: Records per page (default from settings)
+            prefetch: Pages fetched ahead of the consumer (default from settings)
+
+        Yields:
+            Non-empty lists of sale records, in API order
+        """
+        page_size = page_size or settings.techaura_page_size
+        prefetch = max(1, prefetch or settings.techaura_prefetch_pages)
+        fecha_inicio, fecha_fin, endpoint, params = self._sales_query(
+            fecha_inicio, fecha_fin, page_size
+        )
+
+        async def fetch(**paging: Any) -> Dict[str, Any]:
+            return await self._sales_page_async(
+                endpoint, {**params, **paging}, fecha_inicio, fecha_fin
+            )
+
+        items, cursor_paged, cursor, total = _read_page(await fetch(offset=0))
+        window: Deque["asyncio.Task[Dict[str, Any]]"] = deque()
+        try:
+            if cursor_paged:
+                while True:
+                    if cursor:
+                        window.append(asyncio.create_task(fetch(cursor=cursor)))
+                    if items:
+                        yield items
+                    if not window:
+                        return
+                    items, _, cursor, _ = _read_page(await window.popleft())
+
+            next_offset = page_size
+            while True:
+                last = len(items) < page_size
+                while (
+                    not last and len(window) < prefetch and (total is None or next_offset < total)
+                ):
+                    window.append(asyncio.create_task(fetch(offset=next_offset)))
+                    next_offset += page_size
+                if items:
+                    yield items
+                if last or not window:
+                    return
+                items = _read_page(await window.popleft())[0]
+        finally:
+            for task in window:
+                task.cancel()
+
     def _generate_mock_sales(
-        self, fecha_inicio: datetime, fecha_fin: datetime, limit: int
+        self, fecha_inicio: datetime, fecha_fin: datetime, limit: int, offset: int = 0
     ) -> List[Dict[str, Any]]:
         """
         Generate mock sales data for testing.
 
+        The stub has one sale per day of the period, identified by its date so
+        overlapping periods return the same sales; ``offset`` and ``limit``
+        select a page of them.
+
         Args:
             fecha_inicio: Start date
             fecha_fin: End date
             limit: Number of records to generate
+            offset: Index of the first record
 
         Returns:
             List of mock sale records
         """
         mock_sales: List[Dict[str, Any]] = []
         days_diff = (fecha_fin - fecha_inicio).days
-        records_to_generate = min(limit, max(1, days_diff))
-
-        # Prevent division by zero
-        if records_to_generate == 0:
-            return mock_sales
-
-        for i in range(records_to_generate):
-            date = fecha_inicio + timedelta(days=i * (days_diff / records_to_generate))
+        total = self._mock_sales_total(fecha_inicio, fecha_fin)
+
+        for i in range(offset, min(offset + limit, total)):
+            date = fecha_inicio + timedelta(days=i * (days_diff / total))
+            # Every field derives from the day, so overlapping periods agree on each sale
+            n = date.toordinal()
+            cantidad = 1 + (n % 5)
+            precio_unitario = 50000 + (n % 100) * 1000
+            subtotal = cantidad * precio_unitario
             sale = {
-                "id": f"SALE-{i+1:05d}",
+                "id": f"SALE-{date:%Y%m%d}",
                 "fecha": date.isoformat(),
-                "cliente_nit": f"900{i:06d}-{i % 10}",
-                "cliente_nombre": f"Cliente {i+1}",
+                "cliente_nit": f"900{n % 1000000:06d}-{n % 10}",
+                "cliente_nombre": f"Cliente {n % 1000 + 1}",
                 "productos": [
                     {
-                        "codigo": f"PROD-{(i % 10) + 1:03d}",
-                        "nombre": f"Producto {(i % 10) + 1}",
-                        "cantidad": 1 + (i % 5),
-                        "precio_unitario": 50000 + (i * 1000),
-                        "subtotal": (1 + (i % 5)) * (50000 + (i * 1000)),
+                        "codigo": f"PROD-{(n % 10) + 1:03d}",
+                        "nombre": f"Producto {(n % 10) + 1}",
+                        "cantidad": cantidad,
+                        "precio_unitario": precio_unitario,
+                        "subtotal": subtotal,
                     }
                 ],
-                "subtotal": (1 + (i % 5)) * (50000 + (i * 1000)),
-                "impuestos": (1 + (i % 5)) * (50000 + (i * 1000)) * 0.19,
-                "total": (1 + (i % 5)) * (50000 + (i * 1000)) * 1.19,
-                "metodo_pago": "Tarjeta" if i % 2 == 0 else "Efectivo",
+                "subtotal": subtotal,
+                "impuestos": subtotal * 0.19,
+                "total": subtotal * 1.19,
+                "metodo_pago": "Tarjeta" if n % 2 == 0 else "Efectivo",
                 "estado": "Completada",
             }
             mock_sales.append(sale)
@@ -166,6 +534,11 @@ class TechauraClient:
         logger.info(f"Generated {len(mock_sales)} mock sales records")
         return mock_sales
 
+    @staticmethod
+    def _mock_sales_total(fecha_inicio: datetime, fecha_fin: datetime) -> int:
+        """Number of mock sales in a period (one per day, at least one)."""
+        return max(1, (fecha_fin - fecha_inicio).days)
+
     def get_sale_details(self, sale_id: str) -> Optional[Dict[str, Any]]:
         """
         Get detailed information about a specific sale.
@@ -179,81 +552,133 @@ class TechauraClient:
         logger.info(f"Fetching details for sale {sale_id}")
 
         if self.is_stub:
-            # Return mock sale detail
-            return {
-                "id": sale_id,
-                "fecha": datetime.now().isoformat(),
-                "cliente_nit": "900123456-7",
-                "cliente_nombre": "Cliente Ejemplo",
-                "cliente_email": "cliente@example.com",
-                "cliente_telefono": "+57 300 1234567",
-                "cliente_direccion": "Calle 123 #45-67, Bogotá",
-                "productos": [
-                    {
-                        "codigo": "PROD-001",
-                        "nombre": "Producto Ejemplo",
-                        "cantidad": 2,
-                        "precio_unitario": 100000,
-                        "descuento": 0,
-                        "subtotal": 200000,
-                        "iva": 38000,
-                        "total": 238000,
-                    }
-                ],
-                "subtotal": 200000,
-                "descuentos": 0,
-                "impuestos": 38000,
-                "total": 238000,
-                "metodo_pago": "Tarjeta de Crédito",
-                "estado": "Completada",
-                "vendedor": "Juan Pérez",
-                "notas": "Venta de prueba",
-            }
+            return self._mock_sale_details(sale_id)
+
+        try:
+            response = self._make_request(f"/api/v1/sales/{sale_id}", "GET")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+        return response.get("data")
 
-        endpoint = f"/api/v1/sales/{sale_id}"
-        response = self._make_request(endpoint, "GET")
+    async def get_sale_details_async(self, sale_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get detailed information about a specific sale without blocking the event loop.
+
+        Many details can be fetched concurrently (e.g. with ``asyncio.gather``);
+        they share the pool's keep-alive connections up to its connection limit.
+
+        Args:
+            sale_id: Sale identifier
+
+        Returns:
+            Sale details or None if not found
+        """
+        logger.info(f"Fetching details for sale {sale_id}")
+
+        if self.is_stub:
+            return self._mock_sale_details(sale_id)
+
+        try:
+            response = await self._make_request_async(f"/api/v1/sales/{sale_id}", "GET")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
         return response.get("data")
 
+    @staticmethod
+    def _mock_sale_details(sale_id: str) -> Dict[str, Any]:
+        """Mock sale detail returned in stub mode."""
+        return {
+            "id": sale_id,
+            "fecha": datetime.now().isoformat(),
+            "cliente_nit": "900123456-7",
+            "cliente_nombre": "Cliente Ejemplo",
+            "cliente_email": "cliente@example.com",
+            "cliente_telefono": "+57 300 1234567",
+            "cliente_direccion": "Calle 123 #45-67, Bogotá",
+            "productos": [
+                {
+                    "codigo": "PROD-001",
+                    "nombre": "Producto Ejemplo",
+                    "cantidad": 2,
+                    "precio_unitario": 100000,
+                    "descuento": 0,
+                    "subtotal": 200000,
+                    "iva": 38000,
+                    "total": 238000,
+                }
+            ],
+            "subtotal": 200000,
+            "descuentos": 0,
+            "impuestos": 38000,
+            "total": 238000,
+            "metodo_pago": "Tarjeta de Crédito",
+            "estado": "Completada",
+            "vendedor": "Juan Pérez",
+            "notas": "Venta de prueba",
+        }
+
+    @staticmethod
+    def to_financial_record(sale: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Techaura sale to the financial data record format."""
+        return {
+            "fecha": sale.get("fecha"),
+            "venta_id": sale.get("id"),
+            "cliente": sale.get("cliente_nombre"),
+            "subtotal": sale.get("subtotal", 0),
+            "impuestos": sale.get("impuestos", 0),
+            "total": sale.get("total", 0),
+            "metodo_pago": sale.get("metodo_pago"),
+        }
+
     def sync_sales_to_financial_data(
-        self, fecha_inicio: Optional[datetime] = None, fecha_fin: Optional[datetime] = None
+        self,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        page_size: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Sync sales data and convert to financial data format.
 
-        This method retrieves sales from Techaura and formats them for
-        financial analysis tools.
+        This method streams every sale of the period from Techaura, page by
+        page, and formats it for financial analysis tools. Totals are
+        aggregated as pages arrive. Without a ``sink`` the records are
+        collected in ``data``; with one, each page of records is handed to
+        the sink instead, so memory stays bounded however many sales the
+        period has.
 
         Args:
             fecha_inicio: Start date for sync
             fecha_fin: End date for sync
+            sink: Receives each page of financial records (``data`` is then empty)
+            page_size: Records per page (default from settings)
 
         Returns:
             Dictionary with sync summary and formatted data
         """
-        sales = self.get_sales(fecha_inicio, fecha_fin)
-
-        # Convert to financial data format
-        financial_data = []
+        financial_data: List[Dict[str, Any]] = []
+        total_registros = 0
         total_ventas = 0
         total_impuestos = 0
 
-        for sale in sales:
-            total_ventas += sale.get("subtotal", 0)
-            total_impuestos += sale.get("impuestos", 0)
-
-            financial_record = {
-                "fecha": sale.get("fecha"),
-                "venta_id": sale.get("id"),
-                "cliente": sale.get("cliente_nombre"),
-                "subtotal": sale.get("subtotal", 0),
-                "impuestos": sale.get("impuestos", 0),
-                "total": sale.get("total", 0),
-                "metodo_pago": sale.get("metodo_pago"),
-            }
-            financial_data.append(financial_record)
+        for page in self.iter_sales_pages(fecha_inicio, fecha_fin, page_size=page_size):
+            records = [self.to_financial_record(sale) for sale in page]
+            total_registros += len(records)
+            total_ventas += sum(record["subtotal"] for record in records)
+            total_impuestos += sum(record["impuestos"] for record in records)
+            get_metrics().techaura_records.inc(len(records), self.company_id)
+
+            if sink is None:
+                financial_data.extend(records)
+            else:
+                sink(records)
 
         summary = {
-            "total_registros": len(sales),
+            "total_registros": total_registros,
             "periodo_inicio": fecha_inicio.isoformat() if fecha_inicio else None,
             "periodo_fin": fecha_fin.isoformat() if fecha_fin else None,
             "total_ventas": total_ventas,
@@ -261,14 +686,92 @@ class TechauraClient:
             "total_general": total_ventas + total_impuestos,
         }
 
-        logger.info(f"Synced {len(sales)} sales records. Total sales: ${total_ventas:,.2f}")
+        logger.info(f"Synced {total_registros} sales records. Total sales: ${total_ventas:,.2f}")
 
         return {"summary": summary, "data": financial_data}
 
+    def sync_incremental(
+        self,
+        store: Optional[SyncStateStore] = None,
+        full_resync: bool = False,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sync only the sales newer than the company's persisted watermark.
+
+        Records are upserted into the state store keyed on ``venta_id``, so
+        the overlap re-fetched behind the watermark (for late-arriving sales)
+        and retried syncs never duplicate sales. The watermark only advances
+        once the whole delta has been stored.
+
+        Args:
+            store: Sync state store (default: the shared SQLite store)
+            full_resync: Drop the company's watermark and stored sales and
+                re-fetch the whole period
+            fecha_inicio: Start date when there is no watermark (or its date
+                cannot be parsed) or on a full resync (default: 30 days ago)
+            fecha_fin: End date for sync (default: now)
+
+        Returns:
+            Dictionary with the sync summary, mode and new watermark
+        """
+        store = store or get_sync_state_store()
+        if full_resync:
+            store.reset(self.company_id)
+
+        watermark = store.get_watermark(self.company_id)
+        watermark_fecha = parse_fecha(watermark[0]) if watermark else None
+        if watermark_fecha is None:
+            # No watermark, or one whose date cannot be parsed: fetch the whole window
+            mode = "completo"
+            desde = fecha_inicio or datetime.now() - timedelta(days=30)
+        else:
+            mode = "incremental"
+            desde = watermark_fecha - timedelta(seconds=settings.techaura_sync_overlap_seconds)
+
+        newest = watermark
+        newest_key = watermark_key(*watermark) if watermark else None
+        nuevos = 0
+
+        def store_page(records: List[Dict[str, Any]]) -> None:
+            nonlocal newest, newest_key, nuevos
+            nuevos += store.upsert_sales(self.company_id, records)
+            for record in records:
+                if record["fecha"] is None or record["venta_id"] is None:
+                    continue
+                sale = (str(record["fecha"]), str(record["venta_id"]))
+                key = watermark_key(*sale)
+                if newest_key is None or key > newest_key:
+                    newest, newest_key = sale, key
+
+        result = self.sync_sales_to_financial_data(desde, fecha_fin, sink=store_page)
+        if newest is not None and newest != watermark:
+            store.set_watermark(self.company_id, *newest)
+
+        logger.info(
+            f"{mode.capitalize()} sync for company {self.company_id} from {desde.isoformat()}: "
+            f"{result['summary']['total_registros']} fetched, {nuevos} new"
+        )
+
+        return {
+            "summary": {
+                **result["summary"],
+                "modo": mode,
+                "registros_nuevos": nuevos,
+                "registros_almacenados": store.count(self.company_id),
+                "watermark": {"fecha": newest[0], "venta_id": newest[1]} if newest else None,
+            }
+        }
+
+
+# Create client lazily so every caller shares one connection pool
+_techaura_client: Optional[TechauraClient] = None
+
 
 def get_techaura_client() -> TechauraClient:
     """
-    Get Techaura client instance configured from environment.
+    Get the shared Techaura client configured from environment.
 
     Environment variables:
     - TECHAURA_API_KEY: API key (default: stub mode)
@@ -278,8 +781,11 @@ def get_techaura_client() -> TechauraClient:
     Returns:
         Configured TechauraClient instance
     """
-    return TechauraClient(
-        api_key=os.getenv("TECHAURA_API_KEY"),
-        api_url=os.getenv("TECHAURA_API_URL"),
-        company_id=os.getenv("TECHAURA_COMPANY_ID"),
-    )
+    global _techaura_client
+    if _techaura_client is None:
+        _techaura_client = TechauraClient(
+            api_key=os.getenv("TECHAURA_API_KEY"),
+            api_url=os.getenv("TECHAURA_API_URL"),
+            company_id=os.getenv("TECHAURA_COMPANY_ID"),
+        )
+    return _techaura_client
@@ -0,0 +1,177 @@
+"""Memoization of financial tool calls.
+
+Pure tools (ratio calculators, DCF projections, risk alerts) are cached on
+their canonicalized arguments. Tools that read a stored dataset are also keyed
+on that dataset's version, so storing new data under the same name
+invalidates their entries.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from backend.config import settings
+
+# Results depend only on the arguments
+PURE_TOOLS = frozenset(
+    {
+        "calculate_liquidity_ratios",
+        "calculate_leverage_ratios",
+        "calculate_profitability_ratios",
+        "simple_dcf_projection",
+        "dcf_sensitivity_grid",
+        "generate_risk_alerts",
+        "generate_risk_alerts_batch",
+    }
+)
+
+# Results depend on the arguments and the content of the ``dataset_name`` dataset
+DATASET_TOOLS = frozenset({"analyze_trend", "calculate_ratios_table", "describe_dataset"})
+
+
+def _canonical(value: Any) -> Any:
+    """Normalize argument values so equivalent calls share a key (5 == 5.0)."""
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def make_tool_key(
+    tool_name: str, tool_args: Dict[str, Any], dataset_version: Optional[int] = None
+) -> str:
+    """
+    Build the memoization key for a tool call.
+
+    Args:
+        tool_name: Tool name
+        tool_args: Keyword arguments of the call (with defaults applied)
+        dataset_version: Version of the dataset the tool reads, if any
+
+    Returns:
+        Hex SHA-256 digest identifying the call
+    """
+    payload = {"tool": tool_name, "args": _canonical(tool_args), "dataset": dataset_version}
+    encoded = json.dumps(
+        payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ToolCache:
+    """Size-bounded LRU cache of tool results with per-tool hit counters."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize tool cache.
+
+        Args:
+            max_entries: Max cached results before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.evictions = 0
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    @staticmethod
+    def is_cacheable(tool_name: str) -> bool:
+        """Whether results of a tool may be memoized."""
+        return tool_name in PURE_TOOLS or tool_name in DATASET_TOOLS
+
+    async def call(
+        self,
+        tool_name: str,
+        tool_args: Dict[str, Any],
+        run: Callable[[], Awaitable[Any]],
+        dataset_version: Optional[int] = None,
+        current_version: Optional[Callable[[], Optional[int]]] = None,
+    ) -> Any:
+        """
+        Return the memoized result of a tool call, running it on a miss.
+
+        Results are shared between callers and must not be mutated. Calls
+        that raise are not cached. If ``current_version`` no longer matches
+        ``dataset_version`` after the run, the dataset was replaced while the
+        tool ran. The result may then come from the new data, so it is
+        returned but not cached under the old version.
+
+        Args:
+            tool_name: Tool name
+            tool_args: Keyword arguments of the call (with defaults applied)
+            run: Runs the tool and returns its result
+            dataset_version: Version of the dataset the tool reads (dataset tools)
+            current_version: Reads the dataset version again once the tool has run
+
+        Returns:
+            Tool result
+        """
+        key = make_tool_key(tool_name, tool_args, dataset_version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits[tool_name] = self._hits.get(tool_name, 0) + 1
+                return self._entries[key]
+            self._misses[tool_name] = self._misses.get(tool_name, 0) + 1
+
+        result = await run()
+        if current_version is not None and current_version() != dataset_version:
+            return result
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        """Drop every cached result (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache size and per-tool hit/miss counters.
+
+        Returns:
+            Dictionary with entry count, limits, overall and per-tool hit rates
+        """
+        with self._lock:
+            tools = {}
+            for name in sorted(set(self._hits) | set(self._misses)):
+                hits, misses = self._hits.get(name, 0), self._misses.get(name, 0)
+                tools[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "evictions": self.evictions,
+                "hit_rate": hits / (hits + misses) if hits + misses else None,
+                "tools": tools,
+            }
+
+
+# Create cache lazily
+_tool_cache: Optional[ToolCache] = None
+
+
+def get_tool_cache() -> ToolCache:
+    """Get or create the shared tool result cache."""
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolCache(max_entries=settings.tool_cache_max_entries)
+    return _tool_cache
@@ -1,33 +1,100 @@
 """Vertex AI service for Gemini model interaction."""
 
+import asyncio
+import json
 import os
-from typing import Any, Dict, List, Optional
+from collections.abc import Mapping, Sequence
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import vertexai
 from vertexai.preview import generative_models
 
 from backend.config import settings
 from backend.models.schemas import Message
+from backend.services.fake_model import SCRIPTED_TOOLS, FakeGenerativeModel
+from backend.services.history import get_history_manager
+from backend.services.metrics import get_metrics
+from backend.services.model_registry import ModelRegistry
+from backend.services.resilience import get_resilience_policy
 
+# Async callable that runs a tool: (tool_name, arguments) -> result
+ToolExecutor = Callable[[str, Dict[str, Any]], Awaitable[Any]]
 
-class VertexAIService:
-    """Service for interacting with Vertex AI Gemini models."""
 
-    def __init__(self):
-        """Initialize Vertex AI service."""
-        # Set credentials environment variable
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = settings.google_application_credentials
+def _to_jsonable(value: Any) -> Any:
+    """Convert a tool result to plain JSON types for a function-response part."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _plain_args(value: Any) -> Any:
+    """
+    Convert function-call arguments from proto types to plain Python.
+
+    Arguments arrive as a protobuf Struct: nested maps and lists are proto
+    containers and every number is a float, so whole numbers become ints
+    (e.g. ``periodos=5.0`` would break ``range``).
+    """
+    if isinstance(value, Mapping):
+        return {key: _plain_args(item) for key, item in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return [_plain_args(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
 
-        # Initialize Vertex AI
-        vertexai.init(project=settings.project_id, location=settings.location)
+class VertexAIService:
+    """Service for interacting with Vertex AI Gemini models."""
 
-        # Define financial analysis tools for function calling
-        self.tools = self._create_tools()
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Initialize Vertex AI service.
 
-        # Initialize model
+        Args:
+            backend: "vertex" for Gemini on Vertex AI or "fake" for the offline
+                fake model (default from settings)
+        """
+        self.backend = backend or settings.model_backend
+        if self.backend == "vertex":
+            # Set credentials environment variable
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = settings.google_application_credentials
+
+            # Initialize Vertex AI
+            vertexai.init(project=settings.project_id, location=settings.location)
+
+            # Define financial analysis tools for function calling
+            self.tools = self._create_tools()
+        elif self.backend == "fake":
+            # The fake model only requests its scripted tool calls
+            self.tools = None
+            self.tool_names = set(SCRIPTED_TOOLS)
+        else:
+            raise ValueError(f"Unknown model backend '{self.backend}'. Use 'vertex' or 'fake'")
+
+        # Models are built once per name and reused; the default one is built up front
         self.model_name = settings.gemini_model
-        self.model = generative_models.GenerativeModel(
-            self.model_name,
+        self.models = ModelRegistry(
+            self._build_model,
+            allowed=dict.fromkeys(
+                [self.model_name, *settings.available_models, *filter(None, [settings.hedge_model])]
+            ),
+        )
+        self.models.get(self.model_name)
+
+    def _build_model(self, model_name: str) -> Any:
+        """Build a model with the financial tools and system instruction."""
+        if self.backend == "fake":
+            return FakeGenerativeModel(
+                model_name,
+                latency_distribution=settings.fake_latency_distribution,
+                latency_ms=settings.fake_latency_ms,
+                latency_spread_ms=settings.fake_latency_spread_ms,
+                error_rate=settings.fake_error_rate,
+                tool_call_rate=settings.fake_tool_call_rate,
+                seed=settings.fake_seed,
+            )
+        return generative_models.GenerativeModel(
+            model_name,
             tools=[self.tools] if self.tools else None,
             system_instruction=self._get_system_instruction(),
         )
@@ -39,16 +106,24 @@ calcular ratios financieros clave, identificar tendencias, proyectar flujos de c
 
 Capacidades:
 - Analizar estados financieros (balance general, estado de resultados, flujo de caja)
+- Consultar los conjuntos de datos almacenados por su nombre
 - Calcular ratios de liquidez (razón corriente, prueba ácida)
 - Calcular ratios de endeudamiento (razón de endeudamiento, deuda/patrimonio)
 - Calcular ratios de rentabilidad (ROE, ROA, margen neto)
+- Calcular todos los ratios para cada periodo de un conjunto de datos en una sola llamada
 - Analizar tendencias en datos financieros
 - Realizar proyecciones simples de flujo de caja descontado (DCF)
+- Construir tablas de sensibilidad DCF para varias tasas de crecimiento, descuento y horizontes
+- Realizar valoraciones DCF estocásticas (Monte Carlo) con percentiles y VaR
 - Identificar alertas de riesgo basadas en los indicadores financieros
 
-Cuando recibas datos financieros:
-1. Primero almacena los datos usando la función correspondiente
-2. Calcula los ratios relevantes según la información disponible
+Los archivos que carga el usuario ya están almacenados en el servidor con un nombre (dataset_name).
+Cuando haya datos almacenados, el mensaje del usuario incluye un resumen de cada conjunto de datos
+(columnas, tipos, estadísticas y algunas filas de muestra); no copies filas en las llamadas a funciones.
+
+Cuando analices datos financieros:
+1. Identifica el conjunto de datos por su nombre (usa list_datasets o describe_dataset si necesitas más detalle)
+2. Calcula los ratios relevantes según la información disponible (para datos con varios periodos usa la tabla de ratios)
 3. Analiza tendencias si hay datos históricos
 4. Genera alertas de riesgo basadas en los ratios
 5. Proporciona recomendaciones claras y accionables
@@ -58,25 +133,30 @@ Usa terminología financiera en español y sé preciso en tus análisis."""
 
     def _create_tools(self) -> Optional[generative_models.Tool]:
         """Create function declarations for financial tools."""
-        # Tool for storing financial data
-        store_data_func = generative_models.FunctionDeclaration(
-            name="store_financial_data",
-            description="Almacena datos financieros para análisis posterior. Usar cuando se recibe un CSV o datos tabulares.",
+        # Tools for the datasets stored on the server (uploads are referenced by handle)
+        list_datasets_func = generative_models.FunctionDeclaration(
+            name="list_datasets",
+            description="Lista los conjuntos de datos almacenados en el servidor con su número de filas y columnas",
+            parameters={"type": "object", "properties": {}},
+        )
+        describe_dataset_func = generative_models.FunctionDeclaration(
+            name="describe_dataset",
+            description="Describe un conjunto de datos almacenado (columnas, tipos, nulos, mínimo/máximo/media y filas de muestra) sin devolver todas sus filas",
             parameters={
                 "type": "object",
                 "properties": {
-                    "data": {
-                        "type": "array",
-                        "description": "Lista de objetos con datos financieros",
-                        "items": {"type": "object"},
-                    },
                     "dataset_name": {
                         "type": "string",
-                        "description": "Nombre para identificar este conjunto de datos",
+                        "description": "Nombre del conjunto de datos",
                         "default": "main",
                     },
+                    "sample_rows": {
+                        "type": "integer",
+                        "description": "Número de filas de muestra",
+                        "default": 3,
+                    },
                 },
-                "required": ["data"],
+                "required": ["dataset_name"],
             },
         )
 
@@ -144,6 +224,32 @@ Usa terminología financiera en español y sé preciso en tus análisis."""
             },
         )
 
+        # Tool for multi-period ratio tables
+        ratios_table_func = generative_models.FunctionDeclaration(
+            name="calculate_ratios_table",
+            description="Calcula todos los ratios (liquidez, endeudamiento, rentabilidad) para cada periodo de un conjunto de datos almacenado en una sola llamada",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "dataset_name": {
+                        "type": "string",
+                        "description": "Nombre del conjunto de datos",
+                        "default": "main",
+                    },
+                    "period_column": {
+                        "type": "string",
+                        "description": "Columna que identifica el periodo (ej: periodo, año)",
+                        "default": "periodo",
+                    },
+                    "entity_column": {
+                        "type": "string",
+                        "description": "Columna que identifica la empresa o entidad (opcional)",
+                    },
+                },
+                "required": [],
+            },
+        )
+
         # Tool for trend analysis
         trend_func = generative_models.FunctionDeclaration(
             name="analyze_trend",
@@ -195,6 +301,78 @@ Usa terminología financiera en español y sé preciso en tus análisis."""
             },
         )
 
+        # Tool for DCF sensitivity tables
+        dcf_grid_func = generative_models.FunctionDeclaration(
+            name="dcf_sensitivity_grid",
+            description="Calcula una tabla de sensibilidad DCF con la valoración total para cada combinación de tasas de crecimiento, tasas de descuento y horizontes",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "flujo_caja_actual": {
+                        "type": "number",
+                        "description": "Flujo de caja actual o del último periodo",
+                    },
+                    "tasas_crecimiento": {
+                        "type": "array",
+                        "description": "Tasas de crecimiento a evaluar (porcentaje, ej: [3, 5, 7])",
+                        "items": {"type": "number"},
+                    },
+                    "tasas_descuento": {
+                        "type": "array",
+                        "description": "Tasas de descuento a evaluar (porcentaje, ej: [8, 10, 12])",
+                        "items": {"type": "number"},
+                    },
+                    "periodos": {
+                        "type": "array",
+                        "description": "Horizontes de proyección a evaluar (ej: [5, 10])",
+                        "items": {"type": "integer"},
+                    },
+                },
+                "required": ["flujo_caja_actual", "tasas_crecimiento", "tasas_descuento"],
+            },
+        )
+
+        # Tool for Monte Carlo DCF valuation
+        rate_distribution = {
+            "type": "object",
+            "description": "Distribución de la tasa en porcentaje: {'distribution': 'normal', 'mean': 5, 'std': 2}, {'distribution': 'uniform', 'low': 3, 'high': 7} o {'distribution': 'triangular', 'low': 3, 'mode': 5, 'high': 7}",
+        }
+        monte_carlo_func = generative_models.FunctionDeclaration(
+            name="monte_carlo_dcf",
+            description="Valoración DCF estocástica (Monte Carlo): simula tasas de crecimiento y descuento aleatorias y reporta percentiles, VaR y CVaR del valor total",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "flujo_caja_actual": {
+                        "type": "number",
+                        "description": "Flujo de caja actual o del último periodo",
+                    },
+                    "tasa_crecimiento": rate_distribution,
+                    "tasa_descuento": rate_distribution,
+                    "periodos": {
+                        "type": "integer",
+                        "description": "Número de periodos a proyectar",
+                        "default": 5,
+                    },
+                    "simulaciones": {
+                        "type": "integer",
+                        "description": "Número de escenarios a simular",
+                        "default": 100000,
+                    },
+                    "confianza": {
+                        "type": "number",
+                        "description": "Nivel de confianza para el VaR (porcentaje, ej: 95)",
+                        "default": 95,
+                    },
+                    "seed": {
+                        "type": "integer",
+                        "description": "Semilla para resultados reproducibles",
+                    },
+                },
+                "required": ["flujo_caja_actual", "tasa_crecimiento", "tasa_descuento"],
+            },
+        )
+
         # Tool for risk alerts
         risk_func = generative_models.FunctionDeclaration(
             name="generate_risk_alerts",
@@ -211,19 +389,48 @@ Usa terminología financiera en español y sé preciso en tus análisis."""
             },
         )
 
-        # Combine all tools
-        return generative_models.Tool(
-            function_declarations=[
-                store_data_func,
-                liquidity_func,
-                leverage_func,
-                profitability_func,
-                trend_func,
-                dcf_func,
-                risk_func,
-            ]
+        # Tool for batch risk alerts over a ratio table
+        risk_batch_func = generative_models.FunctionDeclaration(
+            name="generate_risk_alerts_batch",
+            description="Genera alertas de riesgo para todos los periodos o empresas de una tabla de ratios (por ejemplo, el resultado de calculate_ratios_table)",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "ratios_table": {
+                        "type": "object",
+                        "description": "Tabla de ratios con 'columns' y 'rows', o un diccionario de columnas con listas de valores",
+                    },
+                    "severity": {
+                        "type": "string",
+                        "description": "Filtrar por severidad (critical, high, medium)",
+                    },
+                    "category": {
+                        "type": "string",
+                        "description": "Filtrar por categoría (liquidez, endeudamiento, rentabilidad)",
+                    },
+                },
+                "required": ["ratios_table"],
+            },
         )
 
+        # Combine all tools
+        declarations = [
+            list_datasets_func,
+            describe_dataset_func,
+            liquidity_func,
+            leverage_func,
+            profitability_func,
+            ratios_table_func,
+            trend_func,
+            dcf_func,
+            dcf_grid_func,
+            monte_carlo_func,
+            risk_func,
+            risk_batch_func,
+        ]
+        self.tool_names = {d._raw_function_declaration.name for d in declarations}
+        return generative_models.Tool(function_declarations=declarations)
+
     def _convert_messages_to_contents(
         self, messages: List[Message]
     ) -> List[generative_models.Content]:
@@ -245,60 +452,398 @@ Usa terminología financiera en español y sé preciso en tus análisis."""
                 )
         return contents
 
+    @staticmethod
+    def _extract_response(response: Any) -> Tuple[str, List[Dict[str, Any]]]:
+        """Extract the text and function calls from a model response."""
+        texts: List[str] = []
+        function_calls: List[Dict[str, Any]] = []
+
+        if response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+            if hasattr(candidate, "content") and candidate.content.parts:
+                for part in candidate.content.parts:
+                    fc = getattr(part, "function_call", None)
+                    if fc and fc.name:
+                        function_calls.append(
+                            {"name": fc.name, "arguments": _plain_args(fc.args) if fc.args else {}}
+                        )
+                        continue
+                    try:
+                        texts.append(part.text)
+                    except (AttributeError, ValueError):
+                        # Non-text part (e.g. function response echo)
+                        continue
+
+        return "".join(texts), function_calls
+
+    async def _execute_tool_calls(
+        self, function_calls: List[Dict[str, Any]], tool_executor: ToolExecutor
+    ) -> List[Any]:
+        """Run all function calls of one model turn concurrently."""
+
+        async def run(call: Dict[str, Any]) -> Any:
+            if call["name"] not in self.tool_names:
+                return {"error": f"Unknown tool '{call['name']}'"}
+            try:
+                return await tool_executor(call["name"], call["arguments"])
+            except Exception as e:
+                return {"error": f"Error executing tool {call['name']}: {str(e)}"}
+
+        return list(await asyncio.gather(*(run(call) for call in function_calls)))
+
+    @staticmethod
+    def _function_responses(
+        function_calls: List[Dict[str, Any]], results: List[Any]
+    ) -> Tuple[List[Dict[str, Any]], List[generative_models.Part]]:
+        """Pair calls with their results and build the function-response parts."""
+        records = []
+        parts = []
+        for call, result in zip(function_calls, results, strict=True):
+            result = _to_jsonable(result)
+            records.append({**call, "result": result})
+            parts.append(
+                generative_models.Part.from_function_response(
+                    name=call["name"], response={"result": result}
+                )
+            )
+        return records, parts
+
+    @staticmethod
+    def _generation_config(
+        temperature: Optional[float], max_tokens: Optional[int]
+    ) -> generative_models.GenerationConfig:
+        """Build the generation config, falling back to the configured defaults."""
+        return generative_models.GenerationConfig(
+            temperature=temperature if temperature is not None else settings.default_temperature,
+            max_output_tokens=max_tokens or settings.max_output_tokens,
+        )
+
+    def _start_chat(
+        self,
+        messages: List[Message],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        model_name: str,
+        context: Optional[str] = None,
+    ) -> Tuple[generative_models.ChatSession, Any, generative_models.GenerationConfig]:
+        """Start a chat on the history and return it with the last turn and generation config."""
+        # Fit the history into the token budget, then convert messages
+        contents = self._convert_messages_to_contents(get_history_manager().compact(messages))
+
+        # Start chat session
+        chat = self.models.get(model_name).start_chat(
+            history=contents[:-1] if len(contents) > 1 else []
+        )
+        content = self._with_context(list(contents[-1].parts) if contents else [], context)
+        return chat, content, self._generation_config(temperature, max_tokens)
+
+    @staticmethod
+    def _with_context(parts: List[Any], context: Optional[str]) -> List[Any]:
+        """Send ``context`` as a text part ahead of the user's message."""
+        if not context:
+            return parts
+        return [generative_models.Part.from_text(context), *parts]
+
+    async def _send(
+        self,
+        chat: generative_models.ChatSession,
+        content: Any,
+        generation_config: generative_models.GenerationConfig,
+        model_name: str,
+        hedge: bool,
+    ) -> Tuple[generative_models.ChatSession, Any, str]:
+        """
+        Send one message under the resilience policy.
+
+        A hedged request runs on a new chat for the hedge model with the same
+        history; when it wins, the conversation continues on that chat.
+
+        Returns:
+            Tuple of (chat that answered, model response, model that answered)
+        """
+
+        async def send_on(target: generative_models.ChatSession) -> Tuple[Any, Any]:
+            response = await target.send_message_async(content, generation_config=generation_config)
+            return target, response
+
+        def send_hedged(hedge_model: str) -> Awaitable[Tuple[Any, Any]]:
+            hedge_chat = self.models.get(hedge_model).start_chat(history=list(chat.history))
+            return send_on(hedge_chat)
+
+        (chat, response), model_name = await get_resilience_policy().call(
+            model_name, lambda: send_on(chat), send_hedged if hedge else None
+        )
+        get_metrics().record_usage(model_name, response)
+        return chat, response, model_name
+
+    async def _open_stream(
+        self,
+        chat: generative_models.ChatSession,
+        content: Any,
+        generation_config: generative_models.GenerationConfig,
+        model_name: str,
+    ) -> Tuple[Any, AsyncIterator[Any]]:
+        """
+        Open a streamed response under the resilience policy.
+
+        Opening the stream and waiting for its first chunk share one attempt's
+        deadline and are retried like any other call (streams are not hedged).
+        Their latency is recorded as the time to the first chunk.
+
+        Returns:
+            Tuple of (first chunk or None for an empty stream, remaining chunks)
+        """
+
+        async def open_stream() -> Tuple[Any, AsyncIterator[Any]]:
+            stream = await chat.send_message_async(
+                content, generation_config=generation_config, stream=True
+            )
+            chunks = aiter(stream)
+            return await anext(chunks, None), chunks
+
+        (first, chunks), _ = await get_resilience_policy().call(model_name, open_stream)
+        return first, chunks
+
+    async def _send_with_tools(
+        self,
+        chat: generative_models.ChatSession,
+        content: Any,
+        generation_config: generative_models.GenerationConfig,
+        tool_executor: Optional[ToolExecutor],
+        max_tool_iterations: int,
+        model_name: str,
+        hedge: bool = True,
+    ) -> Tuple[str, List[Dict[str, Any]], str]:
+        """
+        Send a message and run the function-calling loop until the model answers.
+
+        Function calls of each turn are executed concurrently and their results
+        are sent back as function-response parts in a single follow-up request.
+
+        Returns:
+            Tuple of (final response text, executed tool calls with results, model used)
+        """
+        chat, response, model_name = await self._send(
+            chat, content, generation_config, model_name, hedge
+        )
+        response_text, function_calls = self._extract_response(response)
+        tool_calls: List[Dict[str, Any]] = []
+
+        for _ in range(max_tool_iterations):
+            if not function_calls or tool_executor is None:
+                break
+
+            results = await self._execute_tool_calls(function_calls, tool_executor)
+            records, parts = self._function_responses(function_calls, results)
+            tool_calls.extend(records)
+
+            chat, response, model_name = await self._send(
+                chat, parts, generation_config, model_name, hedge
+            )
+            response_text, function_calls = self._extract_response(response)
+
+        # Calls left unexecuted (no executor or iteration cap reached) are still reported
+        tool_calls.extend(function_calls)
+        return response_text, tool_calls, model_name
+
     async def generate_response(
         self,
         messages: List[Message],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        max_tool_iterations: Optional[int] = None,
+        model: Optional[str] = None,
+        context: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Generate a response using Gemini model.
 
+        When ``tool_executor`` is given, function calls requested by the model are
+        executed server-side and fed back until the model produces a final answer
+        (up to ``max_tool_iterations`` rounds).
+
         Args:
             messages: Conversation history
             temperature: Temperature for generation
             max_tokens: Maximum output tokens
+            tool_executor: Async callable ``(tool_name, arguments) -> result``
+            max_tool_iterations: Max function-calling rounds (default from settings)
+            model: Model name to use (default from settings)
+            context: Extra context sent ahead of the latest user message (e.g. a
+                digest of the stored datasets)
 
         Returns:
             Dictionary with response and metadata
         """
-        # Convert messages
-        contents = self._convert_messages_to_contents(messages)
+        model_name = model or self.model_name
+        chat, content, generation_config = self._start_chat(
+            messages, temperature, max_tokens, model_name, context
+        )
 
-        # Configure generation
-        generation_config = generative_models.GenerationConfig(
-            temperature=temperature or settings.default_temperature,
-            max_output_tokens=max_tokens or settings.max_output_tokens,
+        # Generate response, running any requested tools
+        response_text, tool_calls, model_name = await self._send_with_tools(
+            chat,
+            content,
+            generation_config,
+            tool_executor,
+            max_tool_iterations
+            if max_tool_iterations is not None
+            else settings.max_tool_iterations,
+            model_name,
         )
 
-        # Start chat session
-        chat = self.model.start_chat(history=contents[:-1] if len(contents) > 1 else [])
+        return {
+            "response": response_text,
+            "tool_calls": tool_calls if tool_calls else None,
+            "model_used": model_name,
+        }
 
-        # Generate response
-        response = await chat.send_message_async(
-            contents[-1].parts if contents else [],
-            generation_config=generation_config,
-        )
+    def start_session(self, model: Optional[str] = None) -> generative_models.ChatSession:
+        """
+        Start an empty chat session that keeps its own history across turns.
 
-        # Extract response text and function calls
-        response_text = response.text if hasattr(response, "text") else ""
-        tool_calls = []
+        Args:
+            model: Model name to use (default from settings)
 
-        # Check for function calls
-        if response.candidates and len(response.candidates) > 0:
-            candidate = response.candidates[0]
-            if hasattr(candidate, "content") and candidate.content.parts:
-                for part in candidate.content.parts:
-                    if hasattr(part, "function_call") and part.function_call:
-                        fc = part.function_call
-                        tool_calls.append(
-                            {"name": fc.name, "arguments": dict(fc.args) if fc.args else {}}
-                        )
+        Returns:
+            Live chat session
+        """
+        return self.models.get(model or self.model_name).start_chat(history=[])
+
+    async def send_session_message(
+        self,
+        chat: generative_models.ChatSession,
+        model_name: str,
+        content: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        max_tool_iterations: Optional[int] = None,
+        context: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send one user turn on a live chat session.
 
+        Only the new message is converted; earlier turns are already held by the
+        session as Vertex AI contents. Requests are not hedged so the session
+        stays on its model.
+
+        Args:
+            chat: Session from ``start_session``
+            model_name: Model the session was started with
+            content: New user message
+            temperature: Temperature for generation
+            max_tokens: Maximum output tokens
+            tool_executor: Async callable ``(tool_name, arguments) -> result``
+            max_tool_iterations: Max function-calling rounds (default from settings)
+            context: Extra context sent ahead of the message (it stays in the
+                session history, so only send it when it changed)
+
+        The turn is dropped from the session history if it fails or ends on a
+        function call that was never answered (e.g. the iteration cap was
+        reached): Gemini rejects every later turn on a history like that.
+
+        Returns:
+            Dictionary with response, executed tool calls and whether the turn
+            was kept in the session history
+        """
+        history = list(chat.history)
+        try:
+            response_text, tool_calls, _ = await self._send_with_tools(
+                chat,
+                self._with_context([generative_models.Part.from_text(content)], context),
+                self._generation_config(temperature, max_tokens),
+                tool_executor,
+                max_tool_iterations
+                if max_tool_iterations is not None
+                else settings.max_tool_iterations,
+                model_name,
+                hedge=False,
+            )
+        except BaseException:
+            chat.history[:] = history
+            raise
+
+        kept = all("result" in call for call in tool_calls)
+        if not kept:
+            chat.history[:] = history
         return {
             "response": response_text,
             "tool_calls": tool_calls if tool_calls else None,
-            "model_used": self.model_name,
+            "kept_in_history": kept,
+        }
+
+    async def stream_response(
+        self,
+        messages: List[Message],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        tool_executor: Optional[ToolExecutor] = None,
+        max_tool_iterations: Optional[int] = None,
+        model: Optional[str] = None,
+        context: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response using the model's streaming mode.
+
+        Yields events as they become available:
+        ``delta`` (text chunk), ``tool_call`` (requested function),
+        ``tool_result`` (executed function result) and a final ``done`` event.
+
+        Args:
+            messages: Conversation history
+            temperature: Temperature for generation
+            max_tokens: Maximum output tokens
+            tool_executor: Async callable ``(tool_name, arguments) -> result``
+            max_tool_iterations: Max function-calling rounds (default from settings)
+            model: Model name to use (default from settings)
+            context: Extra context sent ahead of the latest user message (e.g. a
+                digest of the stored datasets)
+
+        Yields:
+            Dictionaries with ``event`` name and ``data`` payload
+        """
+        if max_tool_iterations is None:
+            max_tool_iterations = settings.max_tool_iterations
+        model_name = model or self.model_name
+        chat, content, generation_config = self._start_chat(
+            messages, temperature, max_tokens, model_name, context
+        )
+        tool_calls: List[Dict[str, Any]] = []
+
+        for iteration in range(max_tool_iterations + 1):
+            function_calls: List[Dict[str, Any]] = []
+            chunk, stream = await self._open_stream(chat, content, generation_config, model_name)
+            last = chunk
+            while chunk is not None:
+                text, calls = self._extract_response(chunk)
+                if text:
+                    yield {"event": "delta", "data": {"text": text}}
+                for call in calls:
+                    function_calls.append(call)
+                    yield {"event": "tool_call", "data": call}
+                last = chunk
+                chunk = await anext(stream, None)
+            # Usage metadata comes with the final chunk
+            get_metrics().record_usage(model_name, last)
+
+            if not function_calls or tool_executor is None or iteration == max_tool_iterations:
+                tool_calls.extend(function_calls)
+                break
+
+            results = await self._execute_tool_calls(function_calls, tool_executor)
+            records, content = self._function_responses(function_calls, results)
+            for record in records:
+                tool_calls.append(record)
+                yield {
+                    "event": "tool_result",
+                    "data": {"name": record["name"], "result": record["result"]},
+                }
+
+        yield {
+            "event": "done",
+            "data": {"model_used": model_name, "tool_calls": tool_calls or None},
         }
 
 
@@ -1,5 +1,6 @@
 """Tools package."""
 
+from backend.tools.dataset_store import DatasetStore
 from backend.tools.financial_tools import FinancialTools, financial_tools
 
-__all__ = ["financial_tools", "FinancialTools"]
+__all__ = ["financial_tools", "FinancialTools", "DatasetStore"]
@@ -0,0 +1,305 @@
+"""Memory-budgeted dataset store with LRU eviction and disk spill.
+
+Datasets are kept in memory while they fit in the configured budget. When the
+budget is exceeded, the least recently used datasets are spilled to local Arrow
+IPC files and dropped from memory; they are memory-mapped back on next access.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, MutableMapping, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Object columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+# Integers are never narrowed below this, so arithmetic on stored frames cannot wrap
+MIN_INTEGER_DTYPE = np.dtype("int32")
+
+
+def _compact_numeric(series: pd.Series) -> pd.Series:
+    """
+    Shrink a numeric column without changing its values or its kind.
+
+    Integers become int32 when every value fits, and floats become float32
+    when that is lossless. Floats never become integers, and integers are not
+    narrowed below int32, so sums and differences of stored columns behave as
+    in the original frame.
+    """
+    if pd.api.types.is_signed_integer_dtype(series):
+        if series.dtype.itemsize > MIN_INTEGER_DTYPE.itemsize:
+            info = np.iinfo(MIN_INTEGER_DTYPE)
+            if series.empty or (series.min() >= info.min and series.max() <= info.max):
+                return series.astype(MIN_INTEGER_DTYPE)
+        return series
+    if not pd.api.types.is_float_dtype(series) or series.dtype.itemsize <= 4:
+        return series
+
+    values = series.to_numpy()
+    as_float32 = series.astype("float32")
+    if np.array_equal(as_float32.to_numpy().astype(series.dtype), values, equal_nan=True):
+        return as_float32
+    return series
+
+
+def _compact_object(name: str, series: pd.Series) -> pd.Series:
+    """Parse date columns and turn repeated strings into categoricals."""
+    non_null = series.notna().sum()
+    if non_null == 0:
+        return series
+
+    if "fecha" in str(name).lower():
+        for fmt in ("ISO8601", "mixed"):
+            try:
+                parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+            except (TypeError, ValueError):
+                continue
+            if parsed.notna().sum() == non_null:
+                return parsed
+
+    # Only scalar string columns become categoricals (lists, dicts and arrays are unhashable)
+    if not series.dropna().map(lambda value: isinstance(value, str)).all():
+        return series
+    if series.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+        return series.astype("category")
+    return series
+
+
+def compact_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink a DataFrame's memory footprint without changing its values.
+
+    64-bit integers become int32 and floats become float32 only when that is
+    lossless, ``fecha`` columns are parsed as datetimes and low-cardinality
+    string columns become categoricals. Other columns are left as they are.
+
+    Args:
+        df: DataFrame to compact
+
+    Returns:
+        Compacted DataFrame (a new frame; the input is not modified)
+    """
+    if df.columns.empty:
+        return df.copy()
+
+    # Columns are taken by position: Arrow and Parquet files may repeat a column name
+    compacted = []
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if pd.api.types.is_bool_dtype(series):
+            compacted.append(series)
+        elif pd.api.types.is_numeric_dtype(series):
+            compacted.append(_compact_numeric(series))
+        elif pd.api.types.is_object_dtype(series):
+            compacted.append(_compact_object(name, series))
+        else:
+            compacted.append(series)
+    result = pd.concat(compacted, axis=1)
+    result.columns = df.columns
+    return result
+
+
+class DatasetStore(MutableMapping[str, pd.DataFrame]):
+    """Dict-like store of DataFrames bounded by a memory budget."""
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None, spill_dir: Optional[str] = None):
+        """
+        Initialize dataset store.
+
+        Args:
+            memory_budget_bytes: Max bytes of resident datasets (None for unbounded)
+            spill_dir: Parent of the store's private spill directory (default: the
+                system temp dir); stores sharing it never share spill files
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self._spill_parent = spill_dir
+        self._spill_dir: Optional[str] = None
+
+        self._resident: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._spill_paths: Dict[str, str] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # MutableMapping interface
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        with self._lock:
+            if name in self._resident:
+                self.hits += 1
+                self._resident.move_to_end(name)
+                return self._resident[name]
+            if name not in self._spill_paths:
+                raise KeyError(name)
+
+            self.misses += 1
+            df = self._load(self._spill_paths[name])
+            self._resident[name] = df
+            self._sizes[name] = self._memory_usage(df)
+            self._enforce_budget(keep=name)
+            return df
+
+    def __setitem__(self, name: str, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._discard(name)
+            self._versions[name] = self._versions.get(name, 0) + 1
+            self._resident[name] = df
+            self._sizes[name] = self._memory_usage(df)
+            self._enforce_budget(keep=name)
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            if name not in self:
+                raise KeyError(name)
+            self._discard(name)
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def __contains__(self, name: object) -> bool:
+        # Overridden so membership checks never load a spilled dataset
+        with self._lock:
+            return name in self._resident or name in self._spill_paths
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            names = list(self._resident)
+            names += [name for name in self._spill_paths if name not in self._resident]
+        return iter(names)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(set(self._resident) | set(self._spill_paths))
+
+    # Versions
+
+    def version(self, name: str) -> int:
+        """
+        Get the content version of a dataset.
+
+        The version increases every time the dataset is stored or deleted, so
+        it can key caches derived from the dataset's content.
+
+        Args:
+            name: Dataset name
+
+        Returns:
+            Version number (0 if the dataset was never stored)
+        """
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def versions(self) -> Dict[str, int]:
+        """
+        Get the content version of every dataset ever stored.
+
+        Returns:
+            Dictionary of dataset name to version number
+        """
+        with self._lock:
+            return dict(self._versions)
+
+    # Stats
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes used by datasets currently resident in memory."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store size and cache statistics.
+
+        Returns:
+            Dictionary with dataset counts, memory usage and hit/miss counters
+        """
+        with self._lock:
+            return {
+                "datasets": len(self),
+                "in_memory": len(self._resident),
+                "spilled": len([n for n in self._spill_paths if n not in self._resident]),
+                "memory_bytes": self.memory_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # Internals
+
+    @staticmethod
+    def _memory_usage(df: pd.DataFrame) -> int:
+        return int(df.memory_usage(deep=True).sum())
+
+    def _discard(self, name: str) -> None:
+        self._resident.pop(name, None)
+        self._sizes.pop(name, None)
+        path = self._spill_paths.pop(name, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    def _enforce_budget(self, keep: str) -> None:
+        """Evict least recently used datasets until the budget is met (never ``keep``)."""
+        if self.memory_budget_bytes is None:
+            return
+        for name in list(self._resident):
+            if self.memory_bytes <= self.memory_budget_bytes:
+                break
+            if name == keep:
+                continue
+            if name not in self._spill_paths:
+                path = self._spill(name, self._resident[name])
+                if path is None:
+                    continue
+                self._spill_paths[name] = path
+            del self._resident[name]
+            del self._sizes[name]
+            self.evictions += 1
+
+    def _spill_path(self, name: str) -> str:
+        if self._spill_dir is None:
+            # Private per store, so workers sharing the configured directory never collide
+            if self._spill_parent is not None:
+                os.makedirs(self._spill_parent, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="datasets-", dir=self._spill_parent)
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return os.path.join(self._spill_dir, f"{digest}.arrow")
+
+    def _spill(self, name: str, df: pd.DataFrame) -> Optional[str]:
+        """Write a dataset to an Arrow IPC file; returns None if it cannot be spilled."""
+        path = self._spill_path(name)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        except (pa.ArrowException, OSError) as e:
+            # Mixed-type object columns cannot be represented in Arrow; keep them resident
+            logger.warning(f"Could not spill dataset '{name}' to disk: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+        logger.debug(f"Spilled dataset '{name}' to {path}")
+        return path
+
+    @staticmethod
+    def _load(path: str) -> pd.DataFrame:
+        """Memory-map a spilled Arrow IPC file back into a DataFrame."""
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas()
@@ -1,31 +1,479 @@
 """Financial analysis tools for the AI assistant."""
 
-from typing import Any, Dict, List, Optional
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+from backend.config import settings
+from backend.services.executor import get_executor
+from backend.tools.dataset_store import DatasetStore, compact_dataframe
+from backend.tools.ingest import detect_format, read_file
+
+_RATIO_COLUMNS = {
+    "liquidez_corriente",
+    "prueba_acida",
+    "razon_endeudamiento",
+    "deuda_patrimonio",
+    "margen_neto",
+    "roa",
+    "roe",
+}
+
+# Handles are lowercase identifiers so the model can repeat them verbatim
+_HANDLE_INVALID = re.compile(r"[^0-9a-z_]+")
+
+
+def dataset_handle(name: Optional[str], default: str = "uploaded") -> str:
+    """
+    Turn a file or dataset name into a dataset handle.
+
+    Args:
+        name: File name (its extension is dropped) or requested dataset name
+        default: Handle used when nothing usable is left
+
+    Returns:
+        Lowercase handle made of letters, digits and underscores
+    """
+    stem = os.path.splitext(os.path.basename(name or ""))[0]
+    return _HANDLE_INVALID.sub("_", stem.lower()).strip("_") or default
+
+
+def _json_number(value: Any) -> Optional[float]:
+    """Round a statistic for display, mapping NaN to None."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def _digest_column(column: Dict[str, Any]) -> str:
+    """One column of a dataset description as ``name (dtype; min, max, mean)``."""
+    detail = column["dtype"]
+    if column.get("mean") is not None:
+        detail += f"; min {column['min']:g}, max {column['max']:g}, media {column['mean']:g}"
+    return f"{column['name']} ({detail})"
+
+
+# Risk thresholds in evaluation order. Within a ratio the first matching rule wins,
+# mirroring an if/elif chain: (ratio, category, severity, condition, message, recommendation)
+_RISK_RULES: List[Tuple[str, str, str, Callable[[np.ndarray], np.ndarray], str, str]] = [
+    (
+        "liquidez_corriente",
+        "liquidez",
+        "high",
+        lambda v: v < 1.0,
+        "Razón corriente baja ({value:.2f}). La empresa puede tener dificultades para cumplir obligaciones de corto plazo.",
+        "Evaluar opciones para mejorar liquidez: reducir gastos, acelerar cobranza, o conseguir financiamiento.",
+    ),
+    (
+        "liquidez_corriente",
+        "liquidez",
+        "medium",
+        lambda v: v < 1.5,
+        "Razón corriente moderada ({value:.2f}). Monitorear de cerca.",
+        "Mantener un colchón de liquidez adecuado.",
+    ),
+    (
+        "razon_endeudamiento",
+        "endeudamiento",
+        "high",
+        lambda v: v > 0.7,
+        "Nivel de endeudamiento alto ({value:.2%}). La empresa está altamente apalancada.",
+        "Considerar reducir deuda o aumentar capital propio.",
+    ),
+    (
+        "razon_endeudamiento",
+        "endeudamiento",
+        "medium",
+        lambda v: v > 0.5,
+        "Nivel de endeudamiento moderado-alto ({value:.2%}).",
+        "Monitorear capacidad de servicio de deuda.",
+    ),
+    (
+        "margen_neto",
+        "rentabilidad",
+        "critical",
+        lambda v: v < 0,
+        "Margen neto negativo ({value:.2f}%). La empresa está operando con pérdidas.",
+        "Analizar estructura de costos y buscar eficiencias operativas urgentemente.",
+    ),
+    (
+        "margen_neto",
+        "rentabilidad",
+        "medium",
+        lambda v: v < 5,
+        "Margen neto bajo ({value:.2f}%). Rentabilidad limitada.",
+        "Buscar oportunidades para mejorar márgenes o reducir costos.",
+    ),
+]
+_ALERT_RATIOS = {rule[0] for rule in _RISK_RULES}
+
+
+def _safe_ratio(numerator: pd.Series, denominator: pd.Series, scale: float = 1.0) -> pd.Series:
+    """Element-wise ratio that yields NaN wherever the denominator is not positive."""
+    return ((numerator / denominator) * scale).where(denominator > 0)
+
+
+def _dcf_valuations(
+    flujo_caja_actual: float, g: np.ndarray, r: np.ndarray, horizons: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized DCF present values for broadcastable growth/discount rate arrays.
+
+    Mirrors ``simple_dcf_projection``: flows grow at ``g`` and are discounted at
+    ``r`` for each period, plus a perpetuity terminal value only where ``r > g``.
+
+    Returns:
+        Tuple of (present value of flows, present value of terminal value), each
+        with shape ``broadcast(g, r).shape + horizons.shape``
+    """
+    g = np.asarray(g, dtype="float64")[..., np.newaxis]
+    r = np.asarray(r, dtype="float64")[..., np.newaxis]
+    steps = np.arange(int(horizons.max()) + 1)
+
+    growth = (1 + g) ** steps
+    discount = (1 + r) ** steps
+    present_values = flujo_caja_actual * growth / discount
+    present_values[..., 0] = 0.0
+    vp_flujos = np.cumsum(present_values, axis=-1)[..., horizons]
+
+    growth_n = growth[..., horizons]
+    discount_n = discount[..., horizons]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valor_terminal = flujo_caja_actual * growth_n * (1 + g) / (r - g)
+    vp_terminal = np.where(r > g, valor_terminal / discount_n, 0.0)
+    return vp_flujos, vp_terminal
+
+
+def _draw_rates(
+    rng: np.random.Generator, spec: Union[float, Dict[str, Any]], size: int
+) -> np.ndarray:
+    """
+    Draw percentage rates from a distribution spec and return them as fractions.
+
+    A plain number means a fixed rate. Dict specs use ``distribution`` plus:
+    ``normal`` (mean, std, optional low/high clipping), ``uniform`` (low, high)
+    or ``triangular`` (low, mode, high).
+    """
+    if not isinstance(spec, dict):
+        return np.full(size, float(spec) / 100)
+
+    distribution = spec.get("distribution", "normal")
+    if distribution == "fixed":
+        rates = np.full(size, float(spec["mean"]))
+    elif distribution == "normal":
+        rates = rng.normal(spec["mean"], spec.get("std", 0.0), size)
+        if "low" in spec or "high" in spec:
+            rates = np.clip(rates, spec.get("low"), spec.get("high"))
+    elif distribution == "uniform":
+        rates = rng.uniform(spec["low"], spec["high"], size)
+    elif distribution == "triangular":
+        rates = rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    else:
+        raise ValueError(f"Unsupported distribution '{distribution}'")
+    return rates / 100
+
+
+# Equal-mass buckets summarizing the valuations of a Monte Carlo chunk or run
+SKETCH_BUCKETS = 2048
+
+# Per-chunk summary: (count, mean, sum of squared deviations, min, max, bucket means, weights)
+ChunkSummary = Tuple[int, float, float, float, float, np.ndarray, np.ndarray]
+
+
+def _sketch(values: np.ndarray, buckets: int = SKETCH_BUCKETS) -> Tuple[np.ndarray, np.ndarray]:
+    """Compress values into the means and sizes of at most ``buckets`` equal-mass buckets."""
+    ordered = np.sort(values)
+    edges = np.linspace(0, len(ordered), min(buckets, len(ordered)) + 1).round().astype(int)
+    weights = np.diff(edges).astype("float64")
+    return np.add.reduceat(ordered, edges[:-1]) / weights, weights
+
+
+def _merge_sketches(
+    left: Tuple[np.ndarray, np.ndarray],
+    right: Tuple[np.ndarray, np.ndarray],
+    buckets: int = SKETCH_BUCKETS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge two bucket sketches and re-compress them to at most ``buckets`` buckets."""
+    means = np.concatenate([left[0], right[0]])
+    weights = np.concatenate([left[1], right[1]])
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+    if len(means) <= buckets:
+        return means, weights
+
+    # Group neighbouring buckets by where their center falls on an equal-mass grid
+    cumulative = np.cumsum(weights)
+    target = ((cumulative - weights / 2) / cumulative[-1] * buckets).astype(int)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(target)) + 1])
+    merged_weights = np.add.reduceat(weights, starts)
+    return np.add.reduceat(means * weights, starts) / merged_weights, merged_weights
+
+
+def _sketch_percentile(
+    means: np.ndarray, weights: np.ndarray, minimum: float, maximum: float, q: float
+) -> float:
+    """Percentile ``q`` interpolated between bucket centers (and the exact min/max)."""
+    cumulative = np.cumsum(weights)
+    centers = cumulative - weights / 2
+    positions = np.concatenate([[0.0], centers, [cumulative[-1]]])
+    values = np.concatenate([[minimum], means, [maximum]])
+    return float(np.interp(q / 100 * cumulative[-1], positions, values))
+
+
+def _sketch_tail_mean(means: np.ndarray, weights: np.ndarray, q: float) -> float:
+    """Mean of the lowest ``q`` percent of the values (exact on bucket boundaries)."""
+    mass = q / 100 * weights.sum()
+    taken = np.clip(mass - (np.cumsum(weights) - weights), 0.0, weights)
+    return float((means * taken).sum() / taken.sum())
+
+
+def _simulate_dcf_chunk(
+    seed: np.random.SeedSequence,
+    paths: int,
+    flujo_caja_actual: float,
+    tasa_crecimiento: Union[float, Dict[str, Any]],
+    tasa_descuento: Union[float, Dict[str, Any]],
+    periodos: int,
+) -> ChunkSummary:
+    """Simulate one chunk of DCF paths and summarize their valuations in fixed size."""
+    rng = np.random.default_rng(seed)
+    g = _draw_rates(rng, tasa_crecimiento, paths)
+    r = _draw_rates(rng, tasa_descuento, paths)
+    vp_flujos, vp_terminal = _dcf_valuations(flujo_caja_actual, g, r, np.array([periodos]))
+    valuations = (vp_flujos + vp_terminal)[:, 0]
+    mean = float(valuations.mean())
+    means, weights = _sketch(valuations)
+    return (
+        paths,
+        mean,
+        float(((valuations - mean) ** 2).sum()),
+        float(valuations.min()),
+        float(valuations.max()),
+        means,
+        weights,
+    )
+
+
+def _merge_chunk_summaries(left: ChunkSummary, right: ChunkSummary) -> ChunkSummary:
+    """Combine two chunk summaries (parallel mean/variance update plus sketch merge)."""
+    n_a, mean_a, m2_a, min_a, max_a = left[:5]
+    n_b, mean_b, m2_b, min_b, max_b = right[:5]
+    count = n_a + n_b
+    delta = mean_b - mean_a
+    means, weights = _merge_sketches(left[5:], right[5:])
+    return (
+        count,
+        mean_a + delta * n_b / count,
+        m2_a + m2_b + delta**2 * n_a * n_b / count,
+        min(min_a, min_b),
+        max(max_a, max_b),
+        means,
+        weights,
+    )
+
+
+def _table_to_frame(table: Union[pd.DataFrame, Dict[str, Any]]) -> pd.DataFrame:
+    """Build a DataFrame from a DataFrame, a columnar dict, or a ``{"columns", "rows"}`` table."""
+    if isinstance(table, pd.DataFrame):
+        return table.reset_index(drop=True)
+    if "columns" in table and "rows" in table:
+        return pd.DataFrame(table["rows"], columns=table["columns"])
+    return pd.DataFrame(dict(table))
+
+
+def _frame_to_table(df: pd.DataFrame) -> Dict[str, Any]:
+    """Convert a DataFrame into a compact ``{"columns", "rows"}`` table with NaN as None."""
+    values = df.astype(object).where(df.notna(), None)
+    return {"columns": [str(c) for c in df.columns], "rows": values.values.tolist()}
 
 
 class FinancialTools:
     """Collection of financial analysis tools exposed to the AI model."""
 
-    def __init__(self):
-        """Initialize financial tools."""
-        self.data_store: Dict[str, pd.DataFrame] = {}
+    def __init__(self, data_store: Optional[DatasetStore] = None):
+        """
+        Initialize financial tools.
 
-    def store_financial_data(self, data: List[Dict[str, Any]], dataset_name: str = "main") -> str:
+        Args:
+            data_store: Dataset store to use (default: one configured from settings)
+        """
+        if data_store is None:
+            budget_mb = settings.dataset_memory_budget_mb
+            data_store = DatasetStore(
+                memory_budget_bytes=budget_mb * 1024 * 1024 if budget_mb > 0 else None,
+                spill_dir=settings.dataset_spill_dir,
+            )
+        self.data_store = data_store
+        # Dataset name -> (version, description)
+        self._descriptions: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def store_financial_data(
+        self,
+        data: Union[List[Dict[str, Any]], pd.DataFrame, pa.Table, str, os.PathLike],
+        dataset_name: str = "main",
+    ) -> str:
         """
         Store financial data for analysis.
 
         Args:
-            data: List of dictionaries containing financial data
+            data: List of dictionaries, a DataFrame, an Arrow table, or a path to a
+                CSV/Parquet/Arrow IPC/Feather file (columnar files are memory-mapped)
             dataset_name: Name to identify this dataset
 
         Returns:
             Confirmation message
         """
-        df = pd.DataFrame(data)
+        if isinstance(data, pd.DataFrame):
+            df = data
+        elif isinstance(data, pa.Table):
+            df = data.to_pandas()
+        elif isinstance(data, (str, os.PathLike)):
+            fmt = detect_format(os.fspath(data))
+            if fmt is None:
+                return f"Unsupported file format: {os.fspath(data)}"
+            df = read_file(data, fmt)
+        else:
+            df = pd.DataFrame(data)
+        stored = self.store_dataframe(df, dataset_name)
+        return (
+            f"Stored {stored['row_count']} rows of financial data as '{dataset_name}'. "
+            f"Columns: {stored['columns']}. "
+            f"Memory: {stored['memory_bytes_before']} -> {stored['memory_bytes_after']} bytes"
+        )
+
+    def store_dataframe(self, df: pd.DataFrame, dataset_name: str = "main") -> Dict[str, Any]:
+        """
+        Store an already parsed DataFrame for analysis, compacting its dtypes.
+
+        Args:
+            df: DataFrame containing financial data
+            dataset_name: Name to identify this dataset
+
+        Returns:
+            Summary with row count, columns and memory footprint before/after compaction
+        """
+        memory_before = int(df.memory_usage(deep=True).sum())
+        if settings.dataset_compact_dtypes:
+            df = compact_dataframe(df)
+        memory_after = int(df.memory_usage(deep=True).sum())
         self.data_store[dataset_name] = df
-        return f"Stored {len(df)} rows of financial data as '{dataset_name}'. Columns: {list(df.columns)}"
+        return {
+            "dataset": dataset_name,
+            "row_count": len(df),
+            "columns": [str(c) for c in df.columns],
+            "memory_bytes_before": memory_before,
+            "memory_bytes_after": memory_after,
+        }
+
+    def list_datasets(self) -> Dict[str, Any]:
+        """
+        List the stored datasets.
+
+        Returns:
+            Dictionary with the name, row count and columns of each dataset
+        """
+        datasets = []
+        for name in list(self.data_store):
+            description = self.describe_dataset(name, sample_rows=0)
+            if "error" not in description:
+                datasets.append(
+                    {
+                        "dataset": name,
+                        "row_count": description["row_count"],
+                        "columns": [column["name"] for column in description["columns"]],
+                    }
+                )
+        return {"datasets": datasets}
+
+    def describe_dataset(self, dataset_name: str = "main", sample_rows: int = 3) -> Dict[str, Any]:
+        """
+        Describe a stored dataset without returning its rows.
+
+        Descriptions are cached per dataset version, so repeated calls do not
+        rescan (or reload a spilled) dataset.
+
+        Args:
+            dataset_name: Name of the dataset to describe
+            sample_rows: Number of leading rows to include as a sample
+
+        Returns:
+            Dictionary with row count, per-column dtype, null count and numeric
+            min/max/mean, and sample rows
+        """
+        if dataset_name not in self.data_store:
+            return {
+                "error": f"Dataset '{dataset_name}' not found",
+                "available": sorted(self.data_store),
+            }
+
+        version = self.data_store.version(dataset_name)
+        cached = self._descriptions.get(dataset_name)
+        if cached is None or cached[0] != version:
+            cached = (version, self._describe(self.data_store[dataset_name]))
+            self._descriptions[dataset_name] = cached
+        description = cached[1]
+        return {
+            "dataset": dataset_name,
+            "row_count": description["row_count"],
+            "columns": description["columns"],
+            "sample": description["sample"][: max(0, sample_rows)],
+        }
+
+    @staticmethod
+    def _describe(df: pd.DataFrame, max_sample_rows: int = 10) -> Dict[str, Any]:
+        numeric = df.select_dtypes("number")
+        stats = numeric.agg(["min", "max", "mean"]) if not numeric.empty else None
+        nulls = df.isna().sum()
+        columns = []
+        for name in df.columns:
+            column: Dict[str, Any] = {
+                "name": str(name),
+                "dtype": str(df[name].dtype),
+                "nulls": int(nulls[name]),
+            }
+            if stats is not None and name in stats.columns:
+                column.update({key: _json_number(stats.at[key, name]) for key in stats.index})
+            columns.append(column)
+        sample = df.head(max_sample_rows)
+        return {
+            "row_count": len(df),
+            "columns": columns,
+            "sample": sample.astype(object).where(sample.notna(), None).to_dict("records"),
+        }
+
+    def datasets_digest(self, sample_rows: int = 3, max_datasets: int = 5) -> Optional[str]:
+        """
+        Compact text digest of the stored datasets for the model's prompt.
+
+        Args:
+            sample_rows: Sample rows shown per dataset
+            max_datasets: Datasets described in full (the rest are only named)
+
+        Returns:
+            Digest text, or None if no dataset is stored
+        """
+        names = list(self.data_store)
+        if not names:
+            return None
+        lines = [
+            "Datasets almacenados en el servidor (usa su nombre como dataset_name en las "
+            "herramientas; no copies sus filas en las llamadas):"
+        ]
+        for name in names[:max_datasets]:
+            description = self.describe_dataset(name, sample_rows)
+            if "error" in description:
+                continue
+            columns = ", ".join(_digest_column(column) for column in description["columns"])
+            lines.append(f"- {name}: {description['row_count']} filas; columnas: {columns}")
+            for row in description["sample"]:
+                lines.append(f"  {json.dumps(row, ensure_ascii=False, default=str)}")
+        if len(names) > max_datasets:
+            lines.append(f"- Otros: {', '.join(names[max_datasets:])} (usa describe_dataset)")
+        return "\n".join(lines)
 
     def calculate_liquidity_ratios(
         self,
@@ -127,6 +575,83 @@ class FinancialTools:
 
         return ratios
 
+    def calculate_ratios_table(
+        self,
+        dataset_name: str = "main",
+        period_column: str = "periodo",
+        entity_column: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Calculate every ratio for every row of a stored dataset in one pass.
+
+        Ratios are computed with column arithmetic using the same rules as the
+        scalar calculators: a non-positive denominator (or a missing input)
+        yields None. Only ratios whose input columns exist are included.
+
+        Args:
+            dataset_name: Name of the dataset to analyze
+            period_column: Column identifying the period of each row
+            entity_column: Column identifying the entity of each row (optional)
+
+        Returns:
+            Dictionary with a compact per-period table (columns + rows)
+        """
+        if dataset_name not in self.data_store:
+            return {"error": f"Dataset '{dataset_name}' not found"}
+
+        df = self.data_store[dataset_name]
+        if entity_column is not None and entity_column not in df.columns:
+            return {"error": f"Column '{entity_column}' not found in dataset"}
+
+        def col(name: str) -> Optional[pd.Series]:
+            if name not in df.columns:
+                return None
+            return pd.to_numeric(df[name], errors="coerce").astype("float64")
+
+        activos_corrientes = col("activos_corrientes")
+        pasivos_corrientes = col("pasivos_corrientes")
+        inventarios = col("inventarios")
+        pasivos_totales = col("pasivos_totales")
+        activos_totales = col("activos_totales")
+        patrimonio = col("patrimonio")
+        utilidad_neta = col("utilidad_neta")
+        ingresos = col("ingresos")
+
+        table = pd.DataFrame(index=df.index)
+        if entity_column is not None:
+            table[entity_column] = df[entity_column]
+        if period_column in df.columns:
+            table[period_column] = df[period_column]
+
+        # Liquidity
+        if activos_corrientes is not None and pasivos_corrientes is not None:
+            table["liquidez_corriente"] = _safe_ratio(activos_corrientes, pasivos_corrientes)
+            if inventarios is not None:
+                table["prueba_acida"] = _safe_ratio(
+                    activos_corrientes - inventarios, pasivos_corrientes
+                )
+
+        # Leverage
+        if pasivos_totales is not None:
+            if activos_totales is not None:
+                table["razon_endeudamiento"] = _safe_ratio(pasivos_totales, activos_totales)
+            if patrimonio is not None:
+                table["deuda_patrimonio"] = _safe_ratio(pasivos_totales, patrimonio)
+
+        # Profitability
+        if utilidad_neta is not None:
+            if ingresos is not None:
+                table["margen_neto"] = _safe_ratio(utilidad_neta, ingresos, 100)
+            if activos_totales is not None:
+                table["roa"] = _safe_ratio(utilidad_neta, activos_totales, 100)
+            if patrimonio is not None:
+                table["roe"] = _safe_ratio(utilidad_neta, patrimonio, 100)
+
+        result = _frame_to_table(table)
+        result["dataset"] = dataset_name
+        result["row_count"] = len(table)
+        return result
+
     def analyze_trend(self, dataset_name: str = "main", column: str = "ingresos") -> Dict[str, Any]:
         """
         Analyze trend for a specific column.
@@ -147,7 +672,7 @@ class FinancialTools:
             return {"error": f"Column '{column}' not found in dataset"}
 
         try:
-            values = pd.to_numeric(df[column], errors="coerce").dropna()
+            values = pd.to_numeric(df[column], errors="coerce").dropna().astype("float64")
             if len(values) < 2:
                 return {"error": "Not enough data points for trend analysis"}
 
@@ -225,82 +750,265 @@ class FinancialTools:
             "tasa_descuento": tasa_descuento,
         }
 
-    def generate_risk_alerts(self, ratios: Dict[str, float]) -> List[Dict[str, str]]:
+    def dcf_sensitivity_grid(
+        self,
+        flujo_caja_actual: float,
+        tasas_crecimiento: List[float],
+        tasas_descuento: List[float],
+        periodos: Union[int, List[int]] = 5,
+    ) -> Dict[str, Any]:
         """
-        Generate risk alerts based on financial ratios.
+        DCF sensitivity table over every growth/discount rate (and horizon) combination.
+
+        All valuations are computed in a single broadcast array operation with the
+        same per-period discounting and ``r > g`` terminal value guard as
+        ``simple_dcf_projection``.
 
         Args:
-            ratios: Dictionary of calculated ratios
+            flujo_caja_actual: Current cash flow
+            tasas_crecimiento: Growth rates (as percentages, e.g., 5 for 5%)
+            tasas_descuento: Discount rates (as percentages, e.g., 10 for 10%)
+            periodos: Number of periods to project, or a list of horizons
 
         Returns:
-            List of risk alerts
+            Dictionary with the valuation matrix indexed as [crecimiento][descuento],
+            or [periodo][crecimiento][descuento] when several horizons are given
         """
-        alerts = []
+        horizons = np.atleast_1d(np.asarray(periodos, dtype="int64"))
+        if len(tasas_crecimiento) == 0 or len(tasas_descuento) == 0 or horizons.size == 0:
+            return {"error": "At least one growth rate, discount rate and horizon are required"}
+        if horizons.min() < 0:
+            return {"error": "Number of periods must be non-negative"}
 
-        # Liquidity alerts
-        if "liquidez_corriente" in ratios and ratios["liquidez_corriente"] is not None:
-            if ratios["liquidez_corriente"] < 1.0:
-                alerts.append(
-                    {
-                        "severity": "high",
-                        "category": "liquidez",
-                        "message": f"Razón corriente baja ({ratios['liquidez_corriente']:.2f}). La empresa puede tener dificultades para cumplir obligaciones de corto plazo.",
-                        "recommendation": "Evaluar opciones para mejorar liquidez: reducir gastos, acelerar cobranza, o conseguir financiamiento.",
-                    }
-                )
-            elif ratios["liquidez_corriente"] < 1.5:
-                alerts.append(
-                    {
-                        "severity": "medium",
-                        "category": "liquidez",
-                        "message": f"Razón corriente moderada ({ratios['liquidez_corriente']:.2f}). Monitorear de cerca.",
-                        "recommendation": "Mantener un colchón de liquidez adecuado.",
-                    }
-                )
+        g = np.asarray(tasas_crecimiento, dtype="float64")[:, np.newaxis] / 100
+        r = np.asarray(tasas_descuento, dtype="float64")[np.newaxis, :] / 100
+        vp_flujos, vp_terminal = _dcf_valuations(flujo_caja_actual, g, r, horizons)
 
-        # Leverage alerts
-        if "razon_endeudamiento" in ratios and ratios["razon_endeudamiento"] is not None:
-            if ratios["razon_endeudamiento"] > 0.7:
-                alerts.append(
-                    {
-                        "severity": "high",
-                        "category": "endeudamiento",
-                        "message": f"Nivel de endeudamiento alto ({ratios['razon_endeudamiento']:.2%}). La empresa está altamente apalancada.",
-                        "recommendation": "Considerar reducir deuda o aumentar capital propio.",
-                    }
-                )
-            elif ratios["razon_endeudamiento"] > 0.5:
-                alerts.append(
-                    {
-                        "severity": "medium",
-                        "category": "endeudamiento",
-                        "message": f"Nivel de endeudamiento moderado-alto ({ratios['razon_endeudamiento']:.2%}).",
-                        "recommendation": "Monitorear capacidad de servicio de deuda.",
-                    }
-                )
+        # (crecimiento, descuento, periodo) -> (periodo, crecimiento, descuento)
+        valor_total = np.round(np.moveaxis(vp_flujos + vp_terminal, -1, 0), 2)
+        if np.ndim(periodos) == 0:
+            valor_total = valor_total[0]
 
-        # Profitability alerts
-        if "margen_neto" in ratios and ratios["margen_neto"] is not None:
-            if ratios["margen_neto"] < 0:
-                alerts.append(
-                    {
-                        "severity": "critical",
-                        "category": "rentabilidad",
-                        "message": f"Margen neto negativo ({ratios['margen_neto']:.2f}%). La empresa está operando con pérdidas.",
-                        "recommendation": "Analizar estructura de costos y buscar eficiencias operativas urgentemente.",
-                    }
-                )
-            elif ratios["margen_neto"] < 5:
-                alerts.append(
-                    {
-                        "severity": "medium",
-                        "category": "rentabilidad",
-                        "message": f"Margen neto bajo ({ratios['margen_neto']:.2f}%). Rentabilidad limitada.",
-                        "recommendation": "Buscar oportunidades para mejorar márgenes o reducir costos.",
-                    }
+        return {
+            "flujo_caja_actual": flujo_caja_actual,
+            "tasas_crecimiento": list(tasas_crecimiento),
+            "tasas_descuento": list(tasas_descuento),
+            "periodos": periodos,
+            "valor_total": valor_total.tolist(),
+        }
+
+    def monte_carlo_dcf(
+        self,
+        flujo_caja_actual: float,
+        tasa_crecimiento: Union[float, Dict[str, Any]],
+        tasa_descuento: Union[float, Dict[str, Any]],
+        periodos: int = 5,
+        simulaciones: int = 100_000,
+        confianza: float = 95.0,
+        seed: Optional[int] = None,
+        chunk_size: int = 100_000,
+        workers: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Stochastic DCF valuation (Monte Carlo) on top of the simple DCF model.
+
+        Growth and discount rates are drawn per path from the given distributions
+        and paths are valued in vectorized chunks of ``chunk_size``. Each chunk is
+        reduced to its mean, variance, extremes and a sketch of
+        ``SKETCH_BUCKETS`` equal-mass buckets. The chunks are merged into one
+        running summary, so peak memory depends on ``chunk_size`` and not on the
+        number of paths. The mean, deviation and extremes are exact. The
+        percentiles, VaR and CVaR are interpolated from the sketch. Each chunk
+        gets its own child seed, so results only depend on ``seed`` and not on
+        ``workers``.
+
+        Args:
+            flujo_caja_actual: Current cash flow
+            tasa_crecimiento: Growth rate in percent, or a distribution spec such as
+                {"distribution": "normal", "mean": 5, "std": 2}
+            tasa_descuento: Discount rate in percent, or a distribution spec
+            periodos: Number of periods to project
+            simulaciones: Number of simulated paths
+            confianza: Confidence level (percent) for VaR/CVaR
+            seed: Seed for reproducible results
+            chunk_size: Paths evaluated per vectorized batch
+            workers: Chunks in flight on the shared process pool (1 runs in-process;
+                without a configured process pool chunks also run in-process)
+
+        Returns:
+            Dictionary with valuation statistics, percentiles and VaR
+        """
+        if simulaciones < 1 or chunk_size < 1:
+            return {"error": "Number of simulations and chunk size must be positive"}
+        if periodos < 0:
+            return {"error": "Number of periods must be non-negative"}
+        if not 0 < confianza < 100:
+            return {"error": "Confidence level must be between 0 and 100"}
+
+        chunk_sizes = [chunk_size] * (simulaciones // chunk_size)
+        if simulaciones % chunk_size:
+            chunk_sizes.append(simulaciones % chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+        args = (
+            (chunk_seed, paths, flujo_caja_actual, tasa_crecimiento, tasa_descuento, periodos)
+            for chunk_seed, paths in zip(seeds, chunk_sizes, strict=True)
+        )
+
+        # Chunk summaries are merged in order as they arrive, so results do not depend
+        # on ``workers`` and only a fixed-size summary per in-flight chunk is held
+        summary: Optional[ChunkSummary] = None
+        try:
+            if workers > 1 and len(chunk_sizes) > 1:
+                summaries = get_executor().map_in_process(_simulate_dcf_chunk, args, window=workers)
+            else:
+                summaries = (_simulate_dcf_chunk(*chunk_args) for chunk_args in args)
+            for chunk in summaries:
+                summary = chunk if summary is None else _merge_chunk_summaries(summary, chunk)
+        except (KeyError, ValueError) as e:
+            return {"error": f"Invalid rate distribution: {str(e)}"}
+        assert summary is not None
+
+        count, mean, m2, minimum, maximum, means, weights = summary
+        percentile_levels = [5, 25, 50, 75, 95]
+        cutoff = _sketch_percentile(means, weights, minimum, maximum, 100 - confianza)
+        tail_mean = _sketch_tail_mean(means, weights, 100 - confianza)
+
+        return {
+            "simulaciones": simulaciones,
+            "periodos": periodos,
+            "valor_total": {
+                "media": round(mean, 2),
+                "desviacion": round(float(np.sqrt(m2 / count)), 2),
+                "minimo": round(minimum, 2),
+                "maximo": round(maximum, 2),
+                "percentiles": {
+                    f"p{level}": round(
+                        _sketch_percentile(means, weights, minimum, maximum, level), 2
+                    )
+                    for level in percentile_levels
+                },
+            },
+            "confianza": confianza,
+            "var": round(mean - cutoff, 2),
+            "cvar": round(mean - tail_mean, 2),
+        }
+
+    def generate_risk_alerts_batch(
+        self,
+        ratios_table: Union[pd.DataFrame, Dict[str, Any]],
+        severity: Optional[Union[str, List[str]]] = None,
+        category: Optional[Union[str, List[str]]] = None,
+        id_columns: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate risk alerts for every row of a ratio table at once.
+
+        Thresholds are evaluated as vectorized masks over each ratio column and
+        message text is only built for rows that trigger an alert.
+
+        Args:
+            ratios_table: DataFrame, columnar dict, or compact ``{"columns", "rows"}`` table
+            severity: Only keep alerts with this severity (or list of severities)
+            category: Only keep alerts with this category (or list of categories)
+            id_columns: Columns copied into each alert to identify the row
+                (default: every non-ratio column, e.g. periodo or empresa)
+
+        Returns:
+            Dictionary with a compact alert table (columns + rows)
+        """
+        df = _table_to_frame(ratios_table)
+        if id_columns is None:
+            id_columns = [c for c in df.columns if c not in _RATIO_COLUMNS]
+        missing = [c for c in id_columns if c not in df.columns]
+        if missing:
+            return {"error": f"Columns {missing} not found in ratio table"}
+
+        severities = {severity} if isinstance(severity, str) else set(severity or [])
+        categories = {category} if isinstance(category, str) else set(category or [])
+
+        values: Dict[str, np.ndarray] = {}
+        pending: Dict[str, np.ndarray] = {}
+        positions: List[np.ndarray] = []
+        rule_ids: List[np.ndarray] = []
+        for rule_id, (ratio_name, rule_category, rule_severity, condition, _, _) in enumerate(
+            _RISK_RULES
+        ):
+            if ratio_name not in df.columns:
+                continue
+            if ratio_name not in values:
+                values[ratio_name] = pd.to_numeric(df[ratio_name], errors="coerce").to_numpy(
+                    dtype="float64"
                 )
+                pending[ratio_name] = ~np.isnan(values[ratio_name])
+            mask = pending[ratio_name] & condition(values[ratio_name])
+            pending[ratio_name] &= ~mask
+            if severities and rule_severity not in severities:
+                continue
+            if categories and rule_category not in categories:
+                continue
+            hits = np.flatnonzero(mask)
+            positions.append(hits)
+            rule_ids.append(np.full(len(hits), rule_id))
+
+        columns = [
+            "row",
+            *id_columns,
+            "ratio",
+            "value",
+            "severity",
+            "category",
+            "message",
+            "recommendation",
+        ]
+        if not positions:
+            return {"columns": columns, "rows": [], "alert_count": 0}
+
+        all_positions = np.concatenate(positions)
+        all_rules = np.concatenate(rule_ids)
+        order = np.lexsort((all_rules, all_positions))
+
+        id_values = df[id_columns].astype(object).where(df[id_columns].notna(), None).values
+        rows = []
+        for pos, rule_id in zip(
+            all_positions[order].tolist(), all_rules[order].tolist(), strict=True
+        ):
+            ratio_name, rule_category, rule_severity, _, message, recommendation = _RISK_RULES[
+                rule_id
+            ]
+            value = float(values[ratio_name][pos])
+            rows.append(
+                [
+                    pos,
+                    *id_values[pos].tolist(),
+                    ratio_name,
+                    value,
+                    rule_severity,
+                    rule_category,
+                    message.format(value=value),
+                    recommendation,
+                ]
+            )
+
+        return {"columns": columns, "rows": rows, "alert_count": len(rows)}
+
+    def generate_risk_alerts(self, ratios: Dict[str, float]) -> List[Dict[str, str]]:
+        """
+        Generate risk alerts based on financial ratios.
+
+        Args:
+            ratios: Dictionary of calculated ratios
 
-        return alerts
+        Returns:
+            List of risk alerts
+        """
+        table = {
+            name: [value]
+            for name, value in ratios.items()
+            if name in _ALERT_RATIOS and value is not None
+        }
+        result = self.generate_risk_alerts_batch(table, id_columns=[])
+        keys = ("severity", "category", "message", "recommendation")
+        return [{key: row[result["columns"].index(key)] for key in keys} for row in result["rows"]]
 
 
 # Global instance
@@ -0,0 +1,124 @@
+"""Ingestion helpers that parse uploaded files straight into DataFrames."""
+
+import io
+import mmap
+import os
+from typing import BinaryIO, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# File extension -> ingestion format
+SUPPORTED_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+    ".feather": "feather",
+}
+
+Source = Union[BinaryIO, str, os.PathLike]
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """
+    Detect the ingestion format from a file name.
+
+    Args:
+        filename: Uploaded file name or path
+
+    Returns:
+        One of "csv", "parquet", "arrow", "feather", or None if unsupported
+    """
+    if not filename:
+        return None
+    return SUPPORTED_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def read_csv(source: BinaryIO, encoding: str = "utf-8") -> pd.DataFrame:
+    """
+    Parse a CSV file object into a DataFrame.
+
+    The parser pulls the file in buffered blocks and builds columns as it goes,
+    so the raw bytes are never held as one decoded string.
+
+    Args:
+        source: Binary file object positioned at the start of the CSV
+        encoding: Text encoding of the file
+
+    Returns:
+        Parsed DataFrame
+    """
+    return pd.read_csv(source, encoding=encoding)
+
+
+def _arrow_source(source: Source) -> pa.NativeFile:
+    """
+    Wrap a path or file object as an Arrow input, memory-mapping when possible.
+
+    Paths and on-disk file objects are memory-mapped so Arrow readers slice the
+    mapped pages instead of copying them into Python bytes. Sources reading from
+    the current position are assumed to start at the beginning of the file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(source), "r")
+
+    # Only objects backed by a real file descriptor can be mapped; BytesIO has none.
+    # An in-memory SpooledTemporaryFile is rolled over to disk by fileno().
+    try:
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+    else:
+        return pa.BufferReader(pa.py_buffer(mapped))
+    # No mappable descriptor (BytesIO, empty files): wrap the bytes directly
+    return pa.BufferReader(source.read())
+
+
+def read_arrow_table(source: Source, fmt: str) -> pa.Table:
+    """
+    Read a Parquet, Arrow IPC or Feather file without any text parsing.
+
+    Args:
+        source: Path or binary file object
+        fmt: One of "parquet", "arrow" or "feather"
+
+    Returns:
+        Arrow table
+    """
+    native = _arrow_source(source)
+    if fmt == "parquet":
+        return pq.read_table(native)
+    if fmt == "feather":
+        return feather.read_table(native)
+    if fmt == "arrow":
+        try:
+            return pa.ipc.open_file(native).read_all()
+        except pa.ArrowInvalid:
+            # Arrow IPC streaming format (no file footer)
+            native.seek(0)
+            return pa.ipc.open_stream(native).read_all()
+    raise ValueError(f"Unsupported format '{fmt}'")
+
+
+def read_file(source: Source, fmt: str) -> pd.DataFrame:
+    """
+    Load a CSV, Parquet, Arrow IPC or Feather file into a DataFrame.
+
+    Args:
+        source: Path or binary file object
+        fmt: Format returned by ``detect_format``
+
+    Returns:
+        Loaded DataFrame
+    """
+    if fmt == "csv":
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                return read_csv(f)
+        return read_csv(source)
+    # self_destruct releases Arrow buffers column by column during conversion
+    return read_arrow_table(source, fmt).to_pandas(split_blocks=True, self_destruct=True)
@@ -59,7 +59,7 @@ function App() {
   const handleUploadSuccess = (result) => {
     const uploadMessage = {
       role: 'assistant',
-      content: `✅ ${result.message}\n\nColumnas: ${result.data_summary.columns.join(', ')}\nFilas: ${result.data_summary.row_count}\n\n¿Qué análisis te gustaría realizar?`,
+      content: `✅ ${result.message}\n\nDataset: ${result.dataset}\nColumnas: ${result.data_summary.columns.join(', ')}\nFilas: ${result.data_summary.row_count}\n\n¿Qué análisis te gustaría realizar?`,
     };
     setMessages([...messages, uploadMessage]);
   };
@@ -1,8 +1,16 @@
 """Tests for API endpoints."""
 
+import asyncio
+import io
+
+import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
+from backend.api import routes
 from backend.main import app
+from backend.models.schemas import ChatRequest
+from backend.services.model_registry import ModelRegistry
+from backend.tools.financial_tools import financial_tools
 
 client = TestClient(app)
 
@@ -43,6 +51,322 @@ class TestChatEndpoint:
         assert response.status_code in [500, 422]  # Either credential error or validation
 
 
+class CountingService:
+    """Vertex AI service stand-in that counts generations."""
+
+    model_name = "gemini-test"
+    models = ModelRegistry(lambda name: None, allowed=["gemini-test", "gemini-1.5-flash"])
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_response(self, **kwargs):
+        self.calls += 1
+        return {"response": f"respuesta {self.calls}", "tool_calls": None, "model_used": "m"}
+
+
+class TestChatCache:
+    """Test the response cache in front of the chat endpoint."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Counting service and an empty cache."""
+        service = CountingService()
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: service)
+        routes.get_response_cache().clear()
+        return service
+
+    def test_deterministic_requests_are_cached(self, service):
+        """Test a repeated temperature-0 request is served from the cache."""
+        request_data = {"messages": [{"role": "user", "content": "Hola"}], "temperature": 0}
+        first = client.post("/api/chat", json=request_data).json()
+        second = client.post("/api/chat", json=request_data).json()
+
+        assert service.calls == 1
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["response"] == first["response"]
+
+    def test_bypass_and_nonzero_temperature_skip_cache(self, service):
+        """Test the bypass flag and sampling temperatures always call the model."""
+        messages = [{"role": "user", "content": "Hola"}]
+        client.post("/api/chat", json={"messages": messages, "temperature": 0})
+        client.post(
+            "/api/chat", json={"messages": messages, "temperature": 0, "bypass_cache": True}
+        )
+        client.post("/api/chat", json={"messages": messages, "temperature": 0.7})
+        client.post("/api/chat", json={"messages": messages, "temperature": 0.7})
+        assert service.calls == 4
+
+    def test_dataset_upload_invalidates_entries(self, service):
+        """Test storing a dataset changes the key of subsequent requests."""
+        request_data = {"messages": [{"role": "user", "content": "Resume"}], "temperature": 0}
+        client.post("/api/chat", json=request_data)
+        financial_tools.store_financial_data([{"ingresos": 1}], "cache_test")
+        response = client.post("/api/chat", json=request_data).json()
+
+        assert service.calls == 2
+        assert response["cached"] is False
+
+    def test_dataset_replaced_mid_generation_is_not_cached(self, service, monkeypatch):
+        """Test an answer generated while a dataset changed is not stored in the cache."""
+        generate = service.generate_response
+
+        async def replacing_generate(**kwargs):
+            financial_tools.store_financial_data([{"ingresos": service.calls}], "cache_race")
+            return await generate(**kwargs)
+
+        monkeypatch.setattr(service, "generate_response", replacing_generate)
+        request_data = {"messages": [{"role": "user", "content": "Resume"}], "temperature": 0}
+
+        client.post("/api/chat", json=request_data)
+
+        assert routes.get_response_cache().stats()["entries"] == 0
+
+    def test_model_is_part_of_the_key(self, service):
+        """Test the same question on another model is not served from the cache."""
+        messages = [{"role": "user", "content": "Hola"}]
+        client.post("/api/chat", json={"messages": messages, "temperature": 0})
+        client.post(
+            "/api/chat",
+            json={"messages": messages, "temperature": 0, "model": "gemini-1.5-flash"},
+        )
+        assert service.calls == 2
+
+    def test_unknown_model_is_rejected(self, service):
+        """Test requests for models outside the configured list get a 400."""
+        request_data = {"messages": [{"role": "user", "content": "Hola"}], "model": "gpt-4"}
+        response = client.post("/api/chat", json=request_data)
+        assert response.status_code == 400
+        assert service.calls == 0
+
+    def test_cache_stats(self, service):
+        """Test cache stats endpoint returns counters."""
+        response = client.get("/api/cache/stats")
+        assert response.status_code == 200
+        assert {"entries", "hits", "misses", "hit_rate"} <= set(response.json())
+
+
+class SlowService(CountingService):
+    """Counting service whose generation takes a while."""
+
+    async def generate_response(self, **kwargs):
+        await asyncio.sleep(0.05)
+        return await super().generate_response(**kwargs)
+
+
+class TestChatCoalescing:
+    """Test single-flight coalescing of identical concurrent chat requests."""
+
+    def test_identical_concurrent_requests_share_one_call(self, monkeypatch):
+        """Test concurrent identical requests make one model call."""
+        service = SlowService()
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: service)
+        request = ChatRequest(messages=[{"role": "user", "content": "Reporte diario"}])
+
+        async def burst():
+            return await asyncio.gather(*(routes.chat(request) for _ in range(10)))
+
+        responses = asyncio.run(burst())
+        assert service.calls == 1
+        assert {r.response for r in responses} == {"respuesta 1"}
+        assert [r.coalesced for r in responses].count(False) == 1
+
+    def test_bypass_cache_is_not_coalesced(self, monkeypatch):
+        """Test requests opting out of the cache always make their own call."""
+        service = SlowService()
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: service)
+        request = ChatRequest(
+            messages=[{"role": "user", "content": "Reporte diario"}], bypass_cache=True
+        )
+
+        async def burst():
+            return await asyncio.gather(*(routes.chat(request) for _ in range(3)))
+
+        asyncio.run(burst())
+        assert service.calls == 3
+
+    def test_coalescing_stats(self):
+        """Test coalescing stats endpoint returns counters."""
+        response = client.get("/api/coalescing/stats")
+        assert response.status_code == 200
+        assert {"calls", "executions", "coalesced"} <= set(response.json())
+
+
+class SessionService:
+    """Vertex AI service stand-in with session support."""
+
+    model_name = "gemini-test"
+    models = ModelRegistry(lambda name: None, allowed=["gemini-test"])
+
+    def __init__(self):
+        self.turns = []
+
+    def start_session(self, model=None):
+        return []
+
+    async def send_session_message(self, chat, model_name, content, **kwargs):
+        chat.append(content)
+        self.turns.append(list(chat))
+        return {"response": f"turno {len(chat)}", "tool_calls": None, "kept_in_history": True}
+
+
+class TestSessionEndpoints:
+    """Test server-side chat sessions."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Session-capable service."""
+        service = SessionService()
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: service)
+        return service
+
+    def test_session_turns_share_history(self, service):
+        """Test each turn carries only the new message while the session keeps history."""
+        session = client.post("/api/sessions", json={}).json()
+        assert session["model_used"] == "gemini-test"
+        url = f"/api/sessions/{session['session_id']}/messages"
+
+        client.post(url, json={"content": "Hola"})
+        response = client.post(url, json={"content": "¿Y la liquidez?"})
+
+        assert response.status_code == 200
+        assert response.json()["response"] == "turno 2"
+        assert service.turns[-1] == ["Hola", "¿Y la liquidez?"]
+
+    def test_dataset_digest_is_resent_only_after_changes(self, service, monkeypatch):
+        """Test a session gets the dataset digest on its first turn and after uploads."""
+        contexts = []
+        send = service.send_session_message
+
+        async def recording_send(chat, model_name, content, context=None, **kwargs):
+            contexts.append(context)
+            return await send(chat, model_name, content, **kwargs)
+
+        monkeypatch.setattr(service, "send_session_message", recording_send)
+        url = f"/api/sessions/{client.post('/api/sessions', json={}).json()['session_id']}/messages"
+        client.post("/api/upload", files={"file": ("ventas.csv", b"mes,total\n1,10\n", "text/csv")})
+
+        client.post(url, json={"content": "Hola"})
+        client.post(url, json={"content": "¿Y ahora?"})
+        client.post("/api/upload", files={"file": ("ventas.csv", b"mes,total\n2,20\n", "text/csv")})
+        client.post(url, json={"content": "¿Y con los nuevos datos?"})
+
+        assert "- ventas: 1 filas" in contexts[0]
+        assert contexts[1] is None
+        assert "- ventas: 1 filas" in contexts[2]
+
+    def test_dataset_digest_counts_toward_session_memory(self, service):
+        """Test the digest sent with a turn is included in the session's size."""
+        session_id = client.post("/api/sessions", json={}).json()["session_id"]
+        client.post("/api/upload", files={"file": ("ventas.csv", b"mes,total\n1,10\n", "text/csv")})
+
+        client.post(f"/api/sessions/{session_id}/messages", json={"content": "Hola"})
+
+        session = routes.get_session_store().get(session_id)
+        assert session.size_bytes > len("Hola") + len("turno 1")
+
+    def test_dropped_turn_is_not_counted(self, service, monkeypatch):
+        """Test a turn dropped from the history adds no bytes and resends the digest."""
+        contexts = []
+
+        async def dropping_send(chat, model_name, content, context=None, **kwargs):
+            contexts.append(context)
+            return {"response": "sin respuesta", "tool_calls": None, "kept_in_history": False}
+
+        monkeypatch.setattr(service, "send_session_message", dropping_send)
+        session_id = client.post("/api/sessions", json={}).json()["session_id"]
+        client.post("/api/upload", files={"file": ("ventas.csv", b"mes,total\n1,10\n", "text/csv")})
+        url = f"/api/sessions/{session_id}/messages"
+
+        assert client.post(url, json={"content": "Hola"}).status_code == 200
+        client.post(url, json={"content": "Hola otra vez"})
+
+        assert routes.get_session_store().get(session_id).size_bytes == 0
+        assert contexts[0] is not None and contexts[1] is not None
+
+    def test_unknown_session_model_is_rejected(self, service):
+        """Test sessions can only be started on models the registry allows."""
+        response = client.post("/api/sessions", json={"model": "gpt-4"})
+
+        assert response.status_code == 400
+        assert "gpt-4" in response.json()["detail"]
+
+    def test_deleted_session_is_gone(self, service):
+        """Test deleting a session makes further turns return 404."""
+        session_id = client.post("/api/sessions", json={}).json()["session_id"]
+        assert client.delete(f"/api/sessions/{session_id}").status_code == 200
+
+        response = client.post(f"/api/sessions/{session_id}/messages", json={"content": "Hola"})
+        assert response.status_code == 404
+        assert client.delete(f"/api/sessions/{session_id}").status_code == 404
+
+    @pytest.mark.parametrize("ending", ["delete", "evict"])
+    def test_session_ending_mid_turn_still_replies(self, service, monkeypatch, ending):
+        """Test a session deleted or evicted while the model answers still returns the reply."""
+        session_id = client.post("/api/sessions", json={}).json()["session_id"]
+        store = routes.get_session_store()
+        send = service.send_session_message
+
+        async def ending_send(chat, model_name, content, **kwargs):
+            if ending == "delete":
+                store.delete(session_id)
+            else:
+                monkeypatch.setattr(store, "max_sessions", 1)
+                store.create("gemini-test", chat=[])
+            return await send(chat, model_name, content, **kwargs)
+
+        monkeypatch.setattr(service, "send_session_message", ending_send)
+        response = client.post(f"/api/sessions/{session_id}/messages", json={"content": "Hola"})
+
+        assert response.status_code == 200
+        assert response.json()["response"] == "turno 1"
+        assert session_id not in store
+
+    def test_session_stats(self, service):
+        """Test session stats endpoint returns counters."""
+        response = client.get("/api/sessions/stats")
+        assert response.status_code == 200
+        assert {"sessions", "memory_bytes", "expired", "evicted"} <= set(response.json())
+
+
+class TestChatStreamEndpoint:
+    """Test streaming chat endpoint."""
+
+    def test_stream_emits_sse_events(self, monkeypatch):
+        """Test service events are framed as Server-Sent Events."""
+
+        class StreamingService:
+            async def stream_response(self, **kwargs):
+                yield {"event": "delta", "data": {"text": "Hola"}}
+                yield {"event": "done", "data": {"model_used": "gemini-test", "tool_calls": None}}
+
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: StreamingService())
+        request_data = {"messages": [{"role": "user", "content": "Hola"}]}
+        response = client.post("/api/chat/stream", json=request_data)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert 'event: delta\ndata: {"text": "Hola"}\n\n' in response.text
+        assert response.text.rstrip().split("\n\n")[-1].startswith("event: done")
+
+    def test_stream_reports_errors_as_events(self, monkeypatch):
+        """Test failures during generation end the stream with an error event."""
+
+        class FailingService:
+            async def stream_response(self, **kwargs):
+                yield {"event": "delta", "data": {"text": "Ho"}}
+                raise RuntimeError("quota exceeded")
+
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: FailingService())
+        request_data = {"messages": [{"role": "user", "content": "Hola"}]}
+        response = client.post("/api/chat/stream", json=request_data)
+
+        assert response.status_code == 200
+        assert "event: error" in response.text
+        assert "quota exceeded" in response.text
+
+
 class TestUploadEndpoint:
     """Test CSV upload endpoint."""
 
@@ -62,3 +386,98 @@ class TestUploadEndpoint:
         assert "message" in data
         assert "data_summary" in data
         assert data["data_summary"]["row_count"] == 2
+
+    def test_upload_stores_frame_and_samples_ten_rows(self):
+        """Test upload stores all rows but only returns a 10-row sample."""
+        rows = "\n".join(f"{2000 + i},{1000 * i},{100 * i}" for i in range(25))
+        csv_content = f"periodo,ingresos,utilidad\n{rows}".encode()
+        files = {"file": ("history.csv", csv_content, "text/csv")}
+        response = client.post("/api/upload", files=files)
+        assert response.status_code == 200
+        summary = response.json()["data_summary"]
+        assert summary["row_count"] == 25
+        assert len(summary["data"]) == 10
+        assert summary["data"][0] == {"periodo": 2000, "ingresos": 0, "utilidad": 0}
+        assert response.json()["dataset"] == "history"
+        assert len(financial_tools.data_store["history"]) == 25
+        body = response.json()
+        assert body["memory_bytes_after"] < body["memory_bytes_before"]
+
+    def test_upload_under_requested_handle(self):
+        """Test an upload can name its dataset handle."""
+        files = {"file": ("data.csv", b"periodo,ingresos\n2024,100\n", "text/csv")}
+        response = client.post("/api/upload", params={"dataset_name": "Cierre 2024"}, files=files)
+        assert response.status_code == 200
+        assert response.json()["dataset"] == "cierre_2024"
+        assert "cierre_2024" in financial_tools.data_store
+
+    def test_upload_parquet(self):
+        """Test upload accepts Parquet without a CSV round trip."""
+        df = pd.DataFrame({"periodo": [2023, 2024], "ingresos": [100000, 120000]})
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        files = {"file": ("history.parquet", buffer.getvalue(), "application/octet-stream")}
+        response = client.post("/api/upload", files=files)
+        assert response.status_code == 200
+        summary = response.json()["data_summary"]
+        assert summary["columns"] == ["periodo", "ingresos"]
+        assert summary["row_count"] == 2
+
+    def test_upload_parquet_with_list_column(self):
+        """Test a Parquet upload with a list column is stored instead of failing."""
+        df = pd.DataFrame({"periodo": [2023, 2024], "productos": [["A", "B"], ["A"]]})
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        files = {"file": ("lists.parquet", buffer.getvalue(), "application/octet-stream")}
+        response = client.post("/api/upload", files=files)
+        assert response.status_code == 200
+        assert response.json()["data_summary"]["row_count"] == 2
+
+    def test_upload_feather(self):
+        """Test upload accepts Feather/Arrow IPC files."""
+        df = pd.DataFrame({"periodo": [2023, 2024], "ingresos": [100000, 120000]})
+        buffer = io.BytesIO()
+        df.to_feather(buffer)
+        files = {"file": ("history.feather", buffer.getvalue(), "application/octet-stream")}
+        response = client.post("/api/upload", files=files)
+        assert response.status_code == 200
+        assert response.json()["data_summary"]["row_count"] == 2
+
+    @pytest.mark.parametrize("filename", ["broken.parquet", "broken.feather", "broken.arrow"])
+    def test_upload_corrupt_columnar_file(self, filename):
+        """Test a corrupt Parquet/Arrow upload is rejected as a client error."""
+        files = {"file": (filename, b"not a columnar file", "application/octet-stream")}
+        response = client.post("/api/upload", files=files)
+        assert response.status_code == 400
+        assert "Invalid" in response.json()["detail"]
+
+    def test_upload_empty_csv(self):
+        """Test empty CSV is rejected."""
+        files = {"file": ("empty.csv", b"", "text/csv")}
+        response = client.post("/api/upload", files=files)
+        assert response.status_code == 400
+
+
+class TestDatasetStatsEndpoint:
+    """Test dataset store stats endpoint."""
+
+    def test_dataset_stats(self):
+        """Test stats endpoint reports store counters."""
+        response = client.get("/api/datasets/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert "memory_bytes" in data
+        assert "hits" in data
+        assert "misses" in data
+
+
+class TestExecutorStatsEndpoint:
+    """Test executor stats endpoint."""
+
+    def test_executor_stats(self):
+        """Test stats endpoint reports both pools."""
+        response = client.get("/api/executor/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert "queue_depth" in data["thread"]
+        assert "wait_time_p99" in data["process"]
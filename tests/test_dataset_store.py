@@ -0,0 +1,203 @@
+"""Tests for the dataset store."""
+
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+from backend.tools.dataset_store import DatasetStore, compact_dataframe
+
+
+def make_frame(rows: int, offset: int = 0) -> pd.DataFrame:
+    """Build a numeric DataFrame of a predictable size."""
+    return pd.DataFrame(
+        {"periodo": range(offset, offset + rows), "ingresos": [float(i) for i in range(rows)]}
+    )
+
+
+def two_frame_budget() -> int:
+    """Memory budget with room for roughly two small datasets."""
+    return int(make_frame(1000).memory_usage(deep=True).sum() * 2.5)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a store with room for roughly two small datasets."""
+    return DatasetStore(memory_budget_bytes=two_frame_budget(), spill_dir=str(tmp_path))
+
+
+class TestDatasetStore:
+    """Test memory budget, eviction and spill behaviour."""
+
+    def test_dict_interface(self, store):
+        """Test the store behaves like a dictionary."""
+        store["a"] = make_frame(10)
+        assert "a" in store
+        assert "missing" not in store
+        assert list(store) == ["a"]
+        assert len(store) == 1
+        with pytest.raises(KeyError):
+            store["missing"]
+        del store["a"]
+        assert "a" not in store
+
+    def test_versions_change_on_write(self, store):
+        """Test every store or delete bumps the dataset version but reads do not."""
+        assert store.version("a") == 0
+        store["a"] = make_frame(10)
+        store["a"]
+        assert store.version("a") == 1
+        store["a"] = make_frame(20)
+        assert store.version("a") == 2
+        del store["a"]
+        assert store.versions() == {"a": 3}
+
+    def test_lru_eviction_and_spill(self, store, tmp_path):
+        """Test the least recently used dataset is spilled when over budget."""
+        store["a"] = make_frame(1000, 0)
+        store["b"] = make_frame(1000, 1000)
+        store["a"]  # touch a, so b is now least recently used
+        store["c"] = make_frame(1000, 2000)
+
+        stats = store.stats()
+        assert stats["datasets"] == 3
+        assert stats["spilled"] == 1
+        assert stats["evictions"] == 1
+        assert stats["memory_bytes"] <= stats["memory_budget_bytes"]
+        assert len(list(tmp_path.glob("*/*.arrow"))) == 1
+
+        # Reading b back loads it from disk
+        pd.testing.assert_frame_equal(store["b"], make_frame(1000, 1000))
+        stats = store.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] >= 1
+
+    def test_replace_removes_spill_file(self, store, tmp_path):
+        """Test re-storing a spilled dataset drops the stale file."""
+        for name in ("a", "b", "c"):
+            store[name] = make_frame(1000)
+        assert len(list(tmp_path.glob("*/*.arrow"))) == 1
+
+        store["a"] = make_frame(5)
+        assert len(store["a"]) == 5
+        assert len(list(tmp_path.glob("*/*.arrow"))) == 0
+
+    def test_stores_sharing_spill_dir_keep_their_own_files(self, tmp_path):
+        """Test two stores spilling same-named datasets into one directory don't collide."""
+        first = DatasetStore(memory_budget_bytes=two_frame_budget(), spill_dir=str(tmp_path))
+        second = DatasetStore(memory_budget_bytes=two_frame_budget(), spill_dir=str(tmp_path))
+        for store, offset in ((first, 0), (second, 5000)):
+            store["ventas.csv"] = make_frame(1000, offset)
+            store["b"] = make_frame(1000)
+            store["c"] = make_frame(1000)
+
+        del second["ventas.csv"]
+
+        pd.testing.assert_frame_equal(first["ventas.csv"], make_frame(1000, 0))
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_spill_dir_removed_with_store(self, tmp_path):
+        """Test the private spill directory is deleted when the store is collected."""
+        store = DatasetStore(memory_budget_bytes=two_frame_budget(), spill_dir=str(tmp_path))
+        for name in ("a", "b", "c"):
+            store[name] = make_frame(1000)
+        assert len(list(tmp_path.glob("*/*.arrow"))) == 1
+
+        del store
+        gc.collect()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unbounded_store_never_spills(self, tmp_path):
+        """Test no budget keeps everything resident."""
+        store = DatasetStore(spill_dir=str(tmp_path))
+        for name in ("a", "b", "c"):
+            store[name] = make_frame(1000)
+        assert store.stats()["in_memory"] == 3
+        assert list(tmp_path.glob("*/*.arrow")) == []
+
+
+class TestCompactDataFrame:
+    """Test lossless dtype compaction."""
+
+    def test_duplicate_column_names_are_kept(self):
+        """Test that repeated column names (allowed in Arrow and Parquet) all survive."""
+        df = pd.DataFrame([[1, 2.5, "a"], [3, 4.5, "a"]], columns=["valor", "valor", "grupo"])
+
+        compacted = compact_dataframe(df)
+
+        assert list(compacted.columns) == ["valor", "valor", "grupo"]
+        assert compacted.iloc[:, 0].tolist() == [1, 3]
+        assert compacted.iloc[:, 1].tolist() == [2.5, 4.5]
+
+    def test_frame_without_columns(self):
+        """Test that a frame with no columns is returned as an empty copy."""
+        df = pd.DataFrame(index=range(3))
+        assert compact_dataframe(df).shape == (3, 0)
+
+    def test_compacts_sales_dataset(self):
+        """Test numerics downcast, dates parsed and repeated strings categorized."""
+        df = pd.DataFrame(
+            {
+                "periodo": [2023, 2023, 2024, 2024] * 25,
+                "fecha": ["2024-01-01T10:00:00", "2024-01-02T11:30:00"] * 50,
+                "subtotal": [50000.0, 52000.0, 53000.0, 54000.0] * 25,
+                "impuestos": [9500.5, 9880.25, 10070.125, 10260.0625] * 25,
+                "margen": [0.1234567891, 0.2, 0.3, 0.4] * 25,
+                "metodo_pago": ["Tarjeta", "Efectivo"] * 50,
+                "cliente": [f"Cliente {i}" for i in range(100)],
+            }
+        )
+        compacted = compact_dataframe(df)
+
+        assert compacted["periodo"].dtype == "int32"
+        assert compacted["subtotal"].dtype == "float32"
+        assert compacted["impuestos"].dtype == "float32"
+        assert compacted["margen"].dtype == "float64"
+        assert pd.api.types.is_datetime64_any_dtype(compacted["fecha"])
+        assert isinstance(compacted["metodo_pago"].dtype, pd.CategoricalDtype)
+        assert compacted["cliente"].dtype == object
+        assert compact_dataframe(df.astype({"periodo": "int8"}))["periodo"].dtype == "int8"
+
+        # Values are preserved
+        assert (compacted["subtotal"] == df["subtotal"]).all()
+        assert (compacted["impuestos"].astype("float64") == df["impuestos"]).all()
+        assert list(compacted["metodo_pago"]) == list(df["metodo_pago"])
+        assert compacted.memory_usage(deep=True).sum() * 2 < df.memory_usage(deep=True).sum()
+
+    def test_arithmetic_on_compacted_columns_does_not_overflow(self):
+        """Test sums of small-valued compacted columns keep their true values."""
+        df = pd.DataFrame({"x": [100, 120, 127], "y": [100, 50, 10], "z": [100.0, 120.0, 127.0]})
+        compacted = compact_dataframe(df)
+
+        assert list(compacted["x"] + compacted["y"]) == [200, 170, 137]
+        assert list(compacted["z"] + compacted["y"]) == [200.0, 170.0, 137.0]
+        assert list(compacted["x"] * compacted["x"]) == [10000, 14400, 16129]
+        assert pd.api.types.is_float_dtype(compacted["z"])
+
+    def test_unhashable_values_are_left_alone(self):
+        """Test list, dict and array cells do not break compaction."""
+        df = pd.DataFrame(
+            {
+                "tags": [["a", "b"], ["a"], ["a"], ["a"]],
+                "meta": [{"k": 1}, {"k": 1}, {"k": 2}, {"k": 1}],
+                "vector": [np.array([1, 2]), np.array([3]), np.array([1]), np.array([1])],
+            }
+        )
+        compacted = compact_dataframe(df)
+
+        assert (compacted.dtypes == object).all()
+        assert compacted["tags"].iloc[0] == ["a", "b"]
+
+    def test_keeps_unparseable_dates_and_missing_values(self):
+        """Test columns are left alone when compaction would lose information."""
+        df = pd.DataFrame(
+            {
+                "fecha": ["2024-01-01", "no es fecha", "2024-01-03"],
+                "ingresos": [100.0, None, 300.0],
+            }
+        )
+        compacted = compact_dataframe(df)
+        assert not pd.api.types.is_datetime64_any_dtype(compacted["fecha"])
+        assert compacted["ingresos"].isna().sum() == 1
+        assert compacted["ingresos"].iloc[2] == 300.0
@@ -0,0 +1,99 @@
+"""Tests for the CPU-bound work executor."""
+
+import asyncio
+import math
+
+import pytest
+from backend.api import routes
+from backend.config import settings
+from backend.services import executor as executor_module
+from backend.services.executor import TaskExecutor
+
+
+@pytest.fixture
+def executor():
+    """Create an executor with a small process pool."""
+    executor = TaskExecutor(thread_workers=2, process_workers=1)
+    yield executor
+    executor.shutdown()
+
+
+class TestTaskExecutor:
+    """Test thread/process execution and metrics."""
+
+    def test_run_in_thread(self, executor):
+        """Test thread pool execution records wait and run times."""
+        result = asyncio.run(executor.run_in_thread(sum, [1, 2, 3]))
+        assert result == 6
+
+        stats = executor.stats()["thread"]
+        assert stats["submitted"] == 1
+        assert stats["completed"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["wait_time_p50"] is not None
+
+    def test_run_in_process(self, executor):
+        """Test process pool execution."""
+        result = asyncio.run(executor.run_in_process(math.factorial, 10))
+        assert result == 3628800
+        assert executor.stats()["process"]["completed"] == 1
+
+    def test_process_falls_back_to_threads(self):
+        """Test process work runs on threads when no process pool is configured."""
+        executor = TaskExecutor(thread_workers=1, process_workers=0)
+        try:
+            assert asyncio.run(executor.run_in_process(math.factorial, 5)) == 120
+            assert executor.stats()["thread"]["completed"] == 1
+        finally:
+            executor.shutdown()
+
+    def test_map_in_process_keeps_order(self, executor):
+        """Test mapped process work yields results in argument order."""
+        results = list(executor.map_in_process(pow, [(2, n) for n in range(6)], window=2))
+        assert results == [1, 2, 4, 8, 16, 32]
+        assert executor.stats()["process"]["completed"] == 6
+
+    def test_failures_are_counted(self, executor):
+        """Test exceptions propagate and are counted."""
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run_in_thread(int, "not a number"))
+        stats = executor.stats()["thread"]
+        assert stats["failed"] == 1
+        assert stats["in_flight"] == 0
+
+    def test_queue_depth_under_load(self, executor):
+        """Test queue depth reflects tasks waiting for a worker."""
+
+        async def scenario():
+            tasks = [
+                asyncio.create_task(executor.run_in_thread(math.factorial, 20000)) for _ in range(6)
+            ]
+            await asyncio.sleep(0)
+            depth = executor.stats()["thread"]["queue_depth"]
+            await asyncio.gather(*tasks)
+            return depth
+
+        assert asyncio.run(scenario()) > 0
+        assert executor.stats()["thread"]["queue_depth"] == 0
+
+
+class TestToolRouting:
+    """Test which pool financial tools are dispatched to."""
+
+    def test_only_heavy_tools_use_processes(self, executor, monkeypatch):
+        """Test trivial tools stay on threads and heavy ones go to the process pool."""
+        monkeypatch.setattr(executor_module, "_executor", executor)
+        monkeypatch.setattr(settings, "tool_cache_enabled", False)
+
+        dcf_args = {"flujo_caja_actual": 1000, "tasa_crecimiento": 2, "tasa_descuento": 10}
+        asyncio.run(routes.execute_tool("simple_dcf_projection", dcf_args))
+        asyncio.run(
+            routes.execute_tool(
+                "dcf_sensitivity_grid",
+                {"flujo_caja_actual": 1000, "tasas_crecimiento": [2], "tasas_descuento": [10]},
+            )
+        )
+
+        stats = executor.stats()
+        assert stats["thread"]["completed"] == 1
+        assert stats["process"]["completed"] == 1
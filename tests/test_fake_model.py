@@ -0,0 +1,160 @@
+"""Tests for the fake model backend and the offline load test."""
+
+import asyncio
+import random
+import statistics
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from backend.api import routes
+from backend.loadtest import format_report, run_load_test
+from backend.main import app
+from backend.models.schemas import Message
+from backend.services.fake_model import SCRIPTED_DATASET, FakeGenerativeModel, latency_sampler
+from backend.services.model_registry import ModelRegistry
+from backend.services.vertex_ai import VertexAIService
+
+
+def fast_model(name="fake-model", **kwargs):
+    """Fake model without latency."""
+    return FakeGenerativeModel(name, latency_distribution="fixed", latency_ms=0, **kwargs)
+
+
+def fake_service():
+    """Service on the fake backend with zero-latency models."""
+    service = VertexAIService(backend="fake")
+    service.models = ModelRegistry(fast_model)
+    return service
+
+
+class TestLatencySampler:
+    """Tests for simulated latency distributions."""
+
+    @pytest.mark.parametrize(
+        "distribution, center",
+        [
+            ("normal", statistics.mean),
+            ("uniform", statistics.mean),
+            ("exponential", statistics.mean),
+            ("lognormal", statistics.median),
+        ],
+    )
+    def test_samples_are_near_the_configured_latency(self, distribution, center):
+        """Test that samples are non-negative and centred on the configured latency."""
+        sample = latency_sampler(distribution, 100, 20, random.Random(0))
+        values = [sample() for _ in range(2000)]
+        assert min(values) >= 0
+        assert center(values) == pytest.approx(0.1, rel=0.1)
+
+    def test_lognormal_stays_bounded_with_large_spread(self):
+        """Test that a spread much larger than the mean does not explode."""
+        sample = latency_sampler("lognormal", 5, 200, random.Random(0))
+        assert max(sample() for _ in range(1000)) < 60
+
+    def test_unknown_distribution(self):
+        """Test that an unknown distribution is rejected."""
+        with pytest.raises(ValueError):
+            latency_sampler("pareto", 100, 20, random.Random(0))
+
+
+class TestFakeModel:
+    """Tests for scripted replies and error injection."""
+
+    def test_keywords_trigger_tool_calls(self):
+        """Test that prompt keywords produce scripted function calls."""
+        response = fast_model().reply([{"text": "Analiza la liquidez y el endeudamiento"}])
+        _, calls = VertexAIService._extract_response(response)
+        assert [call["name"] for call in calls] == [
+            "calculate_liquidity_ratios",
+            "calculate_leverage_ratios",
+        ]
+
+    def test_plain_prompt_gets_text(self):
+        """Test that a prompt without keywords gets a text answer."""
+        response = fast_model(response_words=5).reply([{"text": "Hola"}])
+        text, calls = VertexAIService._extract_response(response)
+        assert calls == []
+        assert text.startswith("[fake-model]")
+
+    def test_error_injection(self):
+        """Test that errors are injected as retryable Vertex AI errors."""
+        model = fast_model(error_rate=1.0, seed=1)
+        chat = model.start_chat()
+        with pytest.raises(
+            (google_exceptions.TooManyRequests, google_exceptions.ServiceUnavailable)
+        ):
+            asyncio.run(chat.send_message_async("Hola"))
+        assert model.errors == 1
+        assert chat.history == []
+
+    def test_tool_loop_runs_scripted_tools(self):
+        """Test a full tool round trip through the service on the fake backend."""
+        service = fake_service()
+
+        result = asyncio.run(
+            service.generate_response(
+                [Message(role="user", content="Dame una proyección DCF")],
+                tool_executor=routes.execute_tool,
+            )
+        )
+
+        assert [call["name"] for call in result["tool_calls"]] == ["simple_dcf_projection"]
+        # Whole-number arguments arrive as ints, not protobuf floats
+        assert result["tool_calls"][0]["arguments"]["periodos"] == 5
+        assert "valor_presente" in result["response"]
+
+    def test_scripted_dataset_call_reads_uploaded_dataset(self):
+        """Test the scripted trend call targets the handle the load test uploads."""
+        service = fake_service()
+        routes.financial_tools.store_financial_data(
+            [{"ingresos": 100.0 + i} for i in range(4)], SCRIPTED_DATASET
+        )
+
+        result = asyncio.run(
+            service.generate_response(
+                [Message(role="user", content="Analiza la tendencia de los ingresos")],
+                tool_executor=routes.execute_tool,
+            )
+        )
+
+        assert [call["name"] for call in result["tool_calls"]] == ["analyze_trend"]
+        assert "error" not in result["tool_calls"][0]["result"]
+
+    def test_streaming(self):
+        """Test that streamed text arrives in several chunks."""
+        service = fake_service()
+
+        async def collect():
+            return [
+                event
+                async for event in service.stream_response(
+                    [Message(role="user", content="Hola")], tool_executor=routes.execute_tool
+                )
+            ]
+
+        events = asyncio.run(collect())
+        deltas = [event for event in events if event["event"] == "delta"]
+        assert len(deltas) > 1
+        assert events[-1]["event"] == "done"
+
+
+class TestLoadTest:
+    """Tests for the offline load test harness."""
+
+    def test_run_load_test(self, monkeypatch):
+        """Test that the harness drives chat and upload traffic and reports percentiles."""
+        service = fake_service()
+        monkeypatch.setattr(routes, "get_vertex_service", lambda: service)
+        routes.financial_tools.data_store.pop(SCRIPTED_DATASET, None)
+
+        report = asyncio.run(
+            run_load_test(app, requests=30, concurrency=5, upload_ratio=0.2, upload_rows=50)
+        )
+
+        assert report["overall"]["requests"] == 30
+        assert report["overall"]["errors"] == 0
+        assert set(report["endpoints"]) == {"chat", "upload"}
+        assert report["overall"]["p50"] <= report["overall"]["p99"]
+        assert "overall" in format_report(report)
+        assert SCRIPTED_DATASET in routes.financial_tools.data_store
@@ -1,7 +1,18 @@
 """Tests for financial tools."""
 
+import numpy as np
+import pandas as pd
 import pytest
-from backend.tools.financial_tools import FinancialTools
+from backend.services import executor as executor_module
+from backend.services.executor import TaskExecutor
+from backend.tools.financial_tools import (
+    SKETCH_BUCKETS,
+    FinancialTools,
+    _dcf_valuations,
+    _draw_rates,
+    _simulate_dcf_chunk,
+    dataset_handle,
+)
 
 
 @pytest.fixture
@@ -92,6 +103,119 @@ class TestDCFProjection:
         assert result["vp_flujos"] > 0
 
 
+class TestDCFSensitivityGrid:
+    """Test vectorized DCF sensitivity grid."""
+
+    def test_grid_matches_simple_dcf(self, financial_tools):
+        """Test every cell matches the single-pair projection."""
+        growth_rates = [2, 5, 12]
+        discount_rates = [8, 10, 15]
+        result = financial_tools.dcf_sensitivity_grid(
+            flujo_caja_actual=100000,
+            tasas_crecimiento=growth_rates,
+            tasas_descuento=discount_rates,
+            periodos=[3, 5],
+        )
+        grid = result["valor_total"]
+        assert len(grid) == 2
+        for h, periodos in enumerate([3, 5]):
+            for i, g in enumerate(growth_rates):
+                for j, r in enumerate(discount_rates):
+                    expected = financial_tools.simple_dcf_projection(100000, g, r, periodos)
+                    assert grid[h][i][j] == pytest.approx(expected["valor_total"], abs=0.01)
+
+    def test_single_horizon_returns_matrix(self, financial_tools):
+        """Test a scalar horizon returns a growth x discount matrix."""
+        result = financial_tools.dcf_sensitivity_grid(100000, [5, 12], [10], periodos=5)
+        assert len(result["valor_total"]) == 2
+        assert len(result["valor_total"][0]) == 1
+        # Growth above discount rate has no terminal value
+        no_terminal = financial_tools.simple_dcf_projection(100000, 12, 10, 5)
+        assert result["valor_total"][1][0] == pytest.approx(no_terminal["vp_flujos"], abs=0.01)
+
+
+class TestMonteCarloDCF:
+    """Test Monte Carlo DCF valuation."""
+
+    def test_fixed_rates_match_simple_dcf(self, financial_tools):
+        """Test degenerate distributions reproduce the deterministic valuation."""
+        result = financial_tools.monte_carlo_dcf(
+            flujo_caja_actual=100000,
+            tasa_crecimiento=5,
+            tasa_descuento=10,
+            periodos=3,
+            simulaciones=1000,
+        )
+        expected = financial_tools.simple_dcf_projection(100000, 5, 10, 3)["valor_total"]
+        assert result["valor_total"]["percentiles"]["p50"] == pytest.approx(expected, abs=0.01)
+        assert result["var"] == pytest.approx(0, abs=0.01)
+
+    def test_seeded_results_independent_of_workers(self, financial_tools, monkeypatch):
+        """Test the same seed yields the same result in-process and in a process pool."""
+        executor = TaskExecutor(thread_workers=1, process_workers=2)
+        monkeypatch.setattr(executor_module, "_executor", executor)
+        kwargs = {
+            "flujo_caja_actual": 100000,
+            "tasa_crecimiento": {"distribution": "normal", "mean": 5, "std": 2},
+            "tasa_descuento": {"distribution": "uniform", "low": 8, "high": 12},
+            "simulaciones": 10000,
+            "seed": 7,
+        }
+        single = financial_tools.monte_carlo_dcf(**kwargs, chunk_size=2500)
+        parallel = financial_tools.monte_carlo_dcf(**kwargs, chunk_size=2500, workers=2)
+        executor.shutdown()
+        assert single == parallel
+        assert executor.stats()["process"]["completed"] == 4
+        percentiles = single["valor_total"]["percentiles"]
+        assert percentiles["p5"] < percentiles["p50"] < percentiles["p95"]
+        assert single["cvar"] >= single["var"] > 0
+
+    def test_chunk_summary_has_fixed_size(self):
+        """Test a chunk is reduced to the same summary size however many paths it has."""
+        seed = np.random.SeedSequence(1)
+        rates = {"distribution": "normal", "mean": 5, "std": 2}
+        small = _simulate_dcf_chunk(seed, 5_000, 100000, rates, 10, 5)
+        large = _simulate_dcf_chunk(seed, 50_000, 100000, rates, 10, 5)
+        assert len(small[5]) == len(large[5]) == SKETCH_BUCKETS
+        assert large[6].sum() == 50_000
+
+    def test_sketch_matches_exact_statistics(self, financial_tools):
+        """Test merged chunk summaries reproduce the exact percentiles, VaR and CVaR."""
+        growth = {"distribution": "normal", "mean": 5, "std": 2}
+        discount = {"distribution": "uniform", "low": 8, "high": 12}
+        result = financial_tools.monte_carlo_dcf(
+            100000, growth, discount, simulaciones=40_000, chunk_size=5_000, seed=3
+        )
+
+        valuations = []
+        for chunk_seed in np.random.SeedSequence(3).spawn(8):
+            rng = np.random.default_rng(chunk_seed)
+            g = _draw_rates(rng, growth, 5_000)
+            r = _draw_rates(rng, discount, 5_000)
+            vp_flujos, vp_terminal = _dcf_valuations(100000, g, r, np.array([5]))
+            valuations.append((vp_flujos + vp_terminal)[:, 0])
+        exact = np.concatenate(valuations)
+        mean = exact.mean()
+        cutoff = np.percentile(exact, 5)
+
+        stats = result["valor_total"]
+        assert stats["media"] == pytest.approx(mean, abs=0.01)
+        assert stats["desviacion"] == pytest.approx(exact.std(), rel=1e-6)
+        assert stats["maximo"] == pytest.approx(exact.max(), abs=0.01)
+        for level in (5, 25, 50, 75, 95):
+            expected = np.percentile(exact, level)
+            assert stats["percentiles"][f"p{level}"] == pytest.approx(expected, rel=1e-3)
+        assert result["var"] == pytest.approx(mean - cutoff, rel=1e-2)
+        assert result["cvar"] == pytest.approx(mean - exact[exact <= cutoff].mean(), rel=1e-2)
+
+    def test_invalid_distribution(self, financial_tools):
+        """Test unknown distributions return an error."""
+        result = financial_tools.monte_carlo_dcf(
+            100000, {"distribution": "cauchy", "mean": 5}, 10, simulaciones=10
+        )
+        assert "error" in result
+
+
 class TestRiskAlerts:
     """Test risk alert generation."""
 
@@ -129,6 +253,31 @@ class TestDataStorage:
         result = financial_tools.store_financial_data(data, "test_data")
         assert "test_data" in financial_tools.data_store
         assert len(financial_tools.data_store["test_data"]) == 2
+        assert "Memory:" in result
+
+    def test_store_nested_values(self, financial_tools):
+        """Test records with list and dict values are stored as they are."""
+        data = [
+            {"periodo": 2023, "productos": ["A", "B"], "meta": {"canal": "web"}},
+            {"periodo": 2024, "productos": ["A"], "meta": {"canal": "web"}},
+        ]
+        result = financial_tools.store_financial_data(data, "nested")
+        assert "Stored 2 rows" in result
+        assert financial_tools.data_store["nested"]["productos"].iloc[0] == ["A", "B"]
+
+    def test_store_reports_compaction(self, financial_tools):
+        """Test storing compacts dtypes and reports the footprint."""
+        data = [{"periodo": 2020 + i, "metodo_pago": "Tarjeta"} for i in range(50)]
+        stored = financial_tools.store_dataframe(pd.DataFrame(data), "compact")
+        assert stored["memory_bytes_after"] < stored["memory_bytes_before"]
+        assert financial_tools.data_store["compact"]["periodo"].dtype == "int32"
+
+    def test_store_columnar_file(self, financial_tools, tmp_path):
+        """Test storing a Parquet file by path."""
+        path = tmp_path / "history.parquet"
+        pd.DataFrame({"periodo": [2023, 2024], "ingresos": [100000, 120000]}).to_parquet(path)
+        financial_tools.store_financial_data(str(path), "parquet_data")
+        assert list(financial_tools.data_store["parquet_data"]["ingresos"]) == [100000, 120000]
 
     def test_trend_analysis(self, financial_tools):
         """Test trend analysis."""
@@ -141,3 +290,196 @@ class TestDataStorage:
         result = financial_tools.analyze_trend("trend_test", "ingresos")
         assert "growth_rate" in result
         assert result["growth_rate"] == 50.0  # (150000 - 100000) / 100000 * 100
+
+
+class TestDatasetHandles:
+    """Test dataset descriptions and handles."""
+
+    def test_describe_dataset(self, financial_tools):
+        """Test describing a dataset returns its schema, statistics and a sample."""
+        df = pd.DataFrame({"periodo": ["2023", "2024"], "ingresos": [100.0, 300.0]})
+        financial_tools.store_dataframe(df, "estados")
+
+        description = financial_tools.describe_dataset("estados", sample_rows=1)
+
+        assert description["row_count"] == 2
+        ingresos = description["columns"][1]
+        assert (ingresos["name"], ingresos["min"], ingresos["max"], ingresos["mean"]) == (
+            "ingresos",
+            100.0,
+            300.0,
+            200.0,
+        )
+        assert description["sample"] == [{"periodo": "2023", "ingresos": 100.0}]
+
+    def test_description_follows_dataset_version(self, financial_tools):
+        """Test re-storing a dataset refreshes its cached description."""
+        financial_tools.store_dataframe(pd.DataFrame({"ingresos": [1.0]}), "estados")
+        financial_tools.describe_dataset("estados")
+        financial_tools.store_dataframe(pd.DataFrame({"ingresos": [1.0, 2.0]}), "estados")
+
+        assert financial_tools.describe_dataset("estados")["row_count"] == 2
+
+    def test_missing_dataset_lists_available(self, financial_tools):
+        """Test describing an unknown dataset names the stored ones."""
+        financial_tools.store_dataframe(pd.DataFrame({"ingresos": [1.0]}), "estados")
+
+        result = financial_tools.describe_dataset("otro")
+
+        assert "error" in result
+        assert result["available"] == ["estados"]
+
+    def test_digest_has_no_full_rows(self, financial_tools):
+        """Test the prompt digest shows columns and a sample, not every row."""
+        assert financial_tools.datasets_digest() is None
+        df = pd.DataFrame({"periodo": range(100), "ingresos": [float(i) for i in range(100)]})
+        financial_tools.store_dataframe(df, "historia")
+
+        digest = financial_tools.datasets_digest(sample_rows=2)
+
+        assert "- historia: 100 filas" in digest
+        assert "ingresos" in digest
+        assert len(digest.splitlines()) == 4
+        assert financial_tools.list_datasets()["datasets"][0]["row_count"] == 100
+
+    def test_dataset_handle(self):
+        """Test file names become lowercase identifier handles."""
+        assert dataset_handle("Estados Financieros 2024.csv") == "estados_financieros_2024"
+        assert dataset_handle(None) == "uploaded"
+
+
+class TestRatiosTable:
+    """Test vectorized multi-period ratio table."""
+
+    def test_ratios_match_scalar_calculators(self, financial_tools):
+        """Test table values match the per-call calculators."""
+        data = [
+            {
+                "periodo": 2023,
+                "activos_corrientes": 150000,
+                "pasivos_corrientes": 100000,
+                "inventarios": 30000,
+                "pasivos_totales": 400000,
+                "activos_totales": 1000000,
+                "patrimonio": 600000,
+                "utilidad_neta": 120000,
+                "ingresos": 500000,
+            },
+            {
+                "periodo": 2024,
+                "activos_corrientes": 180000,
+                "pasivos_corrientes": 90000,
+                "inventarios": 20000,
+                "pasivos_totales": 450000,
+                "activos_totales": 1100000,
+                "patrimonio": 650000,
+                "utilidad_neta": 90000,
+                "ingresos": 550000,
+            },
+        ]
+        financial_tools.store_financial_data(data, "history")
+        result = financial_tools.calculate_ratios_table("history")
+
+        assert result["row_count"] == 2
+        rows = [dict(zip(result["columns"], row)) for row in result["rows"]]
+        for record, row in zip(data, rows):
+            expected = {
+                **financial_tools.calculate_liquidity_ratios(
+                    record["activos_corrientes"],
+                    record["pasivos_corrientes"],
+                    record["inventarios"],
+                ),
+                **financial_tools.calculate_leverage_ratios(
+                    record["pasivos_totales"], record["activos_totales"], record["patrimonio"]
+                ),
+                **financial_tools.calculate_profitability_ratios(
+                    record["utilidad_neta"],
+                    record["ingresos"],
+                    record["activos_totales"],
+                    record["patrimonio"],
+                ),
+            }
+            assert row["periodo"] == record["periodo"]
+            for name, value in expected.items():
+                assert row[name] == pytest.approx(value)
+
+    def test_zero_denominators_return_none(self, financial_tools):
+        """Test division by zero yields None like the scalar calculators."""
+        data = [
+            {
+                "activos_corrientes": 100,
+                "pasivos_corrientes": 0,
+                "utilidad_neta": 10,
+                "ingresos": 0,
+            },
+            {
+                "activos_corrientes": 100,
+                "pasivos_corrientes": 50,
+                "utilidad_neta": 10,
+                "ingresos": 200,
+            },
+        ]
+        financial_tools.store_financial_data(data, "zeros")
+        result = financial_tools.calculate_ratios_table("zeros")
+        rows = [dict(zip(result["columns"], row)) for row in result["rows"]]
+
+        assert rows[0]["liquidez_corriente"] is None
+        assert rows[0]["margen_neto"] is None
+        assert rows[1]["liquidez_corriente"] == 2.0
+        assert rows[1]["margen_neto"] == 5.0
+        # Only ratios with available inputs are reported
+        assert "prueba_acida" not in result["columns"]
+        assert "roe" not in result["columns"]
+
+    def test_missing_dataset(self, financial_tools):
+        """Test error for unknown dataset."""
+        result = financial_tools.calculate_ratios_table("missing")
+        assert "error" in result
+
+
+class TestRiskAlertsBatch:
+    """Test batched risk alert evaluation."""
+
+    def test_batch_matches_single_dict_api(self, financial_tools):
+        """Test each row yields the same alerts as the single-dict API."""
+        table = {
+            "periodo": [2022, 2023, 2024],
+            "liquidez_corriente": [0.8, 1.2, 2.0],
+            "razon_endeudamiento": [0.75, 0.6, 0.3],
+            "margen_neto": [-5.0, 3.0, 12.0],
+        }
+        result = financial_tools.generate_risk_alerts_batch(table)
+        columns = result["columns"]
+        keys = ("severity", "category", "message", "recommendation")
+        assert "periodo" in columns
+
+        for row_index in range(3):
+            single = financial_tools.generate_risk_alerts(
+                {name: values[row_index] for name, values in table.items() if name != "periodo"}
+            )
+            batch = [
+                {key: row[columns.index(key)] for key in keys}
+                for row in result["rows"]
+                if row[columns.index("row")] == row_index
+            ]
+            assert batch == single
+
+    def test_batch_filters_and_no_alert_rows(self, financial_tools):
+        """Test severity filter and that healthy rows produce nothing."""
+        table = {
+            "columns": ["empresa", "liquidez_corriente", "margen_neto"],
+            "rows": [["A", 0.5, -1.0], ["B", 3.0, 20.0], ["C", None, -2.0]],
+        }
+        result = financial_tools.generate_risk_alerts_batch(table, severity="critical")
+        columns = result["columns"]
+
+        assert result["alert_count"] == 2
+        assert [row[columns.index("empresa")] for row in result["rows"]] == ["A", "C"]
+        assert all(row[columns.index("category")] == "rentabilidad" for row in result["rows"])
+
+    def test_moderate_liquidity_alert(self, financial_tools):
+        """Test the medium threshold only applies when the high one does not."""
+        alerts = financial_tools.generate_risk_alerts({"liquidez_corriente": 1.2})
+        assert len(alerts) == 1
+        assert alerts[0]["severity"] == "medium"
+        assert "1.20" in alerts[0]["message"]
@@ -0,0 +1,92 @@
+"""Tests for token-budgeted history compaction."""
+
+from backend.models.schemas import Message
+from backend.services.history import SUMMARY_HEADER, HistoryManager
+
+
+def conversation(turns, words=50):
+    """Build alternating user/assistant messages of roughly equal size."""
+    messages = []
+    for i in range(turns):
+        messages.append(Message(role="user", content=f"Pregunta {i}. " + "dato " * words))
+        messages.append(Message(role="assistant", content=f"Respuesta {i}. " + "cifra " * words))
+    return messages
+
+
+class CountingCounter:
+    """Token counter that records how often it is called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+class TestHistoryManager:
+    """Test compaction, token count caching and summary caching."""
+
+    def test_short_history_is_untouched(self):
+        """Test histories within budget are returned as-is."""
+        manager = HistoryManager(token_budget=10_000)
+        messages = conversation(3)
+        assert manager.compact(messages) is messages
+
+    def test_long_history_fits_budget_and_keeps_recent_turns(self):
+        """Test older turns are folded into a summary and recent ones kept verbatim."""
+        counter = CountingCounter()
+        manager = HistoryManager(token_budget=300, min_recent_messages=2, token_counter=counter)
+        messages = [Message(role="system", content="Sé breve")] + conversation(10)
+        messages.append(Message(role="user", content="¿Y la liquidez?"))
+
+        compacted = manager.compact(messages)
+
+        assert compacted[0].content == "Sé breve"
+        assert compacted[1].role == "user"
+        assert compacted[1].content.startswith(SUMMARY_HEADER)
+        assert "- Usuario: Pregunta 0." in compacted[1].content
+        assert "- Asistente: Respuesta 0." in compacted[1].content
+        assert compacted[-1] == messages[-1]
+        assert sum(manager.count_tokens(m) for m in compacted) <= 300
+        roles = [m.role for m in compacted[1:]]
+        assert all(a != b for a, b in zip(roles, roles[1:], strict=False))
+        assert manager.stats()["tokens_saved"] > 0
+
+    def test_min_recent_messages_are_always_kept(self):
+        """Test the most recent messages survive even when they exceed the budget."""
+        manager = HistoryManager(token_budget=10, min_recent_messages=2)
+        messages = conversation(3)
+        compacted = manager.compact(messages)
+        assert compacted[-1] == messages[-1]
+        assert compacted[-2].content.endswith(messages[-2].content)
+
+    def test_token_counts_are_cached_by_message(self):
+        """Test each distinct message is counted only once."""
+        counter = CountingCounter()
+        manager = HistoryManager(token_budget=10_000, token_counter=counter)
+        messages = conversation(4)
+        manager.compact(messages)
+        manager.compact(messages + [Message(role="user", content="Otra pregunta")])
+        assert counter.calls == len(messages) + 1
+
+    def test_summary_is_extended_incrementally(self):
+        """Test later turns reuse the cached summary of earlier folded turns."""
+        manager = HistoryManager(token_budget=300, min_recent_messages=2)
+        summarized = []
+        original = manager._summarize
+
+        def spy(message):
+            summarized.append(message.content)
+            return original(message)
+
+        manager._summarize = spy
+        messages = conversation(10)
+        manager.compact(messages)
+        first_pass = len(summarized)
+        manager.compact(messages)
+        assert len(summarized) == first_pass
+
+        manager.compact(messages + conversation(12)[20:])
+        assert len(summarized) - first_pass == 4
+        assert manager.stats()["summary_cache_hits"] == 2
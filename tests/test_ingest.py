@@ -0,0 +1,88 @@
+"""Tests for upload ingestion helpers."""
+
+import io
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+from backend.tools.ingest import detect_format, read_file
+
+
+@pytest.fixture
+def frame():
+    """Create a small multi-year statement."""
+    return pd.DataFrame(
+        {
+            "periodo": [2021, 2022, 2023],
+            "ingresos": [100000.0, 120000.0, 150000.0],
+            "empresa": ["A", "A", "A"],
+        }
+    )
+
+
+def write(frame: pd.DataFrame, fmt: str, target) -> None:
+    """Write a frame in one of the supported binary formats."""
+    if fmt == "parquet":
+        frame.to_parquet(target, index=False)
+    elif fmt == "feather":
+        feather.write_feather(frame, target)
+    else:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.PythonFile(target, mode="w") if not isinstance(target, str) else target
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+class TestIngest:
+    """Test format detection and columnar loading."""
+
+    def test_detect_format(self):
+        """Test extensions map to formats."""
+        assert detect_format("data.csv") == "csv"
+        assert detect_format("data.PARQUET") == "parquet"
+        assert detect_format("data.arrow") == "arrow"
+        assert detect_format("data.feather") == "feather"
+        assert detect_format("data.xlsx") is None
+        assert detect_format(None) is None
+
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow", "feather"])
+    def test_read_from_path(self, frame, fmt, tmp_path):
+        """Test memory-mapped loading from a path."""
+        path = str(tmp_path / f"data.{fmt}")
+        write(frame, fmt, path)
+        pd.testing.assert_frame_equal(read_file(path, fmt), frame)
+
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow", "feather"])
+    def test_read_from_open_file(self, frame, fmt, tmp_path):
+        """Test loading from an on-disk file object (memory-mapped via its descriptor)."""
+        path = str(tmp_path / f"data.{fmt}")
+        write(frame, fmt, path)
+        with open(path, "rb") as f:
+            pd.testing.assert_frame_equal(read_file(f, fmt), frame)
+
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow", "feather"])
+    def test_read_from_memory(self, frame, fmt):
+        """Test loading from an in-memory buffer."""
+        buffer = io.BytesIO()
+        write(frame, fmt, buffer)
+        buffer.seek(0)
+        pd.testing.assert_frame_equal(read_file(buffer, fmt), frame)
+
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow", "feather"])
+    def test_read_from_spooled_file(self, frame, fmt):
+        """Test loading from a small spooled upload that is still held in memory."""
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spooled:
+            write(frame, fmt, spooled)
+            spooled.seek(0)
+            pd.testing.assert_frame_equal(read_file(spooled, fmt), frame)
+
+    def test_read_arrow_stream_format(self, frame):
+        """Test Arrow IPC streaming format is accepted as well."""
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        buffer = io.BytesIO(sink.getvalue().to_pybytes())
+        pd.testing.assert_frame_equal(read_file(buffer, "arrow"), frame)
@@ -0,0 +1,110 @@
+"""Tests for Prometheus metrics."""
+
+import asyncio
+import io
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import routes
+from backend.main import app
+from backend.services import metrics as metrics_module
+from backend.services.fake_model import FakeGenerativeModel
+from backend.services.metrics import Counter, Histogram, Metrics
+from backend.services.techaura_sync import TechauraClient
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """Fresh shared metrics."""
+    metrics = Metrics()
+    monkeypatch.setattr(metrics_module, "_metrics", metrics)
+    return metrics
+
+
+class TestExposition:
+    """Tests for the Prometheus text format."""
+
+    def test_counter(self):
+        """Test counter samples with escaped label values."""
+        counter = Counter("requests_total", "Requests.", ["path"])
+        counter.inc(1, 'say "hi"')
+        counter.inc(2, 'say "hi"')
+
+        lines = counter.render()
+
+        assert lines[:2] == [
+            "# HELP financial_assistant_requests_total Requests.",
+            "# TYPE financial_assistant_requests_total counter",
+        ]
+        assert lines[2] == 'financial_assistant_requests_total{path="say \\"hi\\""} 3'
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count."""
+        histogram = Histogram("duration_seconds", "Duration.", ["tool"], (0.1, 1.0, float("inf")))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "dcf")
+
+        lines = histogram.render()
+
+        assert 'financial_assistant_duration_seconds_bucket{tool="dcf",le="0.1"} 1' in lines
+        assert 'financial_assistant_duration_seconds_bucket{tool="dcf",le="1"} 3' in lines
+        assert 'financial_assistant_duration_seconds_bucket{tool="dcf",le="+Inf"} 4' in lines
+        assert 'financial_assistant_duration_seconds_sum{tool="dcf"} 6.05' in lines
+        assert 'financial_assistant_duration_seconds_count{tool="dcf"} 4' in lines
+
+
+class TestInstrumentation:
+    """Tests for metrics recorded on the hot paths."""
+
+    def test_tool_duration_and_errors(self, metrics):
+        """Test that tool executions are timed and failures counted per tool."""
+        args = {"ratios": {"liquidez_corriente": 0.9}}
+        asyncio.run(routes.execute_tool("generate_risk_alerts", args))
+        with pytest.raises(TypeError):
+            asyncio.run(routes.execute_tool("calculate_leverage_ratios", {"unknown": 1}))
+
+        assert metrics.tool_duration.count("generate_risk_alerts") == 1
+        assert metrics.tool_errors.value("calculate_leverage_ratios") == 1
+
+    def test_token_usage(self, metrics):
+        """Test that usage metadata of a model response is counted."""
+        model = FakeGenerativeModel("fake-model", latency_distribution="fixed", latency_ms=0)
+        response = model.reply([{"text": "Hola"}])
+
+        metrics.record_usage("fake-model", response)
+
+        assert metrics.tokens.value("fake-model", "prompt") > 0
+        assert metrics.tokens.value("fake-model", "completion") > 0
+
+    def test_techaura_records(self, metrics):
+        """Test that synced Techaura records are counted per company."""
+        client = TechauraClient(company_id="acme")
+        result = client.sync_sales_to_financial_data()
+
+        assert metrics.techaura_records.value("acme") == result["summary"]["total_registros"]
+
+
+class TestMetricsEndpoint:
+    """Tests for the /api/metrics endpoint."""
+
+    def test_exports_upload_and_scraped_metrics(self, metrics):
+        """Test that upload histograms and scrape-time metrics are exported."""
+        client = TestClient(app)
+        buffer = io.StringIO()
+        pd.DataFrame({"periodo": ["2023", "2024"], "ingresos": [1.0, 2.0]}).to_csv(buffer)
+        client.post(
+            "/api/upload", files={"file": ("data.csv", buffer.getvalue().encode(), "text/csv")}
+        )
+
+        response = client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'financial_assistant_upload_parse_duration_seconds_count{format="csv"} 1' in body
+        assert 'financial_assistant_upload_size_bytes_count{format="csv"} 1' in body
+        assert "# TYPE financial_assistant_model_latency_seconds histogram" in body
+        assert 'financial_assistant_response_cache_requests_total{result="hit"}' in body
+        assert "# TYPE financial_assistant_dataset_store_bytes gauge" in body
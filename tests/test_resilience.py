@@ -0,0 +1,130 @@
+"""Tests for model call timeouts, retries and hedging."""
+
+import asyncio
+import random
+
+import pytest
+from backend.services.resilience import LatencyHistogram, ResiliencePolicy
+from google.api_core import exceptions as google_exceptions
+
+
+async def no_sleep(seconds):
+    """Skip backoff waits."""
+
+
+def make_policy(**kwargs):
+    """Policy with deterministic jitter and no real backoff."""
+    kwargs.setdefault("rng", random.Random(0))
+    kwargs.setdefault("sleep", no_sleep)
+    return ResiliencePolicy(**kwargs)
+
+
+class Flaky:
+    """Call failing with the given errors before succeeding."""
+
+    def __init__(self, *errors, result="ok", delay=0.0):
+        self.errors = list(errors)
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, *args):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+class TestRetries:
+    """Test retry and deadline behaviour."""
+
+    def test_retryable_errors_are_retried(self):
+        """Test throttling and unavailability are retried until success."""
+        policy = make_policy(max_attempts=3)
+        call = Flaky(
+            google_exceptions.TooManyRequests("quota"),
+            google_exceptions.ServiceUnavailable("down"),
+        )
+        assert asyncio.run(policy.call("m", call)) == ("ok", "m")
+        assert call.calls == 3
+        assert policy.stats()["retries"] == 2
+
+    def test_non_retryable_errors_fail_fast(self):
+        """Test client errors are raised without retrying."""
+        policy = make_policy(max_attempts=3)
+        call = Flaky(google_exceptions.InvalidArgument("bad request"))
+        with pytest.raises(google_exceptions.InvalidArgument):
+            asyncio.run(policy.call("m", call))
+        assert call.calls == 1
+
+    def test_attempt_deadline_then_give_up(self):
+        """Test slow attempts time out and the last timeout is raised."""
+        policy = make_policy(attempt_timeout=0.01, max_attempts=2)
+        call = Flaky(delay=1.0)
+        with pytest.raises(TimeoutError):
+            asyncio.run(policy.call("m", call))
+        assert call.calls == 2
+        assert policy.stats()["timeouts"] == 2
+
+    def test_backoff_grows_with_jitter_and_is_capped(self):
+        """Test backoff doubles per attempt, stays jittered and respects the cap."""
+        policy = make_policy(backoff_base=1.0, backoff_max=3.0)
+        assert 0.5 <= policy.backoff(1) <= 1.0
+        assert 1.0 <= policy.backoff(2) <= 2.0
+        assert 1.5 <= policy.backoff(5) <= 3.0
+
+
+class TestHedging:
+    """Test hedged requests to a faster model."""
+
+    def test_slow_primary_is_hedged_and_hedge_wins(self):
+        """Test a hedge is sent after the delay and its answer is used."""
+        policy = make_policy(hedge_model="flash", hedge_delay=0.01)
+        primary = Flaky(result="pro", delay=1.0)
+        hedge = Flaky(result="flash")
+
+        assert asyncio.run(policy.call("pro", primary, hedge)) == ("flash", "flash")
+        stats = policy.stats()
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test no hedge is sent when the primary answers within the delay."""
+        policy = make_policy(hedge_model="flash", hedge_delay=1.0)
+        hedge = Flaky(result="flash")
+        assert asyncio.run(policy.call("pro", Flaky(result="pro"), hedge)) == ("pro", "pro")
+        assert hedge.calls == 0
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        """Test the primary answer is used when the hedge fails."""
+        policy = make_policy(hedge_model="flash", hedge_delay=0.01)
+        primary = Flaky(result="pro", delay=0.05)
+        hedge = Flaky(ValueError("flash down"))
+        assert asyncio.run(policy.call("pro", primary, hedge)) == ("pro", "pro")
+
+    def test_hedge_delay_tracks_primary_p95(self):
+        """Test the hedge delay switches to the observed percentile once enough samples exist."""
+        policy = make_policy(hedge_model="flash", hedge_delay=5.0, hedge_min_samples=10)
+        for i in range(9):
+            policy.record_latency("pro", (i + 1) / 10)
+        assert policy.hedge_delay("pro") == 5.0
+        policy.record_latency("pro", 1.0)
+        assert policy.hedge_delay("pro") == 1.0
+
+
+class TestLatencyHistogram:
+    """Test latency histogram buckets and percentiles."""
+
+    def test_cumulative_buckets_and_percentiles(self):
+        """Test samples land in cumulative buckets and percentiles come from recent samples."""
+        histogram = LatencyHistogram()
+        for seconds in (0.05, 0.3, 0.3, 3.0, 100.0):
+            histogram.record(seconds)
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 5
+        assert snapshot["buckets"]["0.1"] == 1
+        assert snapshot["buckets"]["0.5"] == 3
+        assert snapshot["buckets"]["4.0"] == 4
+        assert snapshot["buckets"]["+Inf"] == 5
+        assert snapshot["p50"] == 0.3
@@ -0,0 +1,91 @@
+"""Tests for the chat response cache."""
+
+from backend.models.schemas import Message
+from backend.services.response_cache import ResponseCache, make_cache_key
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(content="Hola", **overrides):
+    """Build a cache key with default request parameters."""
+    params = {"model": "gemini-1.5-pro", "temperature": 0.0, "max_tokens": 2048}
+    params.update(overrides)
+    return make_cache_key([Message(role="user", content=content)], **params)
+
+
+class TestCacheKey:
+    """Test cache key construction."""
+
+    def test_whitespace_and_role_case_are_normalized(self):
+        """Test formatting-only differences map to the same key."""
+        spaced = make_cache_key(
+            [Message(role="User", content="  Calcula   la liquidez\n")],
+            model="m",
+            temperature=0,
+            max_tokens=10,
+        )
+        plain = make_cache_key(
+            [Message(role="user", content="Calcula la liquidez")],
+            model="m",
+            temperature=0.0,
+            max_tokens=10,
+        )
+        assert spaced == plain
+
+    def test_parameters_and_dataset_versions_change_the_key(self):
+        """Test every component of the request is part of the key."""
+        base = key()
+        assert key(content="Adiós") != base
+        assert key(model="gemini-1.5-flash") != base
+        assert key(temperature=0.5) != base
+        assert key(max_tokens=100) != base
+        assert key(dataset_versions={"uploaded": 1}) != key(dataset_versions={"uploaded": 2})
+
+
+class TestResponseCache:
+    """Test TTL, LRU eviction and metrics."""
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits or misses."""
+        cache = ResponseCache(max_entries=4)
+        assert cache.get("a") is None
+        cache.set("a", {"response": "x"})
+        assert cache.get("a") == {"response": "x"}
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_entries_expire_after_ttl(self):
+        """Test expired entries are dropped and counted as misses."""
+        clock = FakeClock()
+        cache = ResponseCache(max_entries=4, ttl_seconds=10, clock=clock)
+        cache.set("a", {"response": "x"})
+        clock.now = 9.9
+        assert cache.get("a") is not None
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the oldest untouched entry is evicted when full."""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", {"response": "a"})
+        cache.set("b", {"response": "b"})
+        cache.get("a")
+        cache.set("c", {"response": "c"})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
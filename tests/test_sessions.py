@@ -0,0 +1,84 @@
+"""Tests for server-side chat sessions."""
+
+import pytest
+from backend.services.sessions import SessionStore
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSessionStore:
+    """Test session lifecycle, idle expiry and eviction."""
+
+    def test_create_get_delete(self):
+        """Test sessions can be looked up until deleted."""
+        store = SessionStore()
+        session = store.create("gemini-test", chat=object())
+        assert store.get(session.session_id) is session
+        store.delete(session.session_id)
+        with pytest.raises(KeyError):
+            store.get(session.session_id)
+
+    def test_idle_sessions_expire(self):
+        """Test sessions without turns for longer than the timeout are dropped."""
+        clock = FakeClock()
+        store = SessionStore(idle_timeout_seconds=60, clock=clock)
+        idle = store.create("m", chat=object())
+        active = store.create("m", chat=object())
+
+        clock.now = 50
+        store.record_turn(active, 10)
+        clock.now = 100
+
+        with pytest.raises(KeyError):
+            store.get(idle.session_id)
+        assert store.get(active.session_id) is active
+        assert store.stats()["expired"] == 1
+
+    def test_count_cap_evicts_least_recently_used(self):
+        """Test the least recently used session is evicted past the session cap."""
+        store = SessionStore(max_sessions=2)
+        first = store.create("m", chat=object())
+        second = store.create("m", chat=object())
+        store.get(first.session_id)
+        store.create("m", chat=object())
+
+        assert first.session_id in store
+        assert second.session_id not in store
+        assert store.stats()["evicted"] == 1
+
+    def test_memory_cap_evicts_other_sessions(self):
+        """Test growing history evicts other sessions but never the active one."""
+        store = SessionStore(memory_budget_bytes=100)
+        other = store.create("m", chat=object())
+        active = store.create("m", chat=object())
+        store.record_turn(other, 60)
+        store.record_turn(active, 60)
+
+        assert other.session_id not in store
+        assert active.session_id in store
+
+        store.record_turn(active, 100)
+        assert active.session_id in store
+        assert store.stats()["memory_bytes"] == 160
+
+    def test_turn_on_ended_session_is_not_recorded(self):
+        """Test recording a turn for a deleted or evicted session is a no-op."""
+        store = SessionStore(max_sessions=1)
+        deleted = store.create("m", chat=object())
+        store.delete(deleted.session_id)
+        assert store.record_turn(deleted, 10) is False
+
+        evicted = store.create("m", chat=object())
+        live = store.create("m", chat=object())
+        assert store.record_turn(evicted, 10) is False
+        assert store.record_turn(live, 10) is True
+        assert evicted.turns == 0
+        assert store.stats()["memory_bytes"] == 10
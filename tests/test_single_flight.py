@@ -0,0 +1,85 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import pytest
+from backend.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test sharing of in-flight calls."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical concurrent keys run the function once."""
+        group = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return {"response": "ok"}
+
+        async def main():
+            return await asyncio.gather(*(group.do("k", work) for _ in range(5)))
+
+        results = asyncio.run(main())
+        assert runs == 1
+        assert all(result == {"response": "ok"} for result, _ in results)
+        assert [shared for _, shared in results].count(False) == 1
+        assert group.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_different_keys_and_later_calls_run_separately(self):
+        """Test only calls overlapping in time on the same key are coalesced."""
+        group = SingleFlight()
+        runs = []
+
+        async def work(name):
+            runs.append(name)
+            await asyncio.sleep(0)
+            return name
+
+        async def main():
+            await asyncio.gather(group.do("a", lambda: work("a")), group.do("b", lambda: work("b")))
+            await group.do("a", lambda: work("a"))
+
+        asyncio.run(main())
+        assert sorted(runs) == ["a", "a", "b"]
+        assert group.stats()["coalesced"] == 0
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test a failing call raises for all callers and is not remembered."""
+        group = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota exceeded")
+
+        async def main():
+            return await asyncio.gather(
+                *(group.do("k", fail) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert group.stats()["in_flight"] == 0
+
+    def test_cancelled_caller_does_not_cancel_shared_call(self):
+        """Test the shared call finishes for others when its starter is cancelled."""
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def main():
+            first = asyncio.ensure_future(group.do("k", work))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(group.do("k", work))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(main()) == ("done", True)
@@ -0,0 +1,215 @@
+"""Tests for the sharded Techaura backfill."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from backend.services.techaura_backfill import backfill_sales, date_shards, is_retryable
+from backend.services.techaura_state import SyncStateStore
+from backend.services.techaura_sync import TechauraClient
+
+
+async def _no_sleep(seconds):
+    return None
+
+
+class ShardedApi:
+    """Fake Techaura API returning one sale per shard, slower for earlier shards."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def handle(self, request):
+        inicio = request.url.params["fecha_inicio"]
+        self.calls.append(inicio)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            day = datetime.fromisoformat(inicio).day
+            await asyncio.sleep(0.001 * (40 - day))
+            statuses = self.failures.get(inicio)
+            if statuses:
+                status = statuses.pop(0)
+                if status == "invalid-json":
+                    return httpx.Response(200, content=b"{not json")
+                return httpx.Response(status, json={})
+            sale = {"id": f"SALE-{inicio}", "fecha": inicio, "subtotal": 100.0, "impuestos": 19.0}
+            return httpx.Response(200, json={"data": [sale]})
+        finally:
+            self.in_flight -= 1
+
+    def client(self):
+        return TechauraClient(
+            api_key="real-key",
+            api_url="https://techaura.test",
+            company_id="acme",
+            async_transport=httpx.MockTransport(self.handle),
+        )
+
+
+class TestDateShards:
+    """Test splitting a period into shards."""
+
+    def test_consecutive_shards(self):
+        """Test that shards cover the period without gaps and the last one is shorter."""
+        shards = date_shards(datetime(2024, 1, 1), datetime(2024, 1, 20), 7)
+
+        assert shards == [
+            (datetime(2024, 1, 1), datetime(2024, 1, 8)),
+            (datetime(2024, 1, 8), datetime(2024, 1, 15)),
+            (datetime(2024, 1, 15), datetime(2024, 1, 20)),
+        ]
+
+    def test_invalid_shard_length(self):
+        """Test that a non-positive shard length is rejected."""
+        with pytest.raises(ValueError):
+            date_shards(datetime(2024, 1, 1), datetime(2024, 1, 2), 0)
+
+    def test_retryable_errors(self):
+        """Test that transport errors, 429 and 5xx are retried but other statuses are not."""
+        request = httpx.Request("GET", "https://techaura.test")
+
+        def status_error(status):
+            response = httpx.Response(status, request=request)
+            return httpx.HTTPStatusError("error", request=request, response=response)
+
+        assert is_retryable(httpx.ConnectError("down"))
+        assert is_retryable(status_error(503))
+        assert is_retryable(status_error(429))
+        assert not is_retryable(status_error(400))
+
+
+class TestBackfill:
+    """Test concurrent sharded backfill."""
+
+    def test_merges_in_date_order_with_bounded_concurrency(self):
+        """Test that shards finishing out of order are handed on in date order."""
+        api = ShardedApi()
+        received, updates = [], []
+
+        result = asyncio.run(
+            backfill_sales(
+                api.client(),
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 31),
+                sink=received.append,
+                progress=updates.append,
+                shard_days=1,
+                concurrency=4,
+            )
+        )
+
+        dates = [record["fecha"] for page in received for record in page]
+        assert dates == [(datetime(2024, 1, 1) + timedelta(days=i)).isoformat() for i in range(30)]
+        assert 1 < api.max_in_flight <= 4
+        assert result["summary"]["total_registros"] == 30
+        assert result["summary"]["total_ventas"] == 3000.0
+        assert [update["shards_completados"] for update in updates] == list(range(1, 31))
+        assert updates[-1]["shards_totales"] == 30
+
+    def test_retries_failed_shards_independently(self):
+        """Test that a transient failure only re-fetches its own shard."""
+        flaky = datetime(2024, 1, 3).isoformat()
+        api = ShardedApi(failures={flaky: [503, 503]})
+
+        result = asyncio.run(
+            backfill_sales(
+                api.client(),
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 6),
+                shard_days=1,
+                max_attempts=3,
+                sleep=_no_sleep,
+            )
+        )
+
+        assert result["summary"]["total_registros"] == 5
+        assert result["summary"]["reintentos"] == 2
+        assert result["summary"]["shards_fallidos"] == []
+        assert api.calls.count(flaky) == 3
+        assert len(api.calls) == 7
+
+    def test_failed_shard_is_reported_and_watermark_kept(self, tmp_path):
+        """Test that a permanently failing shard is skipped and blocks the watermark."""
+        broken = datetime(2024, 1, 2).isoformat()
+        api = ShardedApi(failures={broken: [400]})
+        store = SyncStateStore(str(tmp_path / "state.db"))
+
+        result = asyncio.run(
+            backfill_sales(
+                api.client(),
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 4),
+                store=store,
+                shard_days=1,
+                sleep=_no_sleep,
+            )
+        )
+
+        failed = result["summary"]["shards_fallidos"]
+        assert [shard["desde"] for shard in failed] == [broken]
+        assert failed[0]["intentos"] == 1
+        assert store.count("acme") == 2
+        assert store.get_watermark("acme") is None
+        store.close()
+
+    def test_malformed_shard_fails_alone(self, tmp_path):
+        """Test that a shard answering invalid JSON is reported without aborting the backfill."""
+        broken = datetime(2024, 1, 2).isoformat()
+        api = ShardedApi(failures={broken: ["invalid-json"]})
+        store = SyncStateStore(str(tmp_path / "state.db"))
+
+        result = asyncio.run(
+            backfill_sales(
+                api.client(),
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 5),
+                store=store,
+                shard_days=1,
+                sleep=_no_sleep,
+            )
+        )
+
+        assert result["summary"]["total_registros"] == 3
+        assert [shard["desde"] for shard in result["summary"]["shards_fallidos"]] == [broken]
+        assert result["summary"]["shards_fallidos"][0]["intentos"] == 1
+        assert api.calls.count(broken) == 1
+        assert store.get_watermark("acme") is None
+        store.close()
+
+    def test_stub_backfill_into_store(self, tmp_path):
+        """Test a stub-mode backfill of a year into the sync state store."""
+        store = SyncStateStore(str(tmp_path / "state.db"))
+        client = TechauraClient(api_key="stub_api_key", company_id="acme")
+
+        result = asyncio.run(
+            backfill_sales(
+                client, datetime(2023, 1, 1), datetime(2024, 1, 1), store=store, concurrency=8
+            )
+        )
+
+        assert result["summary"]["total_registros"] == 365
+        assert result["summary"]["shards"] == 53
+        assert store.count("acme") == 365
+        assert store.get_watermark("acme")[1] == "SALE-20231231"
+        store.close()
+
+    def test_stub_totals_do_not_depend_on_sharding(self):
+        """Test that stub backfills of one period agree however it is sharded."""
+        client = TechauraClient(api_key="stub_api_key", company_id="acme")
+
+        summaries = [
+            asyncio.run(
+                backfill_sales(client, datetime(2023, 1, 1), datetime(2023, 7, 1), shard_days=days)
+            )["summary"]
+            for days in (3, 7, 30)
+        ]
+
+        assert {summary["total_registros"] for summary in summaries} == {181}
+        assert len({summary["total_ventas"] for summary in summaries}) == 1
+        assert len({summary["total_impuestos"] for summary in summaries}) == 1
@@ -0,0 +1,118 @@
+"""Tests for the persisted Techaura sync state."""
+
+import pytest
+
+from backend.services.techaura_state import SyncStateStore, watermark_key
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Sync state store in a temporary SQLite file."""
+    store = SyncStateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+def _record(venta_id, fecha="2024-03-01T10:00:00", total=100.0):
+    return {
+        "venta_id": venta_id,
+        "fecha": fecha,
+        "cliente": "Cliente",
+        "subtotal": total,
+        "impuestos": total * 0.19,
+        "total": total * 1.19,
+        "metodo_pago": "Tarjeta",
+    }
+
+
+class TestSyncStateStore:
+    """Test watermarks and sale upserts."""
+
+    def test_watermark_round_trip(self, store):
+        """Test that watermarks are stored per company and overwritten."""
+        assert store.get_watermark("acme") is None
+
+        store.set_watermark("acme", "2024-03-01T10:00:00", "SALE-1")
+        store.set_watermark("acme", "2024-03-02T10:00:00", "SALE-2")
+        store.set_watermark("other", "2024-01-01T00:00:00", "SALE-9")
+
+        assert store.get_watermark("acme") == ("2024-03-02T10:00:00", "SALE-2")
+        assert store.get_watermark("other") == ("2024-01-01T00:00:00", "SALE-9")
+
+    def test_upsert_is_idempotent(self, store):
+        """Test that re-synced sales update the stored row instead of duplicating it."""
+        assert store.upsert_sales("acme", [_record("SALE-1"), _record("SALE-2")]) == 2
+        assert store.upsert_sales("acme", [_record("SALE-2", total=250.0), _record("SALE-3")]) == 1
+
+        records = list(store.records("acme"))
+
+        assert [record["venta_id"] for record in records] == ["SALE-1", "SALE-2", "SALE-3"]
+        assert records[1]["subtotal"] == 250.0
+        assert store.count("acme") == 3
+        assert store.count("other") == 0
+
+    def test_state_persists_across_connections(self, tmp_path):
+        """Test that watermarks and sales survive reopening the file."""
+        path = str(tmp_path / "state.db")
+        store = SyncStateStore(path)
+        store.upsert_sales("acme", [_record("SALE-1")])
+        store.set_watermark("acme", "2024-03-01T10:00:00", "SALE-1")
+        store.close()
+
+        reopened = SyncStateStore(path)
+
+        assert reopened.get_watermark("acme") == ("2024-03-01T10:00:00", "SALE-1")
+        assert reopened.count("acme") == 1
+        reopened.close()
+
+    def test_records_ordered_by_instant(self, store):
+        """Test that stored sales come back ordered by instant, not by date spelling."""
+        store.upsert_sales(
+            "acme",
+            [
+                _record("SALE-1", fecha="2024-03-01T10:00:00.500Z"),
+                _record("SALE-2", fecha="2024-03-01T11:00:00+02:00"),
+                _record("SALE-3", fecha="2024-03-01T10:00:00Z"),
+            ],
+        )
+
+        assert [record["venta_id"] for record in store.records("acme")] == [
+            "SALE-2",
+            "SALE-3",
+            "SALE-1",
+        ]
+
+    def test_reset(self, store):
+        """Test that a reset forgets only that company's state."""
+        store.upsert_sales("acme", [_record("SALE-1")])
+        store.upsert_sales("other", [_record("SALE-1")])
+        store.set_watermark("acme", "2024-03-01T10:00:00", "SALE-1")
+
+        store.reset("acme")
+
+        assert store.get_watermark("acme") is None
+        assert store.count("acme") == 0
+        assert store.count("other") == 1
+
+
+class TestWatermarkKey:
+    """Test the ordering of sales for watermarks."""
+
+    @pytest.mark.parametrize(
+        "older, newer",
+        [
+            ("2024-03-01T10:00:00.500000Z", "2024-03-01T10:00:01+00:00"),
+            ("2024-03-01T10:00:00+00:00", "2024-03-01T10:00:00.000001Z"),
+            ("2024-03-01T11:00:00+02:00", "2024-03-01T10:00:00"),
+            ("not a date", "2024-01-01"),
+        ],
+    )
+    def test_orders_by_instant(self, older, newer):
+        """Test that sales are ordered by instant whatever the ISO spelling."""
+        assert watermark_key(older, "SALE-9") < watermark_key(newer, "SALE-1")
+
+    def test_same_instant_ties_on_venta_id(self):
+        """Test that equal instants in different spellings fall back to the sale ID."""
+        assert watermark_key("2024-03-01T10:00:00Z", "SALE-1") < watermark_key(
+            "2024-03-01T10:00:00.000+00:00", "SALE-2"
+        )
@@ -1,9 +1,42 @@
 """Tests for Techaura sales sync service."""
 
-import pytest
+import asyncio
+import socket
+import threading
+import time
 from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import uvicorn
+
+from backend.config import settings
+from backend.services import techaura_sync
+from backend.services.techaura_replay import TechauraReplay
+from backend.services.techaura_state import SyncStateStore
 from backend.services.techaura_sync import TechauraClient, get_techaura_client
 
+SALES_PATH = "/api/v1/companies/acme/sales"
+RECORDED_SALE = {
+    "id": "SALE-1",
+    "fecha": "2024-03-01T10:00:00",
+    "cliente_nit": "900123456-7",
+    "productos": [{"sku": "PROD-1", "cantidad": 2, "precio_unitario": 500.0}],
+    "subtotal": 1000.0,
+    "impuestos": 190.0,
+    "total": 1190.0,
+    "estado": "completada",
+}
+RECORDINGS = [
+    {"method": "GET", "path": SALES_PATH, "status": 200, "body": {"data": [RECORDED_SALE]}},
+    {
+        "method": "GET",
+        "path": "/api/v1/sales/SALE-1",
+        "status": 200,
+        "body": {"data": RECORDED_SALE},
+    },
+]
+
 
 @pytest.fixture
 def techaura_client():
@@ -107,11 +140,27 @@ class TestTechauraClient:
             assert "total" in sale
             assert sale["total"] > 0
 
+    def test_mock_sales_agree_across_overlapping_periods(self, techaura_client):
+        """Test that a stub sale is identical whichever period or page returns it."""
+        january = techaura_client._generate_mock_sales(
+            datetime(2024, 1, 1), datetime(2024, 2, 1), 31
+        )
+        late_january = techaura_client._generate_mock_sales(
+            datetime(2024, 1, 1), datetime(2024, 2, 1), 10, offset=21
+        )
+        from_mid_january = techaura_client._generate_mock_sales(
+            datetime(2024, 1, 15), datetime(2024, 3, 1), 17
+        )
+
+        assert late_january == january[21:]
+        assert from_mid_january == january[14:]
+
     def test_get_techaura_client_factory(self):
         """Test client factory function."""
         client = get_techaura_client()
         assert client is not None
         assert isinstance(client, TechauraClient)
+        assert get_techaura_client() is client
 
     def test_financial_data_calculations(self, techaura_client):
         """Test that financial calculations are correct."""
@@ -138,3 +187,332 @@ class TestTechauraClient:
             assert isinstance(sale["impuestos"], (int, float))
             assert isinstance(sale["total"], (int, float))
             assert isinstance(sale["productos"], list)
+
+
+@pytest.fixture
+def replay():
+    """Replay of recorded Techaura responses."""
+    return TechauraReplay(RECORDINGS)
+
+
+def _replay_client(replay, **kwargs):
+    transport = replay.transport()
+    return TechauraClient(
+        api_key="real-key",
+        api_url="https://techaura.test",
+        company_id="acme",
+        transport=transport,
+        async_transport=transport,
+        **kwargs,
+    )
+
+
+class TestTechauraHttp:
+    """Test Techaura requests against recorded responses."""
+
+    def test_get_sales_sends_auth_and_params(self, replay):
+        """Test that sales are fetched with the bearer token and date range."""
+        client = _replay_client(replay)
+
+        sales = client.get_sales(datetime(2024, 3, 1), datetime(2024, 3, 31), limit=10)
+
+        assert sales == [RECORDED_SALE]
+        request = replay.requests[0]
+        assert request["headers"]["authorization"] == "Bearer real-key"
+        assert request["query"] == {
+            "fecha_inicio": "2024-03-01T00:00:00",
+            "fecha_fin": "2024-03-31T00:00:00",
+            "limit": "10",
+        }
+
+    def test_async_variants(self, replay):
+        """Test async sales and concurrent sale detail fetches."""
+        client = _replay_client(replay)
+
+        async def fetch():
+            async with client:
+                sales = await client.get_sales_async(limit=10)
+                details = await asyncio.gather(
+                    *(client.get_sale_details_async(sale["id"]) for sale in sales * 3)
+                )
+            return sales, details
+
+        sales, details = asyncio.run(fetch())
+
+        assert sales == [RECORDED_SALE]
+        assert details == [RECORDED_SALE] * 3
+        assert len(replay.requests) == 4
+
+    def test_missing_sale_returns_none(self, replay):
+        """Test that a 404 for a sale detail means not found."""
+        client = _replay_client(replay)
+
+        assert client.get_sale_details("SALE-404") is None
+        assert asyncio.run(client.get_sale_details_async("SALE-404")) is None
+
+    def test_server_errors_raise(self):
+        """Test that non-404 error statuses surface as HTTP errors."""
+        replay = TechauraReplay([{"path": SALES_PATH, "status": 503, "body": {}}])
+        client = _replay_client(replay)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_sales()
+
+    def test_http2_requires_h2(self, monkeypatch):
+        """Test that HTTP/2 is only enabled when the h2 package is installed."""
+        monkeypatch.setattr(techaura_sync, "http2_available", lambda: False)
+        assert TechauraClient(api_key="real-key", http2=True).http2 is False
+
+        monkeypatch.setattr(techaura_sync, "http2_available", lambda: True)
+        assert TechauraClient(api_key="real-key", http2=True).http2 is True
+        assert TechauraClient(api_key="real-key", http2=False).http2 is False
+
+    def test_connections_are_kept_alive(self, replay):
+        """Test that sequential requests to a real server reuse one pooled connection."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(
+            uvicorn.Config(replay, host="127.0.0.1", port=port, log_level="warning")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not server.started and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        try:
+            client = TechauraClient(
+                api_key="real-key", api_url=f"http://127.0.0.1:{port}", company_id="acme"
+            )
+            with client:
+                for _ in range(5):
+                    assert client.get_sale_details("SALE-1") == RECORDED_SALE
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+        assert len(replay.requests) == 5
+        assert len({request["client"] for request in replay.requests}) == 1
+
+
+def _sale(number):
+    return {**RECORDED_SALE, "id": f"SALE-{number}"}
+
+
+OFFSET_RECORDINGS = [
+    {
+        "path": SALES_PATH,
+        "query": {"offset": offset, "limit": 2},
+        "body": {"data": [_sale(n) for n in range(offset, min(offset + 2, 5))]},
+    }
+    for offset in range(0, 10, 2)
+]
+CURSOR_RECORDINGS = [
+    {
+        "path": SALES_PATH,
+        "query": {"cursor": "c2"},
+        "body": {"data": [_sale(3)], "pagination": {"next_cursor": None}},
+    },
+    {
+        "path": SALES_PATH,
+        "query": {"cursor": "c1"},
+        "body": {"data": [_sale(2)], "pagination": {"next_cursor": "c2"}},
+    },
+    {"path": SALES_PATH, "body": {"data": [_sale(1)], "next_cursor": "c1"}},
+]
+
+
+class TestSalesPagination:
+    """Test paginated sales streaming."""
+
+    def test_stub_pages_cover_period(self, techaura_client):
+        """Test that stub mode pages through one mock sale per day."""
+        pages = list(
+            techaura_client.iter_sales_pages(
+                datetime(2024, 1, 1), datetime(2024, 4, 5), page_size=10, prefetch=3
+            )
+        )
+
+        assert [len(page) for page in pages] == [10] * 9 + [5]
+        ids = [sale["id"] for page in pages for sale in page]
+        assert ids == [f"SALE-{datetime(2024, 1, 1) + timedelta(days=i):%Y%m%d}" for i in range(95)]
+
+    def test_offset_pages_in_order(self):
+        """Test offset paging with prefetch stops at the first short page."""
+        replay = TechauraReplay(OFFSET_RECORDINGS)
+        client = _replay_client(replay)
+
+        pages = list(client.iter_sales_pages(page_size=2, prefetch=3))
+
+        assert [[sale["id"] for sale in page] for page in pages] == [
+            ["SALE-0", "SALE-1"],
+            ["SALE-2", "SALE-3"],
+            ["SALE-4"],
+        ]
+        assert all(request["query"]["limit"] == "2" for request in replay.requests)
+
+    def test_async_offset_pages(self):
+        """Test the async iterator yields the same pages."""
+        client = _replay_client(TechauraReplay(OFFSET_RECORDINGS))
+
+        async def collect():
+            return [page async for page in client.aiter_sales_pages(page_size=2, prefetch=2)]
+
+        pages = asyncio.run(collect())
+
+        assert [sale["id"] for page in pages for sale in page] == [f"SALE-{i}" for i in range(5)]
+
+    def test_cursor_pages(self):
+        """Test that a next_cursor is followed until it is null."""
+        replay = TechauraReplay(CURSOR_RECORDINGS)
+        client = _replay_client(replay)
+
+        sync_ids = [sale["id"] for page in client.iter_sales_pages() for sale in page]
+
+        async def collect():
+            return [sale["id"] async for page in client.aiter_sales_pages() for sale in page]
+
+        assert sync_ids == ["SALE-1", "SALE-2", "SALE-3"]
+        assert asyncio.run(collect()) == sync_ids
+        assert [request["query"].get("cursor") for request in replay.requests[:3]] == [
+            None,
+            "c1",
+            "c2",
+        ]
+
+    def test_stopping_early(self, techaura_client):
+        """Test that abandoning the iterator does not fetch the whole period."""
+        pages = techaura_client.iter_sales_pages(
+            datetime(2020, 1, 1), datetime(2024, 1, 1), page_size=5, prefetch=2
+        )
+
+        first = next(pages)
+        pages.close()
+
+        assert len(first) == 5
+
+    def test_sync_streams_into_sink(self, techaura_client):
+        """Test that a sink receives every page and totals are aggregated incrementally."""
+        received = []
+        fecha_inicio, fecha_fin = datetime(2024, 1, 1), datetime(2024, 12, 31)
+
+        streamed = techaura_client.sync_sales_to_financial_data(
+            fecha_inicio, fecha_fin, sink=received.append, page_size=50
+        )
+        collected = techaura_client.sync_sales_to_financial_data(fecha_inicio, fecha_fin)
+
+        assert streamed["data"] == []
+        assert [len(page) for page in received] == [50] * 7 + [15]
+        assert [record for page in received for record in page] == collected["data"]
+        assert streamed["summary"] == collected["summary"]
+        assert streamed["summary"]["total_registros"] == 365
+
+
+def _dated_sale(number, day):
+    return {**RECORDED_SALE, "id": f"SALE-{number}", "fecha": f"2024-03-{day:02d}T10:00:00"}
+
+
+INCREMENTAL_RECORDINGS = [
+    {
+        "path": SALES_PATH,
+        "query": {"fecha_inicio": "2024-03-03T09:50:00"},
+        "body": {"data": [_dated_sale(3, 3), _dated_sale(4, 4)]},
+    },
+    {
+        "path": SALES_PATH,
+        "body": {"data": [_dated_sale(1, 1), _dated_sale(2, 2), _dated_sale(3, 3)]},
+    },
+]
+
+
+class TestIncrementalSync:
+    """Test incremental sync from persisted watermarks."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """Sync state store in a temporary SQLite file."""
+        store = SyncStateStore(str(tmp_path / "state.db"))
+        yield store
+        store.close()
+
+    def test_delta_fetch_from_watermark(self, store, monkeypatch):
+        """Test that the second sync only fetches from the watermark (minus the overlap)."""
+        monkeypatch.setattr(settings, "techaura_sync_overlap_seconds", 600)
+        replay = TechauraReplay(INCREMENTAL_RECORDINGS)
+        client = _replay_client(replay)
+
+        first = client.sync_incremental(store, fecha_inicio=datetime(2024, 3, 1))
+        second = client.sync_incremental(store)
+
+        assert first["summary"]["modo"] == "completo"
+        assert first["summary"]["registros_nuevos"] == 3
+        assert second["summary"]["modo"] == "incremental"
+        assert replay.requests[-1]["query"]["fecha_inicio"] == "2024-03-03T09:50:00"
+        assert second["summary"]["total_registros"] == 2
+        assert second["summary"]["registros_nuevos"] == 1
+        assert second["summary"]["registros_almacenados"] == 4
+        assert store.get_watermark("acme") == ("2024-03-04T10:00:00", "SALE-4")
+
+    def test_full_resync(self, store):
+        """Test that a full resync ignores the watermark and re-fetches the period."""
+        client = _replay_client(TechauraReplay(INCREMENTAL_RECORDINGS))
+        store.set_watermark("acme", "2024-03-03T10:00:00", "SALE-3")
+        store.upsert_sales("acme", [{"venta_id": "SALE-GONE", "fecha": "2024-02-01"}])
+
+        result = client.sync_incremental(store, full_resync=True, fecha_inicio=datetime(2024, 3, 1))
+
+        assert result["summary"]["modo"] == "completo"
+        assert [record["venta_id"] for record in store.records("acme")] == [
+            "SALE-1",
+            "SALE-2",
+            "SALE-3",
+        ]
+        assert store.get_watermark("acme") == ("2024-03-03T10:00:00", "SALE-3")
+
+    def test_failed_sync_keeps_watermark(self, store):
+        """Test that the watermark does not advance when the sync fails midway."""
+        client = _replay_client(TechauraReplay([{"path": SALES_PATH, "status": 500}]))
+        store.set_watermark("acme", "2024-03-03T10:00:00", "SALE-3")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            client.sync_incremental(store)
+
+        assert store.get_watermark("acme") == ("2024-03-03T10:00:00", "SALE-3")
+
+    def test_aware_watermark_delta_fetch(self, store, monkeypatch):
+        """Test that a watermark with a UTC offset starts a naive UTC window."""
+        monkeypatch.setattr(settings, "techaura_sync_overlap_seconds", 600)
+        replay = TechauraReplay(INCREMENTAL_RECORDINGS)
+        store.set_watermark("acme", "2024-03-03T10:00:00+00:00", "SALE-3")
+
+        result = _replay_client(replay).sync_incremental(store)
+
+        assert result["summary"]["modo"] == "incremental"
+        assert replay.requests[-1]["query"]["fecha_inicio"] == "2024-03-03T09:50:00"
+        assert store.get_watermark("acme") == ("2024-03-04T10:00:00", "SALE-4")
+
+    def test_unparseable_watermark_fetches_whole_window(self, store):
+        """Test that a watermark whose date cannot be parsed falls back to a full sync."""
+        replay = TechauraReplay(INCREMENTAL_RECORDINGS)
+        store.set_watermark("acme", "15/03/2024", "SALE-X")
+
+        result = _replay_client(replay).sync_incremental(store, fecha_inicio=datetime(2024, 3, 1))
+
+        assert result["summary"]["modo"] == "completo"
+        assert replay.requests[-1]["query"]["fecha_inicio"] == "2024-03-01T00:00:00"
+        assert store.get_watermark("acme") == ("2024-03-03T10:00:00", "SALE-3")
+
+    @pytest.mark.parametrize(
+        "stale_fecha", ["2024-03-03T10:00:00Z", "2024-03-03T12:00:00+02:00", "2024-03-03T10:00:00"]
+    )
+    def test_watermark_never_moves_backwards_across_formats(self, store, stale_fecha):
+        """Test that an older sale spelled differently does not replace the watermark."""
+        stale = {**RECORDED_SALE, "id": "SALE-9", "fecha": stale_fecha}
+        client = _replay_client(TechauraReplay([{"path": SALES_PATH, "body": {"data": [stale]}}]))
+        store.set_watermark("acme", "2024-03-03T10:00:00.250+00:00", "SALE-3")
+
+        result = client.sync_incremental(store)
+
+        assert result["summary"]["registros_nuevos"] == 1
+        assert store.get_watermark("acme") == ("2024-03-03T10:00:00.250+00:00", "SALE-3")
@@ -0,0 +1,178 @@
+"""Tests for tool result memoization."""
+
+import asyncio
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import routes
+from backend.main import app
+from backend.services import tool_cache as tool_cache_module
+from backend.services.tool_cache import ToolCache, make_tool_key
+from backend.tools.financial_tools import financial_tools
+
+
+def counting_run(result):
+    """Async tool runner returning ``result`` and counting its calls."""
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return result
+
+    return run, calls
+
+
+class TestMakeToolKey:
+    """Tests for tool call keys."""
+
+    def test_argument_order_and_integral_floats_do_not_matter(self):
+        """Test that equivalent arguments share a key."""
+        first = make_tool_key("simple_dcf_projection", {"periodos": 5, "tasa_descuento": 10})
+        second = make_tool_key("simple_dcf_projection", {"tasa_descuento": 10.0, "periodos": 5.0})
+        assert first == second
+
+    def test_tool_and_dataset_version_are_part_of_the_key(self):
+        """Test that different tools or dataset versions get different keys."""
+        args = {"dataset_name": "main", "column": "ingresos"}
+        assert make_tool_key("analyze_trend", args, 1) != make_tool_key("analyze_trend", args, 2)
+        assert make_tool_key("analyze_trend", args, 1) != make_tool_key(
+            "calculate_ratios_table", args, 1
+        )
+
+
+class TestToolCache:
+    """Tests for the tool cache."""
+
+    def test_repeated_calls_hit(self):
+        """Test that a repeated call is answered from the cache."""
+        cache = ToolCache()
+        run, calls = counting_run({"roe": 20.0})
+
+        for _ in range(3):
+            result = asyncio.run(cache.call("calculate_profitability_ratios", {"x": 1}, run))
+
+        assert result == {"roe": 20.0}
+        assert len(calls) == 1
+        tool = cache.stats()["tools"]["calculate_profitability_ratios"]
+        assert (tool["hits"], tool["misses"]) == (2, 1)
+        assert tool["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used result is evicted when full."""
+        cache = ToolCache(max_entries=2)
+        run, calls = counting_run(1)
+
+        for value in (1, 2, 1, 3, 1):
+            asyncio.run(cache.call("generate_risk_alerts", {"value": value}, run))
+
+        assert len(cache) == 2
+        assert cache.stats()["evictions"] == 1
+        assert len(calls) == 3
+
+    def test_failures_are_not_cached(self):
+        """Test that a call that raises is retried next time."""
+        cache = ToolCache()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            raise RuntimeError("boom")
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                asyncio.run(cache.call("simple_dcf_projection", {}, failing))
+
+        assert len(attempts) == 2
+        assert len(cache) == 0
+
+    def test_result_not_cached_when_version_changes_during_run(self):
+        """Test that a result is not stored under a dataset version replaced mid-call."""
+        cache = ToolCache()
+        versions = [1]
+        run, calls = counting_run({"tendencia": "creciente"})
+
+        async def replacing_run():
+            versions.append(versions[-1] + 1)
+            return await run()
+
+        asyncio.run(cache.call("analyze_trend", {}, replacing_run, 1, lambda: versions[-1]))
+        assert len(cache) == 0
+
+        asyncio.run(cache.call("analyze_trend", {}, run, 2, lambda: versions[-1]))
+        assert len(cache) == 1
+
+
+class TestExecuteToolMemoization:
+    """Tests for memoization in the API tool dispatcher."""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        """Fresh shared tool cache."""
+        cache = ToolCache()
+        monkeypatch.setattr(tool_cache_module, "_tool_cache", cache)
+        return cache
+
+    def test_defaults_are_canonicalized(self, cache):
+        """Test that omitting a default argument matches passing it explicitly."""
+        args = {"flujo_caja_actual": 100000, "tasa_crecimiento": 5, "tasa_descuento": 10}
+        first = asyncio.run(routes.execute_tool("simple_dcf_projection", args))
+        second = asyncio.run(routes.execute_tool("simple_dcf_projection", {**args, "periodos": 5}))
+
+        assert first == second
+        assert cache.stats()["tools"]["simple_dcf_projection"]["hits"] == 1
+
+    def test_restoring_a_dataset_invalidates_results(self, cache):
+        """Test that dataset tools recompute after the dataset is stored again."""
+        name = "tool_cache_trend"
+        financial_tools.store_dataframe(pd.DataFrame({"ingresos": [100.0, 110.0]}), name)
+        args = {"dataset_name": name, "column": "ingresos"}
+
+        first = asyncio.run(routes.execute_tool("analyze_trend", args))
+        again = asyncio.run(routes.execute_tool("analyze_trend", args))
+        financial_tools.store_dataframe(pd.DataFrame({"ingresos": [100.0, 150.0]}), name)
+        after = asyncio.run(routes.execute_tool("analyze_trend", args))
+
+        assert again == first
+        assert after != first
+        tool = cache.stats()["tools"]["analyze_trend"]
+        assert (tool["hits"], tool["misses"]) == (1, 2)
+
+    def test_dataset_replaced_mid_call_is_not_cached_as_old_version(self, cache, monkeypatch):
+        """Test that a result computed on data stored mid-call is not served for the old data."""
+        name = "tool_cache_race"
+        financial_tools.store_dataframe(pd.DataFrame({"ingresos": [100.0, 110.0]}), name)
+        args = {"dataset_name": name, "column": "ingresos"}
+        analyze = financial_tools.analyze_trend
+
+        def replacing_analyze(**kwargs):
+            financial_tools.store_dataframe(pd.DataFrame({"ingresos": [100.0, 200.0]}), name)
+            return analyze(**kwargs)
+
+        monkeypatch.setattr(financial_tools, "analyze_trend", replacing_analyze)
+        raced = asyncio.run(routes.execute_tool("analyze_trend", args))
+        monkeypatch.setattr(financial_tools, "analyze_trend", analyze)
+
+        assert len(cache) == 0
+        assert asyncio.run(routes.execute_tool("analyze_trend", args)) == raced
+        assert len(cache) == 1
+
+    def test_invalid_arguments_are_not_cached(self, cache):
+        """Test that calls not matching the tool signature bypass the cache."""
+        with pytest.raises(TypeError):
+            asyncio.run(routes.execute_tool("calculate_liquidity_ratios", {"unknown": 1}))
+        assert len(cache) == 0
+
+    def test_stats_endpoint(self, cache):
+        """Test the tool cache statistics endpoint."""
+        args = {"activos_corrientes": 150000, "pasivos_corrientes": 100000}
+        for _ in range(2):
+            asyncio.run(routes.execute_tool("calculate_liquidity_ratios", args))
+
+        response = TestClient(app).get("/api/tools/cache/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["hits"] == 1
+        assert data["tools"]["calculate_liquidity_ratios"]["hit_rate"] == 0.5
@@ -0,0 +1,443 @@
+"""Tests for the Vertex AI service function-calling loop."""
+
+import asyncio
+
+import pytest
+from backend.models.schemas import Message
+from backend.services.model_registry import ModelRegistry
+from backend.services import vertex_ai
+from backend.services.resilience import ResiliencePolicy
+from backend.services.vertex_ai import VertexAIService
+from vertexai.preview import generative_models
+
+
+def function_call_response(*calls):
+    """Build a model response requesting the given (name, args) function calls."""
+    parts = [{"function_call": {"name": name, "args": args}} for name, args in calls]
+    return generative_models.GenerationResponse.from_dict(
+        {"candidates": [{"content": {"role": "model", "parts": parts}}]}
+    )
+
+
+def text_response(text):
+    """Build a plain text model response."""
+    return generative_models.GenerationResponse.from_dict(
+        {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+    )
+
+
+class FakeChat:
+    """Chat session replaying scripted responses and recording what was sent."""
+
+    def __init__(self, responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.sent = []
+        self.configs = []
+        self.history = []
+
+    async def send_message_async(self, content, generation_config=None, stream=False):
+        self.sent.append(content)
+        self.configs.append(generation_config)
+        await asyncio.sleep(self.delay)
+        response = self.responses.pop(0)
+        if stream:
+            return aiter_chunks(response)
+        return response
+
+
+async def aiter_chunks(chunks):
+    """Replay a list of streamed response chunks."""
+    for chunk in chunks:
+        yield chunk
+
+
+class HistoryChat(FakeChat):
+    """Scripted chat that keeps its history like the SDK and raises scripted errors."""
+
+    async def send_message_async(self, content, generation_config=None, stream=False):
+        response = await super().send_message_async(content, generation_config, stream)
+        if isinstance(response, Exception):
+            raise response
+        self.history.extend([content, response])
+        return response
+
+
+class StallingStreamChat(FakeChat):
+    """Scripted chat whose first stream stalls before its first chunk."""
+
+    async def send_message_async(self, content, generation_config=None, stream=False):
+        chunks = await super().send_message_async(content, generation_config, stream)
+        if len(self.sent) == 1:
+            return stall_chunks(chunks)
+        return chunks
+
+
+async def stall_chunks(chunks):
+    """Stall before replaying streamed chunks."""
+    await asyncio.sleep(10)
+    async for chunk in chunks:
+        yield chunk
+
+
+class FakeModel:
+    """Model handing out one scripted chat session."""
+
+    def __init__(self, responses, delay=0.0):
+        self.chat = FakeChat(responses, delay)
+
+    def start_chat(self, history=None):
+        return self.chat
+
+
+def make_service(responses):
+    """Create a service wired to fake models, bypassing Vertex AI initialization."""
+    service = VertexAIService.__new__(VertexAIService)
+    service.model_name = "gemini-test"
+    service.tool_names = {"calculate_liquidity_ratios", "calculate_leverage_ratios"}
+    service.models = ModelRegistry(
+        lambda name: FakeModel(responses), allowed=["gemini-test", "gemini-flash-test"]
+    )
+    return service
+
+
+def fake_chat(service, model_name="gemini-test"):
+    """Get the scripted chat session of a model built by the service."""
+    return service.models.get(model_name).chat
+
+
+@pytest.fixture
+def messages():
+    """Single user turn."""
+    return [Message(role="user", content="Analiza la liquidez y el endeudamiento")]
+
+
+class TestToolLoop:
+    """Test server-side function calling."""
+
+    def test_parallel_tool_calls_fed_back_in_one_request(self, messages):
+        """Test all calls of a turn run concurrently and return in one follow-up."""
+        service = make_service(
+            [
+                function_call_response(
+                    (
+                        "calculate_liquidity_ratios",
+                        {"activos_corrientes": 150, "pasivos_corrientes": 100},
+                    ),
+                    (
+                        "calculate_leverage_ratios",
+                        {"pasivos_totales": 5, "activos_totales": 10, "patrimonio": 5},
+                    ),
+                ),
+                text_response("La liquidez es 1.5"),
+            ]
+        )
+        running = 0
+        max_running = 0
+
+        async def executor(name, args):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"tool": name, "args": args}
+
+        result = asyncio.run(service.generate_response(messages, tool_executor=executor))
+
+        assert result["response"] == "La liquidez es 1.5"
+        assert [c["name"] for c in result["tool_calls"]] == [
+            "calculate_liquidity_ratios",
+            "calculate_leverage_ratios",
+        ]
+        assert result["tool_calls"][0]["result"]["tool"] == "calculate_liquidity_ratios"
+        assert max_running == 2
+
+        chat = fake_chat(service)
+        assert len(chat.sent) == 2
+        follow_up = chat.sent[1]
+        assert len(follow_up) == 2
+        assert follow_up[0].function_response.name == "calculate_liquidity_ratios"
+
+    def test_iteration_cap(self, messages):
+        """Test the loop stops after the configured number of rounds."""
+        call = ("calculate_liquidity_ratios", {"activos_corrientes": 1, "pasivos_corrientes": 1})
+        service = make_service([function_call_response(call) for _ in range(3)])
+
+        async def executor(name, args):
+            return {"ok": True}
+
+        result = asyncio.run(
+            service.generate_response(messages, tool_executor=executor, max_tool_iterations=2)
+        )
+        executed = [c for c in result["tool_calls"] if "result" in c]
+        assert len(executed) == 2
+        assert len(result["tool_calls"]) == 3
+        assert len(fake_chat(service).sent) == 3
+
+    def test_tool_errors_and_unknown_tools_are_reported(self, messages):
+        """Test failures are sent back to the model instead of aborting the turn."""
+        service = make_service(
+            [
+                function_call_response(
+                    ("calculate_liquidity_ratios", {}),
+                    ("delete_everything", {}),
+                ),
+                text_response("No pude calcular"),
+            ]
+        )
+
+        async def executor(name, args):
+            raise TypeError("missing arguments")
+
+        result = asyncio.run(service.generate_response(messages, tool_executor=executor))
+        errors = [c["result"]["error"] for c in result["tool_calls"]]
+        assert "missing arguments" in errors[0]
+        assert "Unknown tool" in errors[1]
+
+    def test_without_executor_calls_are_only_reported(self, messages):
+        """Test calls are returned unexecuted when no executor is given."""
+        service = make_service(
+            [function_call_response(("calculate_liquidity_ratios", {"activos_corrientes": 1}))]
+        )
+        result = asyncio.run(service.generate_response(messages))
+        assert result["response"] == ""
+        assert result["tool_calls"] == [
+            {"name": "calculate_liquidity_ratios", "arguments": {"activos_corrientes": 1.0}}
+        ]
+
+    def test_zero_temperature_is_honored(self, messages):
+        """Test an explicit temperature of 0 is not replaced by the default."""
+        service = make_service([text_response("Hola")])
+        asyncio.run(service.generate_response(messages, temperature=0))
+        config = fake_chat(service).configs[0]._raw_generation_config
+        assert config.temperature == 0
+
+
+class TestSessions:
+    """Test turns sent on a live chat session."""
+
+    def test_only_the_new_turn_is_sent(self):
+        """Test a session turn sends just the new message and runs tools."""
+        call = ("calculate_liquidity_ratios", {"activos_corrientes": 2, "pasivos_corrientes": 1})
+        service = make_service([function_call_response(call), text_response("Razón de 2.0")])
+
+        async def executor(name, args):
+            return {"razon_corriente": 2.0}
+
+        chat = service.start_session()
+        result = asyncio.run(
+            service.send_session_message(
+                chat, "gemini-test", "¿Cuál es la liquidez?", tool_executor=executor
+            )
+        )
+
+        assert result["response"] == "Razón de 2.0"
+        assert result["tool_calls"][0]["result"] == {"razon_corriente": 2.0}
+        first_sent = chat.sent[0]
+        assert len(first_sent) == 1
+        assert first_sent[0].text == "¿Cuál es la liquidez?"
+
+    def test_failed_tool_round_is_dropped_from_history(self):
+        """Test a turn failing after a tool call leaves the session usable for the next turn."""
+        call = ("calculate_liquidity_ratios", {"activos_corrientes": 2, "pasivos_corrientes": 1})
+        service = make_service([])
+        chat = HistoryChat(
+            [function_call_response(call), RuntimeError("follow-up failed"), text_response("Hola")]
+        )
+
+        async def executor(name, args):
+            return {"razon_corriente": 2.0}
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(
+                service.send_session_message(
+                    chat, "gemini-test", "¿Liquidez?", tool_executor=executor
+                )
+            )
+        assert chat.history == []
+
+        result = asyncio.run(service.send_session_message(chat, "gemini-test", "Hola"))
+
+        assert result["response"] == "Hola"
+        assert result["kept_in_history"] is True
+        assert len(chat.history) == 2
+        assert chat.history[0][0].text == "Hola"
+
+    def test_unanswered_call_is_dropped_from_history(self):
+        """Test a turn ending on a function call at the iteration cap is not kept."""
+        call = ("calculate_liquidity_ratios", {"activos_corrientes": 2, "pasivos_corrientes": 1})
+        service = make_service([])
+        chat = HistoryChat([function_call_response(call), function_call_response(call)])
+
+        async def executor(name, args):
+            return {"razon_corriente": 2.0}
+
+        result = asyncio.run(
+            service.send_session_message(
+                chat, "gemini-test", "¿Liquidez?", tool_executor=executor, max_tool_iterations=1
+            )
+        )
+
+        assert result["kept_in_history"] is False
+        assert "result" not in result["tool_calls"][-1]
+        assert chat.history == []
+
+
+class TestDatasetContext:
+    """Test the dataset digest sent ahead of the user's message."""
+
+    def test_context_precedes_latest_message(self, messages):
+        """Test the context is its own text part before the user's text."""
+        service = make_service([text_response("Listo")])
+
+        asyncio.run(service.generate_response(messages, context="Datasets: estados"))
+
+        sent = fake_chat(service).sent[0]
+        assert [part.text for part in sent] == ["Datasets: estados", messages[-1].content]
+
+    def test_session_context(self):
+        """Test a session turn can carry the context too."""
+        service = make_service([text_response("Listo")])
+        chat = service.start_session()
+
+        asyncio.run(
+            service.send_session_message(chat, "gemini-test", "Hola", context="Datasets: ventas")
+        )
+
+        assert [part.text for part in chat.sent[0]] == ["Datasets: ventas", "Hola"]
+
+
+class TestHedging:
+    """Test hedged requests within the function-calling loop."""
+
+    def test_hedge_answer_continues_on_hedge_model(self, messages, monkeypatch):
+        """Test a faster hedge model's answer is used and reported as the model used."""
+        policy = ResiliencePolicy(hedge_model="gemini-flash-test", hedge_delay=0.01)
+        monkeypatch.setattr(vertex_ai, "get_resilience_policy", lambda: policy)
+        service = make_service([])
+        models = {
+            "gemini-test": FakeModel([text_response("lento")], delay=1.0),
+            "gemini-flash-test": FakeModel([text_response("rápido")]),
+        }
+        service.models = ModelRegistry(models.__getitem__)
+
+        result = asyncio.run(service.generate_response(messages))
+
+        assert result["response"] == "rápido"
+        assert result["model_used"] == "gemini-flash-test"
+        assert policy.stats()["hedge_wins"] == 1
+
+
+class TestModelSelection:
+    """Test per-request model selection."""
+
+    def test_requested_model_is_built_once_and_reused(self, messages):
+        """Test each model is constructed on first use and then served from the registry."""
+        built = []
+
+        def factory(name):
+            built.append(name)
+            return FakeModel([text_response("Hola"), text_response("Hola de nuevo")])
+
+        service = make_service([])
+        service.models = ModelRegistry(factory, allowed=["gemini-test", "gemini-flash-test"])
+
+        first = asyncio.run(service.generate_response(messages, model="gemini-flash-test"))
+        second = asyncio.run(service.generate_response(messages, model="gemini-flash-test"))
+        default = asyncio.run(service.generate_response(messages))
+
+        assert first["model_used"] == "gemini-flash-test"
+        assert second["response"] == "Hola de nuevo"
+        assert default["model_used"] == "gemini-test"
+        assert built == ["gemini-flash-test", "gemini-test"]
+        assert service.models.warm_models() == ["gemini-flash-test", "gemini-test"]
+
+    def test_unknown_model_is_rejected(self, messages):
+        """Test models outside the allowed list are never built."""
+        service = make_service([text_response("Hola")])
+        with pytest.raises(ValueError, match="not available"):
+            asyncio.run(service.generate_response(messages, model="gpt-4"))
+        assert service.models.warm_models() == []
+
+
+async def collect(events):
+    """Drain an async event stream into a list."""
+    return [event async for event in events]
+
+
+class TestStreaming:
+    """Test streamed responses."""
+
+    def test_text_deltas_then_done(self, messages):
+        """Test each text chunk becomes a delta event followed by done."""
+        service = make_service([[text_response("La liquidez "), text_response("es 1.5")]])
+        events = asyncio.run(collect(service.stream_response(messages)))
+
+        assert [e["event"] for e in events] == ["delta", "delta", "done"]
+        assert "".join(e["data"]["text"] for e in events[:-1]) == "La liquidez es 1.5"
+        assert events[-1]["data"] == {"model_used": "gemini-test", "tool_calls": None}
+
+    def test_tool_calls_and_results_are_streamed(self, messages):
+        """Test tool calls and results are emitted before the follow-up text."""
+        call = (
+            "calculate_liquidity_ratios",
+            {"activos_corrientes": 150, "pasivos_corrientes": 100},
+        )
+        service = make_service(
+            [
+                [function_call_response(call)],
+                [text_response("La razón corriente es 1.5")],
+            ]
+        )
+
+        async def executor(name, args):
+            return {"razon_corriente": 1.5}
+
+        events = asyncio.run(collect(service.stream_response(messages, tool_executor=executor)))
+
+        assert [e["event"] for e in events] == ["tool_call", "tool_result", "delta", "done"]
+        assert events[0]["data"]["name"] == "calculate_liquidity_ratios"
+        assert events[1]["data"] == {
+            "name": "calculate_liquidity_ratios",
+            "result": {"razon_corriente": 1.5},
+        }
+        assert events[-1]["data"]["tool_calls"][0]["result"] == {"razon_corriente": 1.5}
+        assert fake_chat(service).sent[1][0].function_response.name == "calculate_liquidity_ratios"
+
+    def test_stalled_stream_is_retried(self, messages, monkeypatch):
+        """Test a stream stalling before its first chunk times out and is retried."""
+
+        async def no_sleep(seconds):
+            return None
+
+        policy = ResiliencePolicy(attempt_timeout=0.05, max_attempts=2, sleep=no_sleep)
+        monkeypatch.setattr(vertex_ai, "get_resilience_policy", lambda: policy)
+        service = make_service([])
+        model = FakeModel([])
+        model.chat = StallingStreamChat([[text_response("lento")], [text_response("Hola")]])
+        service.models = ModelRegistry(lambda name: model, allowed=["gemini-test"])
+
+        events = asyncio.run(collect(service.stream_response(messages)))
+
+        assert [e["data"].get("text") for e in events[:-1]] == ["Hola"]
+        stats = policy.stats()
+        assert stats["timeouts"] == 1
+        assert stats["retries"] == 1
+        assert stats["latency"]["gemini-test"]["count"] == 1
+
+    def test_iteration_cap(self, messages):
+        """Test streaming stops executing tools after the configured number of rounds."""
+        call = ("calculate_liquidity_ratios", {"activos_corrientes": 1, "pasivos_corrientes": 1})
+        service = make_service([[function_call_response(call)] for _ in range(2)])
+
+        async def executor(name, args):
+            return {"ok": True}
+
+        events = asyncio.run(
+            collect(
+                service.stream_response(messages, tool_executor=executor, max_tool_iterations=1)
+            )
+        )
+        assert [e["event"] for e in events].count("tool_result") == 1
+        assert len(events[-1]["data"]["tool_calls"]) == 2